@@ -0,0 +1,54 @@
+# benchmarks/bench_codec.py
+# Compare le chemin marshmallow (EvenementSchema) et le codec rapide (core/codec.py) :
+# débit de sérialisation / désérialisation et pic mémoire, sur N événements synthétiques.
+#   python benchmarks/bench_codec.py --taille 100000
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.evenement import EvenementSchema
+from core.codec import encoder_lot, decoder_lot
+from benchmarks.generateurs import generer_evenements
+
+
+def mesurer(fonction, *args):
+    """(résultat, secondes, pic mémoire en Mo) ; le pic est mesuré lors d'un second appel
+    car tracemalloc ralentit fortement l'exécution."""
+    depart = time.perf_counter()
+    resultat = fonction(*args)
+    duree = time.perf_counter() - depart
+    tracemalloc.start()
+    fonction(*args)
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultat, duree, pic / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark marshmallow / codec rapide")
+    parser.add_argument('--taille', type=int, default=100000)
+    args = parser.parse_args()
+
+    evenements = generer_evenements(args.taille)
+    schema = EvenementSchema(many=True)
+    chemins = {
+        'marshmallow': (schema.dump, schema.load),
+        'codec': (encoder_lot, decoder_lot),
+    }
+
+    print(f"{args.taille} événements")
+    print(f"{'chemin':<12} {'dump (s)':>9} {'dump/s':>10} {'pic (Mo)':>9} "
+          f"{'load (s)':>9} {'load/s':>10} {'pic (Mo)':>9}")
+    for nom, (dump, load) in chemins.items():
+        donnees, duree_dump, pic_dump = mesurer(dump, evenements)
+        _, duree_load, pic_load = mesurer(load, donnees)
+        print(f"{nom:<12} {duree_dump:>9.3f} {args.taille / duree_dump:>10.0f} {pic_dump:>9.1f} "
+              f"{duree_load:>9.3f} {args.taille / duree_load:>10.0f} {pic_load:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
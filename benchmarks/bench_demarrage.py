@@ -0,0 +1,100 @@
+# benchmarks/bench_demarrage.py
+# Temps de démarrage du CLI (interfaces/cli_main.py) sur un stockage synthétique : jusqu'au
+# premier menu, et pour les commandes non interactives (--suggest, --bilan) avec et sans le
+# cache binaire des inventaires. Chaque cas est un nouveau processus (meilleur de N) ; le
+# code de sortie est 1 si un cas dépasse son budget.
+#   python benchmarks/bench_demarrage.py --taille 100000
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(RACINE, "interfaces", "cli_main.py")
+
+# Budgets (ms, processus complet) à 100k événements / transactions ; None = mesuré seulement
+BUDGETS_MS = {
+    'premier menu': 150,
+    '--suggest 45 (sans cache)': None,
+    '--suggest 45 (cache)': 1000,
+    '--bilan (sans cache)': None,
+    '--bilan (cache)': 1000,
+}
+
+
+def preparer_stockage(dossier, taille):
+    """Inventaire et transactions synthétiques écrits au format du CLI (instantané compacté)."""
+    os.environ['ASSISTANT_STORAGE_DIR'] = os.path.join(dossier, 'storage')
+    os.environ['ASSISTANT_IDS_DIR'] = os.path.join(dossier, 'ids')
+    from benchmarks.generateurs import generer_evenements, generer_transactions
+    from core.codec import encoder_evenement, decoder_evenement
+    from core.finance_agent import Transaction
+    from utils.persistence import Journal, STORAGE_DIR
+
+    os.makedirs(STORAGE_DIR, exist_ok=True)
+    for nom, encoder, decoder, objets in (
+            ("inventaire", encoder_evenement, decoder_evenement, generer_evenements(taille)),
+            ("transactions", Transaction.to_dict, lambda d: Transaction(**d), generer_transactions(taille))):
+        journal = Journal(nom, encoder, decoder)
+        journal.enregistrer_lot(objets)
+        journal.compacter()
+    return {**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+
+
+def vider_caches(environnement):
+    dossier = environnement['ASSISTANT_STORAGE_DIR']
+    for nom in os.listdir(dossier):
+        if nom.endswith('.cache.pickle'):
+            os.remove(os.path.join(dossier, nom))
+
+
+def chronometrer(arguments, environnement, entree='', avant=None, repetitions=3):
+    """Meilleur temps (ms) d'un lancement complet du CLI."""
+    meilleur = None
+    for _ in range(repetitions):
+        if avant is not None:
+            avant(environnement)
+        debut = time.perf_counter()
+        resultat = subprocess.run([sys.executable, CLI, *arguments], input=entree, env=environnement,
+                                  capture_output=True, text=True)
+        duree = (time.perf_counter() - debut) * 1000
+        if resultat.returncode != 0:
+            raise RuntimeError(resultat.stderr.strip().splitlines()[-1])
+        meilleur = duree if meilleur is None else min(meilleur, duree)
+    return meilleur
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps de démarrage du CLI")
+    parser.add_argument('--taille', type=int, default=100_000)
+    parser.add_argument('--repetitions', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench_demarrage_') as dossier:
+        environnement = preparer_stockage(dossier, args.taille)
+        cas = {
+            'premier menu': lambda: chronometrer([], environnement, entree='6\n', repetitions=args.repetitions),
+            '--suggest 45 (sans cache)': lambda: chronometrer(['--suggest', '45'], environnement,
+                                                              avant=vider_caches, repetitions=args.repetitions),
+            '--suggest 45 (cache)': lambda: chronometrer(['--suggest', '45'], environnement, repetitions=args.repetitions),
+            '--bilan (sans cache)': lambda: chronometrer(['--bilan'], environnement,
+                                                         avant=vider_caches, repetitions=args.repetitions),
+            '--bilan (cache)': lambda: chronometrer(['--bilan'], environnement, repetitions=args.repetitions),
+        }
+        depassements = 0
+        print(f"{'Cas':<28} {'ms':>9}  budget ({args.taille} éléments)")
+        for nom, mesure in cas.items():
+            duree = mesure()
+            budget = BUDGETS_MS[nom]
+            depasse = budget is not None and duree > budget
+            depassements += depasse
+            print(f"{nom:<28} {duree:>9.1f}  {budget if budget is not None else '-'}{'  DÉPASSÉ' if depasse else ''}")
+    sys.exit(1 if depassements else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_formats.py
+# Compare les formats d'échange de l'API sur un inventaire synthétique : taille du corps et
+# coût d'encodage / décodage du JSON actuel, du JSON sans tri des clés, du format en colonnes
+# (interfaces/format_compact.py), avec et sans gzip.
+#   python benchmarks/bench_formats.py --taille 10000
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from interfaces.format_compact import compacter, deplier, NIVEAU_GZIP
+from benchmarks.generateurs import generer_taches_api
+
+COMPACT = (',', ':')
+
+
+def chronometrer(fonction, argument, repetitions=3):
+    """(résultat, meilleur temps en s)."""
+    meilleur = None
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction(argument)
+        duree = time.perf_counter() - debut
+        meilleur = duree if meilleur is None else min(meilleur, duree)
+    return resultat, meilleur
+
+
+def avec_gzip(encoder, decoder):
+    return (lambda obj: gzip.compress(encoder(obj), compresslevel=NIVEAU_GZIP),
+            lambda corps: decoder(gzip.decompress(corps)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Taille et coût des formats d'échange de l'API")
+    parser.add_argument('--taille', type=int, default=10000)
+    args = parser.parse_args()
+
+    corps = {'inventaire': generer_taches_api(args.taille)}
+    formats = {
+        'JSON actuel (clés triées)': (
+            lambda obj: json.dumps(obj, sort_keys=True, separators=COMPACT).encode(),
+            json.loads),
+        'JSON sans tri': (
+            lambda obj: json.dumps(obj, ensure_ascii=False, separators=COMPACT).encode(),
+            json.loads),
+        'colonnes': (
+            lambda obj: json.dumps(compacter(obj), ensure_ascii=False, separators=COMPACT).encode(),
+            lambda corps: deplier(json.loads(corps))),
+    }
+    for nom, (encoder, decoder) in list(formats.items()):
+        formats[f"{nom} + gzip"] = avec_gzip(encoder, decoder)
+
+    reference = None
+    print(f"{args.taille} événements")
+    print(f"{'format':<32} {'taille (Ko)':>11} {'ratio':>6} {'encodage (ms)':>14} {'décodage (ms)':>14}")
+    for nom, (encoder, decoder) in formats.items():
+        donnees, duree_encodage = chronometrer(encoder, corps)
+        decode, duree_decodage = chronometrer(decoder, donnees)
+        assert decode == corps, nom
+        reference = reference or len(donnees)
+        print(f"{nom:<32} {len(donnees) / 1024:>11.1f} {len(donnees) / reference:>6.2f} "
+              f"{duree_encodage * 1000:>14.1f} {duree_decodage * 1000:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
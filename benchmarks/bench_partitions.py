@@ -0,0 +1,59 @@
+# benchmarks/bench_partitions.py
+# Débit d'écriture du stockage partitionné (core/partitions.py) selon le nombre de
+# partitions : P processus écrivent chacun pour leurs propres utilisateurs, une transaction
+# par événement (comme POST /api/v1/taches). Avec une seule partition, tous attendent le
+# verrou d'écriture du même fichier SQLite.
+#   python benchmarks/bench_partitions.py --processus 8 --partitions 1 4 16
+import argparse
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.partitions import StockagePartitionne
+
+
+def ecrire(args):
+    """Un processus : `ecritures` ajouts répartis sur ses utilisateurs ; renvoie sa durée."""
+    dossier, rang, utilisateurs, ecritures = args
+    os.environ['ASSISTANT_WORKER_ID'] = str(rang)
+    partitions = StockagePartitionne(dossier)
+    stockages = [partitions.stockage(f"bench-{rang}-{u}") for u in range(utilisateurs)]
+    debut = time.perf_counter()
+    for i in range(ecritures):
+        stockages[i % utilisateurs].ajouter({'nom': f"Tâche {i}", 'type_event': 'Tache', 'importance': 3,
+                                             'urgence': 3, 'duree_totale_minutes': 30})
+    return time.perf_counter() - debut
+
+
+def mesurer(nombre, processus, utilisateurs, ecritures):
+    """Écritures par seconde, tous processus confondus."""
+    with tempfile.TemporaryDirectory(prefix='bench_partitions_') as dossier:
+        StockagePartitionne(dossier, nombre)
+        debut = time.perf_counter()
+        with Pool(processus) as pool:
+            pool.map(ecrire, [(dossier, rang, utilisateurs, ecritures) for rang in range(processus)])
+        return processus * ecritures / (time.perf_counter() - debut)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit d'écriture selon le nombre de partitions")
+    parser.add_argument('--partitions', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--processus', type=int, default=8)
+    parser.add_argument('--utilisateurs', type=int, default=8, help="Utilisateurs par processus")
+    parser.add_argument('--ecritures', type=int, default=500, help="Écritures par processus")
+    args = parser.parse_args()
+
+    reference = None
+    print(f"{'Partitions':>10} {'écritures/s':>12} {'gain':>6}  ({args.processus} processus)")
+    for nombre in args.partitions:
+        debit = mesurer(nombre, args.processus, args.utilisateurs, args.ecritures)
+        reference = reference or debit
+        print(f"{nombre:>10} {debit:>12.0f} {debit / reference:>5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
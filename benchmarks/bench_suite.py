@@ -0,0 +1,297 @@
+# benchmarks/bench_suite.py
+# Suite de benchmarks hors ligne : score / suggestion, sérialisation, bilan financier et
+# toutes les routes de api_main (client de test Flask), sur des inventaires synthétiques.
+# Les résultats (meilleur temps, pic mémoire) sont écrits en JSON puis comparés à une
+# baseline : le code de sortie est 1 si un cas régresse au-delà du seuil.
+#   python benchmarks/bench_suite.py                          # 1k, 10k, 100k
+#   python benchmarks/bench_suite.py --tailles 1000000        # 1M (long)
+#   python benchmarks/bench_suite.py --enregistrer-baseline   # nouvelle référence
+import argparse
+import contextlib
+import gc
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# L'API ne doit écrire que dans un dossier temporaire
+DOSSIER_TEMPORAIRE = tempfile.mkdtemp(prefix="bench-assistant-")
+os.environ.setdefault('ASSISTANT_DATA_PATH', DOSSIER_TEMPORAIRE)
+
+from core.evenement import EvenementSchema
+from core.codec import encoder_lot, decoder_lot
+from core.logique import suggerer_tache
+from core.finance_agent import construire_grand_livre
+from core.index_priorite import index_evenements, IndexSynchronise
+from core.stockage import creer_stockage
+from core.recurrence import IndexCalendrier
+from benchmarks.generateurs import generer_evenements, generer_taches_api, generer_transactions
+from interfaces import api_main
+from interfaces.cli_main import afficher_bilan_finance_cli
+from utils.persistence import FichiersGrandLivre
+
+DOSSIER_BENCH = os.path.dirname(os.path.abspath(__file__))
+TAILLES_PAR_DEFAUT = (1_000, 10_000, 100_000)
+SEUIL_REGRESSION = 0.25     # +25 % sur le meilleur temps ou le pic mémoire
+SEUIL_ABSOLU_S = 0.002      # en dessous de 2 ms d'écart, on considère que c'est du bruit
+SEUIL_ABSOLU_MO = 0.5
+FENETRE_MOIS = {'debut': '2025-06-01T00:00:00Z', 'fin': '2025-07-01T00:00:00Z'}
+TAILLE_LOT = 100
+
+
+# --- Mesure ---
+
+def mesurer(fonction, repetitions, budget, memoire=True):
+    """(meilleur temps en s, pic mémoire en Mo) ; un appel d'échauffement n'est pas compté.
+    Le minimum des répétitions est moins sensible au bruit de la machine que la moyenne. Le pic est mesuré sur un appel séparé car tracemalloc ralentit fortement l'exécution."""
+    fonction()
+    durees = []
+    gc.collect()
+    gc.disable()  # comme timeit : les passes du ramasse-miettes dépendent des cas précédents
+    try:
+        depart = time.perf_counter()
+        while len(durees) < repetitions:
+            debut = time.perf_counter()
+            fonction()
+            durees.append(time.perf_counter() - debut)
+            if time.perf_counter() - depart > budget:
+                break
+    finally:
+        gc.enable()
+    pic = None
+    if memoire:
+        tracemalloc.start()
+        fonction()
+        pic = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return min(durees), pic
+
+
+def calibrer(repetitions=5):
+    """Temps d'une boucle Python fixe : sert à ramener la baseline à la vitesse de la machine."""
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        total = 0
+        for i in range(1_000_000):
+            total += i
+        durees.append(time.perf_counter() - debut)
+    return min(durees)
+
+
+# --- Cas mesurés ---
+
+def brancher_stockage(n):
+    """Nouveau stockage serveur peuplé avec n tâches, branché sur les routes de api_main."""
+    dossier = os.path.join(DOSSIER_TEMPORAIRE, str(n))
+    os.makedirs(dossier, exist_ok=True)
+    stockage = creer_stockage(dossier)
+    stockage.appliquer_lot([('ajouter', None, tache) for tache in generer_taches_api(n)])
+    api_main.stockage = stockage
+    api_main.index_priorites = IndexSynchronise(stockage)
+    api_main.index_calendrier = IndexSynchronise(stockage, fabrique=IndexCalendrier,
+                                                 charger=lambda s: s.evenements_planifies())
+    return stockage
+
+
+def requete(client, methode, url, corps=None):
+    """Appelle une route et échoue bruyamment si elle renvoie une erreur."""
+    reponse = client.open(url, method=methode, data=corps, content_type='application/json')
+    if reponse.status_code >= 400:
+        raise RuntimeError(f"{methode} {url} -> {reponse.status_code} : {reponse.get_data(as_text=True)[:200]}")
+    return reponse
+
+
+def operations_lot(n, ajouts=True):
+    """Lot mixte de TAILLE_LOT opérations sur des db_id existants (1..n)."""
+    operations = []
+    for i in range(TAILLE_LOT):
+        db_id = 1 + (i * 7919) % n
+        if i % 4 == 0 and ajouts:
+            operations.append({'op': 'add', 'nom': f"Lot {i}", 'duree': 30})
+        elif i % 2:
+            operations.append({'op': 'update', 'db_id': db_id, 'urgence': 1 + i % 5})
+        else:
+            operations.append({'op': 'complete', 'db_id': db_id})
+    return operations
+
+
+def cas_domaine(n):
+    """Cas sans HTTP : suggestion, sérialisation, bilan financier."""
+    evenements = generer_evenements(n)
+    transactions = generer_transactions(n)
+    index = index_evenements(evenements)
+    schema = EvenementSchema(many=True)
+    # Le CLI garde le grand livre chargé (colonnes sur disque) : le bilan n'en lit que les cumuls.
+    # Son chargement au démarrage (colonnes projetées en mémoire) est mesuré à part.
+    grand_livre = construire_grand_livre(transactions)
+    fichiers = FichiersGrandLivre(os.path.join(DOSSIER_TEMPORAIRE, f"grand_livre_{n}"))
+    fichiers.ecrire(grand_livre)
+    sortie = io.StringIO()
+
+    def bilan():
+        sortie.seek(0)
+        sortie.truncate()
+        with contextlib.redirect_stdout(sortie):
+            afficher_bilan_finance_cli(transactions, grand_livre)
+
+    return {
+        'suggerer_tache': lambda: suggerer_tache(evenements, 60),
+        'suggerer_tache (index)': lambda: suggerer_tache(evenements, 60, index=index),
+        'EvenementSchema dump+load': lambda: schema.load(schema.dump(evenements)),
+        'codec dump+load': lambda: decoder_lot(encoder_lot(evenements)),
+        'bilan transactions': bilan,
+        'bilan (chargement du grand livre)': lambda: fichiers.charger(transactions),
+    }
+
+
+def cas_routes(n, client):
+    """Un cas par route de api_main ; les routes stateless reçoivent l'inventaire complet."""
+    taches = generer_taches_api(n)
+    inventaire = json.dumps({'inventaire': taches})
+    brancher_stockage(n)
+    milieu = n // 2
+    a_supprimer = list(range(n, 0, -1))
+
+    def avec_inventaire(**champs):
+        return json.dumps(dict(champs, inventaire=taches))
+
+    corps = {
+        'ajouter': avec_inventaire(nom="Nouvelle", duree=45),
+        'terminer': avec_inventaire(db_id=milieu),
+        'lot stateless': avec_inventaire(operations=operations_lot(n)),
+        'calendrier': avec_inventaire(**FENETRE_MOIS),
+        'lot serveur': json.dumps({'operations': operations_lot(n, ajouts=False)}),
+    }
+    return {
+        'GET /': lambda: requete(client, 'GET', '/'),
+        'POST /api/v1/taches/priorite': lambda: requete(client, 'POST', '/api/v1/taches/priorite', inventaire),
+        'POST /api/v1/taches/priorite?tri=score&limite=10':
+            lambda: requete(client, 'POST', '/api/v1/taches/priorite?tri=score&limite=10', inventaire),
+        'POST /api/v1/taches/ajouter': lambda: requete(client, 'POST', '/api/v1/taches/ajouter', corps['ajouter']),
+        'POST /api/v1/taches/terminer': lambda: requete(client, 'POST', '/api/v1/taches/terminer', corps['terminer']),
+        'POST /api/v1/taches/batch (stateless)':
+            lambda: requete(client, 'POST', '/api/v1/taches/batch', corps['lot stateless']),
+        'POST /api/v1/calendrier': lambda: requete(client, 'POST', '/api/v1/calendrier', corps['calendrier']),
+        'GET /api/v1/taches?limite=100': lambda: requete(client, 'GET', '/api/v1/taches?limite=100'),
+        'POST /api/v1/taches':
+            lambda: requete(client, 'POST', '/api/v1/taches', json.dumps({'nom': "Nouvelle", 'duree': 45})),
+        'GET /api/v1/taches/priorite?limite=10': lambda: requete(client, 'GET', '/api/v1/taches/priorite?limite=10'),
+        'GET /api/v1/taches/priorite?creneau=60':
+            lambda: requete(client, 'GET', '/api/v1/taches/priorite?creneau=60'),
+        'GET /api/v1/taches/<id>': lambda: requete(client, 'GET', f'/api/v1/taches/{milieu}'),
+        'PATCH /api/v1/taches/<id>':
+            lambda: requete(client, 'PATCH', f'/api/v1/taches/{milieu}', json.dumps({'urgence': 4})),
+        'POST /api/v1/taches/<id>/terminer': lambda: requete(client, 'POST', f'/api/v1/taches/{milieu}/terminer'),
+        'POST /api/v1/taches/batch': lambda: requete(client, 'POST', '/api/v1/taches/batch', corps['lot serveur']),
+        'GET /api/v1/calendrier':
+            lambda: requete(client, 'GET', f"/api/v1/calendrier?debut={FENETRE_MOIS['debut']}&fin={FENETRE_MOIS['fin']}"),
+        'DELETE /api/v1/taches/<id>': lambda: requete(client, 'DELETE', f'/api/v1/taches/{a_supprimer.pop()}'),
+    }
+
+
+# --- Comparaison avec la baseline ---
+
+def comparer(rapport, baseline, seuil):
+    """
+    Liste des régressions (messages) entre deux rapports. Les temps de la baseline sont
+    d'abord mis à l'échelle par le rapport des calibrations (machine plus lente ou chargée).
+    """
+    echelle = 1.0
+    if rapport.get('calibration_s') and baseline.get('calibration_s'):
+        echelle = rapport['calibration_s'] / baseline['calibration_s']
+    regressions = []
+    for cle, mesure in rapport['resultats'].items():
+        reference = baseline['resultats'].get(cle)
+        if reference is None:
+            continue
+        for champ, unite, absolu in (('secondes', 's', SEUIL_ABSOLU_S), ('pic_mo', 'Mo', SEUIL_ABSOLU_MO)):
+            valeur, base = mesure.get(champ), reference.get(champ)
+            if valeur is None or base is None:
+                continue
+            if champ == 'secondes':
+                base *= echelle
+            if valeur > base * (1 + seuil) and valeur - base > absolu:
+                regressions.append(f"{cle} : {champ} {base:.4f} -> {valeur:.4f} {unite} "
+                                   f"(+{(valeur / base - 1) * 100 if base else float('inf'):.0f} %)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de l'assistant")
+    parser.add_argument('--tailles', type=int, nargs='+', default=list(TAILLES_PAR_DEFAUT))
+    parser.add_argument('--filtre', default=None, help="Ne mesurer que les cas contenant ce texte")
+    parser.add_argument('--repetitions', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=2.0, help="Temps max (s) de répétitions par cas")
+    parser.add_argument('--sans-memoire', action='store_true')
+    parser.add_argument('--sortie', default=os.path.join(DOSSIER_BENCH, 'resultats.json'))
+    parser.add_argument('--baseline', default=os.path.join(DOSSIER_BENCH, 'baseline.json'))
+    parser.add_argument('--seuil', type=float, default=SEUIL_REGRESSION)
+    parser.add_argument('--enregistrer-baseline', action='store_true')
+    args = parser.parse_args()
+    try:
+        return executer(args)
+    finally:
+        shutil.rmtree(DOSSIER_TEMPORAIRE, ignore_errors=True)
+
+
+def executer(args):
+    logging.disable(logging.INFO)  # les logs par requête de api_main fausseraient les mesures
+    client = api_main.app.test_client()
+    resultats = {}
+    calibration = calibrer()
+
+    for n in args.tailles:
+        print(f"\n=== {n} événements ===")
+        cas = {**cas_domaine(n), **cas_routes(n, client)}
+        for nom, fonction in cas.items():
+            if args.filtre and args.filtre not in nom:
+                continue
+            secondes, pic = mesurer(fonction, args.repetitions, args.budget, not args.sans_memoire)
+            resultats[f"{nom}|{n}"] = {'secondes': secondes, 'pic_mo': pic}
+            memoire = f"{pic:>9.1f}" if pic is not None else f"{'-':>9}"
+            print(f"{nom:<52} {secondes * 1000:>10.2f} ms {memoire} Mo")
+
+    rapport = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'calibration_s': calibration,
+        'resultats': resultats,
+    }
+    with open(args.sortie, 'w', encoding='utf-8') as f:
+        json.dump(rapport, f, indent=2, ensure_ascii=False)
+    print(f"\nRésultats écrits dans {args.sortie}")
+
+    if args.enregistrer_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(rapport, f, indent=2, ensure_ascii=False)
+        print(f"Baseline enregistrée dans {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("Pas de baseline : comparaison ignorée (voir --enregistrer-baseline).")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = comparer(rapport, baseline, args.seuil)
+    if regressions:
+        print(f"\n{len(regressions)} régression(s) au-delà de {args.seuil:.0%} :")
+        for message in regressions:
+            print(f"  - {message}")
+        return 1
+    print(f"Aucune régression au-delà de {args.seuil:.0%} par rapport à la baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
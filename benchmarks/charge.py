@@ -0,0 +1,254 @@
+# benchmarks/charge.py
+# Test de charge local de l'API : N clients simultanés (connexions HTTP/1.1 persistantes,
+# asyncio, sans dépendance) enchaînent des requêtes pendant D secondes ; affiche les requêtes
+# par seconde et les latences p50/p99 pour chaque mode de service :
+#   wsgi : gunicorn -c interfaces/serveur_conf.py interfaces.api_main:app
+#   asgi : uvicorn interfaces.asgi_main:app (demande `pip install uvicorn`)
+# Chaque serveur est lancé sur un dossier de données temporaire. Le mélange de requêtes : tri
+# d'un inventaire envoyé (POST /api/v1/taches/priorite), liste et priorités de l'inventaire
+# serveur, ajouts. --lents K ajoute K clients qui envoient un gros inventaire au compte-gouttes
+# (non comptés dans les mesures).
+#   python benchmarks/charge.py --clients 500 --duree 20 --modes wsgi asgi --lents 20
+#   python benchmarks/charge.py --url http://127.0.0.1:10000 --clients 500   (serveur déjà lancé)
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DELAI_DEMARRAGE_S = 60
+DELAI_REQUETE_S = 60
+
+
+def commande_serveur(mode, port, workers):
+    if mode == 'wsgi':
+        return [sys.executable, '-m', 'gunicorn', '-c', 'interfaces/serveur_conf.py', '--bind', f"127.0.0.1:{port}",
+                '--workers', str(workers), 'interfaces.api_main:app']
+    return [sys.executable, '-m', 'uvicorn', 'interfaces.asgi_main:app', '--host', '127.0.0.1', '--port', str(port),
+            '--workers', str(workers), '--backlog', '2048', '--log-level', 'warning', '--no-access-log']
+
+
+def port_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+# --- Client HTTP minimal ---
+
+class Connexion:
+    """Connexion HTTP/1.1 persistante ; rouverte si le serveur la ferme."""
+
+    def __init__(self, hote, port):
+        self.hote, self.port = hote, port
+        self.lecteur = self.ecrivain = None
+
+    async def fermer(self):
+        if self.ecrivain is not None:
+            self.ecrivain.close()
+            self.lecteur = self.ecrivain = None
+
+    async def requete(self, methode, chemin, corps=b''):
+        """(statut, corps de la réponse)."""
+        if self.ecrivain is None:
+            self.lecteur, self.ecrivain = await asyncio.open_connection(self.hote, self.port)
+        en_tetes = (f"{methode} {chemin} HTTP/1.1\r\nHost: {self.hote}:{self.port}\r\nX-Utilisateur: charge\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(corps)}\r\n\r\n")
+        self.ecrivain.write(en_tetes.encode() + corps)
+        await self.ecrivain.drain()
+        return await self.lire_reponse()
+
+    async def lire_reponse(self):
+        ligne = await self.lecteur.readline()
+        if not ligne:
+            raise ConnectionResetError("Connexion fermée par le serveur")
+        statut = int(ligne.split()[1])
+        longueur, morceaux, fermer = 0, False, False
+        while True:
+            ligne = await self.lecteur.readline()
+            if ligne in (b'\r\n', b''):
+                break
+            nom, _, valeur = ligne.decode('latin-1').partition(':')
+            nom, valeur = nom.strip().lower(), valeur.strip().lower()
+            if nom == 'content-length':
+                longueur = int(valeur)
+            elif nom == 'transfer-encoding':
+                morceaux = 'chunked' in valeur
+            elif nom == 'connection':
+                fermer = valeur == 'close'
+        if morceaux:
+            parties = []
+            while True:
+                taille = int((await self.lecteur.readline()).split(b';')[0], 16)
+                parties.append(await self.lecteur.readexactly(taille + 2))
+                if taille == 0:
+                    break
+            corps = b''.join(p[:-2] for p in parties)
+        else:
+            corps = await self.lecteur.readexactly(longueur)
+        if fermer:
+            await self.fermer()
+        return statut, corps
+
+
+# --- Scénario ---
+
+def inventaire(taille, graine):
+    alea = random.Random(graine)
+    return [{'nom': f"Tâche {i}", 'type_event': 'Tache', 'importance': alea.randint(1, 5),
+             'urgence': alea.randint(1, 5), 'duree_totale_minutes': alea.choice((15, 30, 60, 90)),
+             'projet': f"Projet {i % 7}", 'est_complete': alea.random() < 0.2} for i in range(taille)]
+
+
+def corps_priorite(taille):
+    """Quelques corps différents (le cache de réponses ne sert pas tout)."""
+    return [json.dumps({'inventaire': inventaire(taille, graine)}).encode() for graine in range(8)]
+
+
+REQUETES = (
+    # (poids, méthode, chemin, corps : None = inventaire envoyé, sinon constant)
+    (5, 'POST', '/api/v1/taches/priorite?limite=20', None),
+    (3, 'GET', '/api/v1/taches?limite=50', b''),
+    (1, 'GET', '/api/v1/taches/priorite?limite=10', b''),
+    (1, 'POST', '/api/v1/taches', json.dumps({'nom': "Charge", 'duree': 30, 'forcer': True}).encode()),
+)
+
+
+async def client(hote, port, fin, corps, latences, erreurs, graine):
+    alea = random.Random(graine)
+    tirage = [r for r in REQUETES for _ in range(r[0])]
+    connexion = Connexion(hote, port)
+    while time.perf_counter() < fin:
+        _, methode, chemin, corps_fixe = alea.choice(tirage)
+        debut = time.perf_counter()
+        try:
+            statut, _ = await asyncio.wait_for(
+                connexion.requete(methode, chemin, alea.choice(corps) if corps_fixe is None else corps_fixe),
+                DELAI_REQUETE_S)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError, IndexError) as e:
+            erreurs[type(e).__name__] = erreurs.get(type(e).__name__, 0) + 1
+            await connexion.fermer()
+            continue
+        if time.perf_counter() <= fin:
+            latences.append(time.perf_counter() - debut)
+            if statut >= 400:
+                erreurs[statut] = erreurs.get(statut, 0) + 1
+    await connexion.fermer()
+
+
+async def client_lent(hote, port, fin, corps, debit):
+    """Envoie `corps` à `debit` octets/s, puis recommence, jusqu'à la fin du test."""
+    while time.perf_counter() < fin:
+        connexion = Connexion(hote, port)
+        try:
+            connexion.lecteur, connexion.ecrivain = await asyncio.open_connection(hote, port)
+            connexion.ecrivain.write((f"POST /api/v1/taches/priorite HTTP/1.1\r\nHost: {hote}:{port}\r\n"
+                                      f"Content-Type: application/json\r\nContent-Length: {len(corps)}\r\n\r\n").encode())
+            pas = max(1, debit // 10)
+            for i in range(0, len(corps), pas):
+                if time.perf_counter() >= fin:
+                    break
+                connexion.ecrivain.write(corps[i:i + pas])
+                await connexion.ecrivain.drain()
+                await asyncio.sleep(0.1)
+            else:
+                await connexion.lire_reponse()
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            await asyncio.sleep(0.1)
+        finally:
+            await connexion.fermer()
+
+
+async def charger(url, clients, duree, taille, lents, debit_lent):
+    adresse = urlsplit(url)
+    hote, port = adresse.hostname, adresse.port or 80
+    corps = corps_priorite(taille)
+    latences, erreurs = [], {}
+    fin = time.perf_counter() + duree
+    debut = time.perf_counter()
+    lent = json.dumps({'inventaire': inventaire(taille * 10, 99)}).encode()
+    await asyncio.gather(*(client(hote, port, fin, corps, latences, erreurs, graine) for graine in range(clients)),
+                         *(client_lent(hote, port, fin, lent, debit_lent) for _ in range(lents)))
+    return latences, erreurs, min(time.perf_counter(), fin) - debut
+
+
+def centile(valeurs, q):
+    if not valeurs:
+        return float('nan')
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(q * len(valeurs)))]
+
+
+# --- Serveurs ---
+
+def attendre(url, processus):
+    adresse = urlsplit(url)
+    limite = time.monotonic() + DELAI_DEMARRAGE_S
+    while time.monotonic() < limite:
+        if processus.poll() is not None:
+            raise RuntimeError(f"Le serveur s'est arrêté (code {processus.returncode})")
+        try:
+            with socket.create_connection((adresse.hostname, adresse.port), timeout=1) as s:
+                s.sendall(f"GET /api/v1/taches?limite=1 HTTP/1.1\r\nHost: {adresse.netloc}\r\n"
+                          f"X-Utilisateur: charge\r\nConnection: close\r\n\r\n".encode())
+                if s.recv(12).startswith(b'HTTP/1.1 200'):
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Le serveur ne répond pas après {DELAI_DEMARRAGE_S} s")
+
+
+def mesurer_mode(mode, args):
+    port = port_libre()
+    url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory(prefix=f'charge_{mode}_') as dossier:
+        environnement = {**os.environ, 'ASSISTANT_DATA_PATH': dossier, 'ASSISTANT_IDS_DIR': os.path.join(dossier, 'ids'),
+                         'PYTHONPATH': RACINE}
+        with open(os.path.join(dossier, 'serveur.log'), 'w') as journal:
+            processus = subprocess.Popen(commande_serveur(mode, port, args.workers), cwd=RACINE,
+                                         env=environnement, stdout=journal, stderr=subprocess.STDOUT)
+            try:
+                attendre(url, processus)
+                return asyncio.run(charger(url, args.clients, args.duree, args.taille, args.lents, args.debit_lent))
+            finally:
+                processus.terminate()
+                processus.wait(30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge de l'API (WSGI et ASGI)")
+    parser.add_argument('--modes', nargs='+', choices=('wsgi', 'asgi'), default=['wsgi', 'asgi'])
+    parser.add_argument('--url', help="Serveur déjà lancé (ignore --modes)")
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--duree', type=float, default=20.0, help="Secondes")
+    parser.add_argument('--taille', type=int, default=200, help="Tâches par inventaire envoyé")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--lents', type=int, default=0, help="Clients lents (gros inventaire au compte-gouttes)")
+    parser.add_argument('--debit-lent', type=int, default=20_000, help="Octets/s d'un client lent")
+    args = parser.parse_args()
+
+    cibles = [(args.url, None)] if args.url else [(mode, mode) for mode in args.modes]
+    print(f"{'Mode':<24} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>9} {'requêtes':>9}  erreurs "
+          f"({args.clients} clients, {args.lents} lents, {args.duree:.0f} s)")
+    for nom, mode in cibles:
+        if mode is None:
+            latences, erreurs, duree = asyncio.run(charger(nom, args.clients, args.duree, args.taille,
+                                                           args.lents, args.debit_lent))
+        else:
+            latences, erreurs, duree = mesurer_mode(mode, args)
+        print(f"{nom:<24} {len(latences) / duree:>8.0f} {centile(latences, 0.5) * 1000:>8.1f} "
+              f"{centile(latences, 0.99) * 1000:>9.1f} {len(latences):>9}  {erreurs or '-'}")
+
+
+if __name__ == '__main__':
+    main()
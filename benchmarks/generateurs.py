@@ -0,0 +1,65 @@
+# benchmarks/generateurs.py
+# Inventaires et transactions synthétiques, reproductibles (graine fixe), pour les benchmarks.
+import random
+from datetime import datetime, timedelta
+
+from core.evenement import Evenement
+from core.finance_agent import Transaction
+from core.codec import encoder_evenement
+
+DEBUT = datetime(2025, 1, 1)
+PROJETS = ['Gestion', 'Financement', 'Routine', 'Divers']
+CATEGORIES = ['Alimentation', 'Logement', 'Transport', 'Loisirs', 'Salaire', 'Autre']
+
+
+def generer_evenements(n, graine=42):
+    """Mélange réaliste : 2/3 de tâches, 1/3 de RDV, 30 % complétés, dates sur un an."""
+    aleatoire = random.Random(graine)
+    evenements = []
+    for i in range(n):
+        type_event = aleatoire.choice(['Tache', 'Tache', 'RDV'])
+        debut = DEBUT + timedelta(minutes=aleatoire.randint(0, 525600))
+        duree = aleatoire.choice([15, 30, 60, 120])
+        evenements.append(Evenement(
+            nom=f"Événement {i}",
+            type_event=type_event,
+            urgence=aleatoire.randint(1, 5),
+            importance=aleatoire.randint(1, 5),
+            duree_totale_minutes=duree,
+            projet=aleatoire.choice(PROJETS),
+            est_complete=aleatoire.random() < 0.3,
+            progression_pourcentage=aleatoire.choice([0, 0, 0, 25, 50, 75]),
+            date_debut=debut,
+            date_fin=debut + timedelta(minutes=duree) if type_event == 'RDV' else None,
+            db_id=i + 1,
+        ))
+    return evenements
+
+
+def generer_taches_api(n, graine=42):
+    """Même inventaire au format de l'API (dates ISO), avec 20 % de RDV récurrents."""
+    aleatoire = random.Random(graine + 1)
+    taches = []
+    for evenement in generer_evenements(n, graine):
+        tache = encoder_evenement(evenement)
+        tache['date_creation'] = '2025-01-01T00:00:00Z'
+        tache['recurrence'] = 'none'
+        if evenement.type_event == 'RDV' and aleatoire.random() < 0.2:
+            tache['recurrence'] = aleatoire.choice(['daily', 'weekly', 'weekly', 'monthly'])
+        taches.append(tache)
+    return taches
+
+
+def generer_transactions(n, graine=42):
+    aleatoire = random.Random(graine)
+    return [
+        Transaction(
+            description=f"Transaction {i}",
+            montant=round(aleatoire.uniform(1, 500), 2),
+            type_transaction='Revenu' if aleatoire.random() < 0.2 else 'Dépense',
+            categorie=aleatoire.choice(CATEGORIES),
+            date_creation=(DEBUT + timedelta(minutes=aleatoire.randint(0, 525600))).strftime("%Y-%m-%d %H:%M:%S"),
+            db_id=i + 1,
+        )
+        for i in range(n)
+    ]
@@ -0,0 +1,209 @@
+# core/analyse_code.py
+# Analyse des sources Python d'un projet : lignes, fonctions, classes, imports et complexité
+# (cyclomatique, par fonction) de chaque fichier, via ast.
+# Les fichiers sont analysés en parallèle (processus) et les résultats gardés dans un cache
+# sur disque, indexé par chemin et validé par (mtime, taille) puis par empreinte du contenu :
+# une nouvelle analyse ne relit que les fichiers modifiés.
+#   python -m core.analyse_code [racine] [--json rapport.json]
+import argparse
+import ast
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+RACINE_PROJET = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHEMIN_CACHE = os.path.join(RACINE_PROJET, "storage", "analyse_code.cache.json")
+DOSSIERS_IGNORES = {'.git', '__pycache__', '.venv', 'venv', 'node_modules', '.tox', '.nox',
+                    '.mypy_cache', '.pytest_cache', '.ruff_cache', 'storage'}
+# En dessous, lancer des processus coûte plus cher que d'analyser sur place
+SEUIL_PARALLELE = 32
+VERSION_CACHE = 2
+
+# Nœuds qui ajoutent un chemin d'exécution (complexité cyclomatique de McCabe)
+_BRANCHES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.ExceptHandler, ast.IfExp,
+             ast.Assert, ast.comprehension, ast.match_case)
+
+
+def _complexite(noeud):
+    """1 + nombre de branches du corps, sans descendre dans les fonctions imbriquées."""
+    total = 1
+    a_visiter = list(ast.iter_child_nodes(noeud))
+    while a_visiter:
+        enfant = a_visiter.pop()
+        if isinstance(enfant, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)):
+            continue
+        if isinstance(enfant, _BRANCHES):
+            total += 1
+        elif isinstance(enfant, ast.BoolOp):
+            total += len(enfant.values) - 1
+        a_visiter.extend(ast.iter_child_nodes(enfant))
+    return total
+
+
+def analyser_source(texte, nom='<source>'):
+    """Statistiques d'un source Python (lève SyntaxError si le fichier ne se compile pas)."""
+    arbre = ast.parse(texte, filename=nom)
+    lignes = texte.splitlines()
+    fonctions, classes, imports = [], [], set()
+    for noeud in ast.walk(arbre):
+        if isinstance(noeud, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            fonctions.append((noeud.name, noeud.lineno, _complexite(noeud)))
+        elif isinstance(noeud, ast.ClassDef):
+            classes.append(noeud.name)
+        elif isinstance(noeud, ast.Import):
+            imports.update(alias.name for alias in noeud.names)
+        elif isinstance(noeud, ast.ImportFrom):
+            imports.add('.' * noeud.level + (noeud.module or ''))
+    plus_complexe = max(fonctions, key=lambda f: f[2], default=None)
+    return {
+        'lignes': len(lignes),
+        'lignes_code': sum(1 for ligne in lignes if ligne.strip() and not ligne.lstrip().startswith('#')),
+        'fonctions': len(fonctions),
+        'classes': len(classes),
+        'imports': sorted(imports),
+        # Module + fonctions : chaque fonction compte pour 1 + ses branches
+        'complexite': _complexite(arbre) + sum(f[2] for f in fonctions),
+        'complexite_max': plus_complexe[2] if plus_complexe else 0,
+        'fonction_max': f"{plus_complexe[0]}:{plus_complexe[1]}" if plus_complexe else None,
+    }
+
+
+def _analyser_fichier(chemin, empreinte_connue=None):
+    """
+    (empreinte, résultat) d'un fichier ; résultat None si l'empreinte est celle du cache
+    (fichier touché mais inchangé). Exécuté dans un processus du pool.
+    """
+    try:
+        with open(chemin, 'rb') as f:
+            contenu = f.read()
+    except OSError as e:
+        # Supprimé ou illisible depuis le parcours : seul ce fichier est en erreur
+        return None, {'erreur': f"{type(e).__name__}: {e}"}
+    empreinte = hashlib.blake2b(contenu, digest_size=16).hexdigest()
+    if empreinte == empreinte_connue:
+        return empreinte, None
+    try:
+        return empreinte, analyser_source(contenu.decode('utf-8', errors='replace'), chemin)
+    except (SyntaxError, ValueError) as e:
+        return empreinte, {'erreur': f"{type(e).__name__}: {e}"}
+
+
+def fichiers_python(racine):
+    for dossier, sous_dossiers, fichiers in os.walk(racine):
+        sous_dossiers[:] = sorted(d for d in sous_dossiers if d not in DOSSIERS_IGNORES and not d.endswith('.egg-info'))
+        for nom in sorted(fichiers):
+            if nom.endswith('.py'):
+                yield os.path.join(dossier, nom)
+
+
+def _lire_cache(chemin):
+    try:
+        with open(chemin, encoding='utf-8') as f:
+            cache = json.load(f)
+        return cache['fichiers'] if cache.get('version') == VERSION_CACHE else {}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def _ecrire_cache(chemin, fichiers):
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    temporaire = f"{chemin}.tmp"
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        json.dump({'version': VERSION_CACHE, 'fichiers': fichiers}, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temporaire, chemin)
+
+
+def analyser_projet(racine=RACINE_PROJET, chemin_cache=CHEMIN_CACHE, processus=None):
+    """
+    Rapport {racine, fichiers: {chemin relatif: statistiques}, totaux, analyses, cache, duree_s}.
+    Seuls les fichiers dont (mtime, taille) a changé sont relus, et seuls ceux dont le
+    contenu a changé sont réanalysés.
+    """
+    debut = time.perf_counter()
+    racine = os.path.abspath(racine)
+    cache = _lire_cache(chemin_cache) if chemin_cache else {}
+    entrees, a_relire = {}, []
+    for chemin in fichiers_python(racine):
+        try:
+            statut = os.stat(chemin)
+        except OSError as e:
+            # Lien symbolique cassé, fichier supprimé pendant le parcours...
+            entrees[chemin] = {'mtime_ns': None, 'taille': None, 'empreinte': None,
+                               'resultat': {'erreur': f"{type(e).__name__}: {e}"}}
+            continue
+        entree = cache.get(chemin)
+        if entree and entree['mtime_ns'] == statut.st_mtime_ns and entree['taille'] == statut.st_size:
+            entrees[chemin] = entree
+        else:
+            entrees[chemin] = {'mtime_ns': statut.st_mtime_ns, 'taille': statut.st_size,
+                               'empreinte': None, 'resultat': entree['resultat'] if entree else None}
+            a_relire.append((chemin, entree['empreinte'] if entree else None))
+
+    # Processeurs réellement disponibles (conteneurs, taskset), à défaut tous ceux de la machine
+    processus = processus or (len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()) or 1
+    if len(a_relire) >= SEUIL_PARALLELE and processus > 1:
+        with ProcessPoolExecutor(max_workers=processus) as pool:
+            resultats = list(pool.map(_analyser_fichier, *zip(*a_relire),
+                                      chunksize=max(1, len(a_relire) // (4 * processus))))
+    else:
+        resultats = [_analyser_fichier(chemin, empreinte) for chemin, empreinte in a_relire]
+    nb_analyses = 0
+    for (chemin, _), (empreinte, resultat) in zip(a_relire, resultats):
+        entrees[chemin]['empreinte'] = empreinte
+        if empreinte is None:
+            entrees[chemin]['mtime_ns'] = None   # lecture impossible : à retenter la prochaine fois
+        if resultat is not None:
+            entrees[chemin]['resultat'] = resultat
+            nb_analyses += 1
+
+    # Les entrées d'autres racines sont gardées ; celles des fichiers disparus sont oubliées
+    prefixe = os.path.join(racine, '')
+    disparus = [c for c in cache if c.startswith(prefixe) and c not in entrees]
+    if chemin_cache and (a_relire or disparus):
+        _ecrire_cache(chemin_cache, {**{c: e for c, e in cache.items() if not c.startswith(prefixe)}, **entrees})
+
+    fichiers = {os.path.relpath(chemin, racine): entree['resultat'] for chemin, entree in entrees.items()}
+    valides = [r for r in fichiers.values() if 'erreur' not in r]
+    return {
+        'racine': racine,
+        'fichiers': fichiers,
+        'totaux': {
+            'fichiers': len(fichiers),
+            'erreurs': len(fichiers) - len(valides),
+            **{cle: sum(r[cle] for r in valides)
+               for cle in ('lignes', 'lignes_code', 'fonctions', 'classes', 'complexite')},
+        },
+        'analyses': nb_analyses,
+        'cache': len(fichiers) - nb_analyses,
+        'duree_s': round(time.perf_counter() - debut, 3),
+    }
+
+
+def plus_complexes(rapport, n=10):
+    """Les n fichiers de plus grande complexité [(chemin, statistiques)]."""
+    valides = [(chemin, r) for chemin, r in rapport['fichiers'].items() if 'erreur' not in r]
+    return sorted(valides, key=lambda e: e[1]['complexite'], reverse=True)[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse des sources Python d'un projet (rapport JSON)")
+    parser.add_argument('racine', nargs='?', default=RACINE_PROJET)
+    parser.add_argument('--json', help="Fichier du rapport (sortie standard par défaut)")
+    parser.add_argument('--processus', type=int, default=None)
+    parser.add_argument('--sans-cache', action='store_true')
+    args = parser.parse_args()
+
+    rapport = analyser_projet(args.racine, None if args.sans_cache else CHEMIN_CACHE, args.processus)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rapport, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(rapport, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
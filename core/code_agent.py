@@ -3,6 +3,9 @@ import os
 from colorama import Fore, Style
 import datetime
 
+from .analyse_code import analyser_source
+from .profil_imports import module_de_requirement, estimer_demarrage, BUDGET_DEMARRAGE_MS
+
 REQUIREMENTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 
                                  "..", "requirements.txt")
 
@@ -31,6 +34,26 @@ def ajouter_dependance(nouvelle_dependance, fichier=REQUIREMENTS_FILE):
         print(f"{Fore.GREEN}✅ Dépendance '{nouvelle_dependance}' ajoutée.{Style.RESET_ALL}")
     except Exception as e:
         print(f"{Fore.RED}❌ Erreur d'écriture : {e}{Style.RESET_ALL}")
+        return
+    verifier_budget_demarrage(nouvelle_dependance)
+
+def verifier_budget_demarrage(dependance):
+    """
+    Avertit si le paquet ajouté ferait dépasser le budget de démarrage, d'après les profils
+    d'imports déjà enregistrés (aucune mesure ici : le profil se lance à part).
+    """
+    module = module_de_requirement(dependance)
+    estimation = estimer_demarrage(module) if module else None
+    if estimation is None:
+        print(f"{Fore.YELLOW}ℹ️ Coût d'import de '{dependance}' pas encore mesuré : lancer le profil des "
+              f"imports (option 16 du menu, ou python -m core.profil_imports).{Style.RESET_ALL}")
+        return
+    demarrage_ms, surcout_ms = estimation
+    if demarrage_ms > BUDGET_DEMARRAGE_MS:
+        print(f"{Fore.RED}⚠️ '{module}' ajoute {surcout_ms:.0f} ms d'imports : démarrage estimé à "
+              f"{demarrage_ms:.0f} ms (budget {BUDGET_DEMARRAGE_MS:.0f} ms).{Style.RESET_ALL}")
+    else:
+        print(f"ℹ️ '{module}' : +{surcout_ms:.0f} ms d'imports, démarrage estimé à {demarrage_ms:.0f} ms.")
 
 def generer_et_sauvegarder_code(type_code, nom_fichier, nom_entite):
     nom_fichier_complet = f"{nom_fichier}.py"
@@ -59,15 +82,28 @@ class {nom_entite}:
         print(f"{Fore.RED}❌ Erreur de sauvegarde : {e}{Style.RESET_ALL}")
 
 def analyser_fichier_source(nom_fichier_py):
-    chemin_fichier = os.path.join(os.path.dirname(os.path.abspath(__file__)), nom_fichier_py)
+    """
+    Analyse un fichier (chemin relatif au projet, ou nom d'un module de core/) et affiche
+    ses statistiques ; renvoie le nombre de lignes. Voir core/analyse_code.py pour tout le projet.
+    """
+    racine = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    candidats = [os.path.join(racine, nom_fichier_py), os.path.join(os.path.dirname(os.path.abspath(__file__)), nom_fichier_py)]
+    chemin_fichier = next((c for c in candidats if os.path.isfile(c)), candidats[-1])
     
     if not os.path.exists(chemin_fichier):
         print(f"{Fore.RED}❌ Fichier introuvable : {chemin_fichier}{Style.RESET_ALL}")
         return None
     try:
-        with open(chemin_fichier, 'r') as f:
-            lignes = f.readlines()
-        return len(lignes)
+        with open(chemin_fichier, 'r', encoding='utf-8') as f:
+            contenu = f.read()
+        try:
+            stats = analyser_source(contenu, chemin_fichier)
+        except SyntaxError as e:
+            print(f"{Fore.YELLOW}⚠️ Analyse impossible ({e}) : seules les lignes sont comptées.{Style.RESET_ALL}")
+            return len(contenu.splitlines())
+        print(f"{stats['fonctions']} fonctions, {stats['classes']} classes, {len(stats['imports'])} imports, "
+              f"complexité {stats['complexite']} (max {stats['complexite_max']} : {stats['fonction_max']})")
+        return stats['lignes']
     except Exception as e:
         print(f"{Fore.RED}❌ Erreur de lecture : {e}{Style.RESET_ALL}")
-        return None
\ No newline at end of file
+        return None
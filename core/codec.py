@@ -0,0 +1,81 @@
+# core/codec.py
+# Encodeur / décodeur rapide du format de EvenementSchema (dates ISO, db_id).
+# Le schéma marshmallow reste disponible pour la validation stricte (strict=True).
+import json
+from datetime import datetime
+
+from .evenement import Evenement, EvenementSchema
+
+# Champs du format d'échange, dans l'ordre du schéma
+CHAMPS_ENTIERS = ('urgence', 'importance', 'duree_totale_minutes', 'progression_pourcentage', 'db_id')
+CHAMPS_TEXTE = ('nom', 'type_event', 'projet')
+CHAMPS_DATES = ('date_debut', 'date_fin')
+CHAMPS = frozenset(CHAMPS_ENTIERS + CHAMPS_TEXTE + CHAMPS_DATES + ('est_complete',))
+
+
+def _iso(valeur):
+    return valeur.isoformat() if valeur is not None else None
+
+
+def encoder_evenement(e):
+    """Équivalent de EvenementSchema().dump(e)."""
+    return {
+        'nom': e.nom,
+        'type_event': e.type_event,
+        'urgence': e.urgence,
+        'importance': e.importance,
+        'duree_totale_minutes': e.duree_totale_minutes,
+        'projet': e.projet,
+        'est_complete': e.est_complete,
+        'progression_pourcentage': e.progression_pourcentage,
+        'date_debut': _iso(e.date_debut),
+        'date_fin': _iso(e.date_fin),
+        'db_id': e.db_id,
+    }
+
+
+def decoder_evenement(donnees):
+    """
+    Équivalent rapide de EvenementSchema().load(donnees) : mêmes champs, mêmes valeurs
+    par défaut (seuls les champs présents sont transmis à Evenement). Lève ValueError
+    si l'entrée n'est pas conforme.
+    """
+    inconnus = donnees.keys() - CHAMPS
+    if inconnus:
+        raise ValueError(f"Champs inconnus : {', '.join(sorted(inconnus))}")
+    if not isinstance(donnees.get('nom'), str):
+        raise ValueError("Le champ 'nom' est requis")
+
+    champs = dict(donnees)
+    for nom in CHAMPS_ENTIERS:
+        valeur = champs.get(nom)
+        if valeur is not None and type(valeur) is not int:
+            champs[nom] = int(valeur)
+    for nom in CHAMPS_DATES:
+        valeur = champs.get(nom)
+        if valeur is not None:
+            champs[nom] = datetime.fromisoformat(valeur)
+    if 'est_complete' in champs and type(champs['est_complete']) is not bool:
+        raise ValueError("Le champ 'est_complete' doit être un booléen")
+    return Evenement(**champs)
+
+
+# --- Traitement par lots ---
+
+def encoder_lot(evenements):
+    return [encoder_evenement(e) for e in evenements]
+
+
+def decoder_lot(liste, strict=False):
+    """Décode une liste de dicts ; strict=True passe par la validation marshmallow complète."""
+    if strict:
+        return EvenementSchema(many=True).load(liste)
+    return [decoder_evenement(d) for d in liste]
+
+
+def dumps_lot(evenements):
+    return json.dumps(encoder_lot(evenements), ensure_ascii=False)
+
+
+def loads_lot(texte, strict=False):
+    return decoder_lot(json.loads(texte), strict=strict)
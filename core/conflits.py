@@ -0,0 +1,96 @@
+# core/conflits.py
+# Détection des rendez-vous qui se chevauchent (récurrences comprises) par balayage :
+# les occurrences sont triées par début, et un tas des occurrences « en cours » (triées
+# par fin) donne directement celles qu'une nouvelle occurrence chevauche. Coût
+# O(n log n + k) pour n occurrences et k conflits, au lieu de comparer toutes les paires.
+import heapq
+from datetime import timedelta
+
+from core.recurrence import RECURRENCES, instance, iterer_occurrences, format_iso, _intervalle
+
+TYPES_RDV = ('RDV', 'RendezVous')
+
+# Horizon de vérification d'un nouveau rendez-vous récurrent (une série n'a pas de fin)
+HORIZON_SERIE = timedelta(days=366)
+
+
+def est_rdv(evenement):
+    return evenement.get('type_event') in TYPES_RDV and evenement.get('est_complete') is not True
+
+
+def occurrences_rdv(evenements, fenetre_debut, fenetre_fin, groupe=0):
+    """(début, fin, groupe, evenement) des occurrences de rendez-vous dans la fenêtre, développées à la demande."""
+    for evenement in evenements:
+        if est_rdv(evenement):
+            for debut, fin in iterer_occurrences(evenement, fenetre_debut, fenetre_fin):
+                yield debut, fin, groupe, evenement
+
+
+def balayer(occurrences, croiser=False):
+    """
+    Paires d'occurrences qui se chevauchent : générateur de (a, b), b commençant après a.
+    Avec croiser=True, seules les paires de groupes différents sont produites (ex. un
+    nouveau rendez-vous contre l'agenda existant) : les conflits déjà présents ne coûtent rien.
+    """
+    en_cours = {}   # groupe -> tas de (fin, seq, occurrence)
+    for seq, occurrence in enumerate(sorted(occurrences, key=lambda o: (o[0], o[1]))):
+        debut, fin, groupe, _ = occurrence
+        for autre_groupe, tas in en_cours.items():
+            while tas and tas[0][0] <= debut:
+                heapq.heappop(tas)
+            if croiser and autre_groupe == groupe:
+                continue
+            for _, _, autre in tas:
+                yield autre, occurrence
+        heapq.heappush(en_cours.setdefault(groupe, []), (fin, seq, occurrence))
+
+
+def _rapport(paires):
+    """Conflits au format API ; chaque occurrence n'est décrite qu'une fois, même si elle en a plusieurs."""
+    descriptions = {}
+
+    def decrire(occurrence):
+        cle = id(occurrence)
+        description = descriptions.get(cle)
+        if description is None:
+            debut, fin, _, evenement = occurrence
+            description = descriptions[cle] = {
+                'db_id': instance(evenement, debut, fin).get('db_id'), 'nom': evenement.get('nom'),
+                'date_debut': format_iso(debut), 'date_fin': format_iso(fin)}
+        return description
+
+    return [{'debut': format_iso(max(a[0], b[0])), 'fin': format_iso(min(a[1], b[1])),
+             'evenements': [decrire(a), decrire(b)]} for a, b in paires]
+
+
+def detecter_conflits(evenements, fenetre_debut, fenetre_fin):
+    """Tous les chevauchements de rendez-vous dans la fenêtre, triés par début."""
+    return _rapport(balayer(occurrences_rdv(evenements, fenetre_debut, fenetre_fin)))
+
+
+def fenetre_evenement(evenement, horizon=HORIZON_SERIE):
+    """Fenêtre couverte par un événement (l'horizon pour une série) ; None s'il n'est pas daté."""
+    intervalle = _intervalle(evenement)
+    if intervalle is None:
+        return None
+    debut, duree = intervalle
+    if evenement.get('recurrence') in RECURRENCES:
+        return debut, debut + max(horizon, duree)
+    return debut, debut + duree + timedelta(microseconds=1)
+
+
+def conflits_nouvel_evenement(nouvel, evenements, horizon=HORIZON_SERIE):
+    """
+    Conflits entre un rendez-vous pas encore enregistré et les événements existants
+    (dans chaque conflit, l'événement existant est le premier).
+    `evenements` peut se limiter aux candidats de la fenêtre (voir IndexCalendrier.evenements).
+    """
+    if not est_rdv(nouvel):
+        return []
+    fenetre = fenetre_evenement(nouvel, horizon)
+    if fenetre is None:
+        return []
+    occurrences = [*occurrences_rdv([nouvel], *fenetre, groupe=1),
+                   *occurrences_rdv((e for e in evenements if e is not nouvel), *fenetre)]
+    # L'occurrence existante en premier, le nouveau rendez-vous (groupe 1) en second
+    return _rapport((a, b) if b[2] else (b, a) for a, b in balayer(occurrences, croiser=True))
@@ -3,16 +3,16 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from marshmallow import Schema, fields, post_load
 
-# Générateur d'ID unique (solution simple pour le stateless)
-_max_id_counter = int(datetime.now().timestamp())
+from .identifiants import allouer_id
+
+# Cache global
+LISTE_EVENEMENTS_INVENTAIRE = []
 
 def generate_unique_id():
-    """Génère un ID unique simple basé sur le timestamp."""
-    global _max_id_counter
-    _max_id_counter += 1
-    return _max_id_counter
+    """Génère un ID unique (service commun, voir core/identifiants.py)."""
+    return allouer_id()
 
-@dataclass
+@dataclass(slots=True)
 class Evenement:
     """Représente une tâche ou un événement dans l'inventaire."""
     nom: str
@@ -22,6 +22,7 @@ class Evenement:
     duree_totale_minutes: int = field(default=60)
     projet: str = field(default='Divers')
     est_complete: bool = field(default=False)
+    progression_pourcentage: int = field(default=0)
     
     # --- MISE À JOUR DU CALENDRIER ---
     # La date de création est remplacée par une date de début
@@ -33,6 +34,10 @@ class Evenement:
 
     def marquer_terminee(self):
         self.est_complete = True
+
+    def get_duree_restante_minutes(self):
+        """Durée restante estimée d'après la progression."""
+        return round(self.duree_totale_minutes * (100 - self.progression_pourcentage) / 100)
         
     def calculer_score_priorite(self):
         """Calcul simple de priorité pour les Tâches."""
@@ -62,6 +67,7 @@ class EvenementSchema(Schema):
     duree_totale_minutes = fields.Int()
     projet = fields.Str()
     est_complete = fields.Bool()
+    progression_pourcentage = fields.Int()
     
     # --- MISE À JOUR DU CALENDRIER ---
     # On utilise le format ISO (YYYY-MM-DDTHH:MM:SS)
@@ -1,11 +1,12 @@
 # core/finance_agent.py
+from array import array
 from dataclasses import dataclass, field
 from datetime import datetime
 
 # Cache global
 LISTE_TRANSACTIONS = [] 
 
-@dataclass
+@dataclass(slots=True)
 class Transaction:
     """Représente une dépense ou un revenu dans un budget."""
     description: str
@@ -27,4 +28,136 @@ class Transaction:
             "categorie": self.categorie,
             "date_creation": self.date_creation,
             "db_id": self.db_id
-        }
\ No newline at end of file
+        }
+
+# --- GRAND LIVRE EN COLONNES ---
+# Une colonne (array) par champ numérique : montants, codes de type, codes de catégorie,
+# dates en secondes. Les totaux et les cumuls par catégorie et par mois sont tenus à jour à
+# chaque ajout : bilan et rapports ne dépendent pas de la longueur de l'historique.
+
+TYPES_TRANSACTION = ('Dépense', 'Revenu')
+_EPOCH = datetime(1970, 1, 1)
+
+
+class GrandLivre:
+    """Transactions en ajout seul, stockées en colonnes avec soldes et cumuls précalculés."""
+
+    # (nom, code array) des colonnes ; l'ordre est celui du fichier persisté
+    COLONNES = (('montants', 'd'), ('types', 'B'), ('categories', 'H'), ('dates', 'q'), ('ids', 'q'))
+
+    def __init__(self):
+        self.montants = array('d')
+        self.types = array('B')
+        self.categories = array('H')
+        self.dates = array('q')
+        self.ids = array('q')
+        self.noms_types = list(TYPES_TRANSACTION)
+        self.noms_categories = []
+        self._codes_types = {nom: code for code, nom in enumerate(self.noms_types)}
+        self._codes_categories = {}
+        # Cumuls : code -> montant (types), [par type] (catégories, mois 'AAAA-MM')
+        self.totaux = [0.0] * len(self.noms_types)
+        self.cumuls_categories = []
+        self.cumuls_mois = {}
+
+    def __len__(self):
+        return len(self.montants)
+
+    @staticmethod
+    def _code(nom, noms, codes):
+        code = codes.get(nom)
+        if code is None:
+            code = codes[nom] = len(noms)
+            noms.append(nom)
+        return code
+
+    def ajouter(self, transaction):
+        """Ajoute une transaction et met à jour les cumuls en O(1)."""
+        code_type = self._code(transaction.type_transaction, self.noms_types, self._codes_types)
+        code_categorie = self._code(transaction.categorie, self.noms_categories, self._codes_categories)
+        date = datetime.fromisoformat(transaction.date_creation)
+        self.montants.append(transaction.montant)
+        self.types.append(code_type)
+        self.categories.append(code_categorie)
+        self.dates.append(int((date - _EPOCH).total_seconds()))   # heure locale, sans fuseau
+        self.ids.append(transaction.db_id if transaction.db_id is not None else -1)
+        self._cumuler(transaction.montant, code_type, code_categorie, f"{date:%Y-%m}")
+
+    def _cumuler(self, montant, code_type, code_categorie, mois):
+        while len(self.totaux) <= code_type:
+            self.totaux.append(0.0)
+        self.totaux[code_type] += montant
+        while len(self.cumuls_categories) <= code_categorie:
+            self.cumuls_categories.append({})
+        par_type = self.cumuls_categories[code_categorie]
+        par_type[code_type] = par_type.get(code_type, 0.0) + montant
+        par_type = self.cumuls_mois.setdefault(mois, {})
+        par_type[code_type] = par_type.get(code_type, 0.0) + montant
+
+    # --- Requêtes en temps constant ---
+
+    def total(self, type_transaction):
+        code = self._codes_types.get(type_transaction)
+        return self.totaux[code] if code is not None else 0.0
+
+    @property
+    def total_revenu(self):
+        return self.total('Revenu')
+
+    @property
+    def total_depense(self):
+        return self.total('Dépense')
+
+    @property
+    def solde(self):
+        return self.total_revenu - self.total_depense
+
+    def _bilan(self, par_type):
+        return {self.noms_types[code]: montant for code, montant in par_type.items()}
+
+    def par_categorie(self):
+        """{catégorie: {type: montant}} (une entrée par catégorie, pas par transaction)."""
+        return {nom: self._bilan(par_type) for nom, par_type in zip(self.noms_categories, self.cumuls_categories)}
+
+    def mois(self, mois):
+        """{type: montant} du mois 'AAAA-MM'."""
+        return self._bilan(self.cumuls_mois.get(mois, {}))
+
+    def par_mois(self):
+        return {mois: self._bilan(par_type) for mois, par_type in sorted(self.cumuls_mois.items())}
+
+    # --- Persistance (utils/persistence.py) ---
+
+    def entete(self):
+        """Métadonnées JSON : dictionnaires de codes et cumuls (les colonnes sont à part)."""
+        return {
+            'nombre': len(self),
+            'dernier_id': self.ids[-1] if self.ids else None,
+            'types': self.noms_types,
+            'categories': self.noms_categories,
+            'totaux': self.totaux,
+            'cumuls_categories': [sorted(par_type.items()) for par_type in self.cumuls_categories],
+            'cumuls_mois': {mois: sorted(par_type.items()) for mois, par_type in self.cumuls_mois.items()},
+        }
+
+    @classmethod
+    def depuis_colonnes(cls, entete, colonnes):
+        """Reconstruit un grand livre à partir d'une entête et de ses colonnes (arrays)."""
+        livre = cls()
+        for nom, _ in cls.COLONNES:
+            setattr(livre, nom, colonnes[nom])
+        livre.noms_types = list(entete['types'])
+        livre.noms_categories = list(entete['categories'])
+        livre._codes_types = {nom: code for code, nom in enumerate(livre.noms_types)}
+        livre._codes_categories = {nom: code for code, nom in enumerate(livre.noms_categories)}
+        livre.totaux = list(entete['totaux'])
+        livre.cumuls_categories = [dict(map(tuple, paires)) for paires in entete['cumuls_categories']]
+        livre.cumuls_mois = {mois: dict(map(tuple, paires)) for mois, paires in entete['cumuls_mois'].items()}
+        return livre
+
+
+def construire_grand_livre(transactions):
+    livre = GrandLivre()
+    for transaction in transactions:
+        livre.ajouter(transaction)
+    return livre
@@ -0,0 +1,107 @@
+# core/flux_json.py
+# Lecture incrémentale d'un tableau JSON (ex. export assistant_inventaire_*.json) et écriture
+# NDJSON : la mémoire utilisée dépend de la taille d'un élément, pas de celle du fichier.
+import codecs
+import json
+
+TAILLE_LECTURE = 64 * 1024
+TAILLE_ELEMENT_MAX = 1024 * 1024    # au-delà, l'élément est refusé (fichier corrompu ou hostile)
+ESPACES = ' \t\r\n'
+DELIMITEURS = ESPACES + ',]'
+
+_decodeur = json.JSONDecoder()
+
+
+class _Tampon:
+    """Texte lu depuis un flux binaire (UTF-8), consommé par le début."""
+
+    def __init__(self, flux, taille_lecture):
+        self.flux = flux
+        self.taille_lecture = taille_lecture
+        self.decodeur = codecs.getincrementaldecoder('utf-8-sig')()
+        self.texte = ''
+        self.position = 0
+        self.fin_flux = False
+
+    def lire(self, minimum=0):
+        """Ajoute au moins un bloc (ou `minimum` octets) ; renvoie False à la fin du flux."""
+        if self.fin_flux:
+            return False
+        if self.position:
+            self.texte, self.position = self.texte[self.position:], 0
+        bloc = self.flux.read(max(self.taille_lecture, minimum))
+        if not bloc:
+            self.texte += self.decodeur.decode(b'', final=True)
+            self.fin_flux = True
+            return False
+        self.texte += self.decodeur.decode(bloc) if isinstance(bloc, bytes) else bloc
+        return True
+
+    def caractere(self):
+        """Prochain caractère non blanc (sans le consommer), '' en fin de flux."""
+        while True:
+            while self.position < len(self.texte) and self.texte[self.position] in ESPACES:
+                self.position += 1
+            if self.position < len(self.texte):
+                return self.texte[self.position]
+            if not self.lire():
+                return ''
+
+
+def iterer_tableau(flux, taille_lecture=TAILLE_LECTURE, taille_element_max=TAILLE_ELEMENT_MAX):
+    """
+    Générateur des éléments d'un tableau JSON lu depuis un flux (fichier, request.stream).
+    Lève ValueError si le contenu n'est pas un tableau JSON valide.
+    """
+    tampon = _Tampon(flux, taille_lecture)
+    if tampon.caractere() != '[':
+        raise ValueError("Le contenu doit être un tableau JSON")
+    tampon.position += 1
+    if tampon.caractere() == ']':
+        tampon.position += 1
+    else:
+        while True:
+            tampon.caractere()
+            while True:
+                try:
+                    element, fin = _decodeur.raw_decode(tampon.texte, tampon.position)
+                    # Un nombre coupé en fin de tampon ("12" de "123", "1" de "1.5") se décode :
+                    # on ne l'accepte que suivi d'un délimiteur
+                    if tampon.fin_flux or fin < len(tampon.texte) and (
+                            type(element) not in (int, float) or tampon.texte[fin] in DELIMITEURS):
+                        break
+                except json.JSONDecodeError as erreur:
+                    if tampon.fin_flux:
+                        raise ValueError(f"JSON invalide : {erreur}") from None
+                if len(tampon.texte) - tampon.position > taille_element_max:
+                    raise ValueError(f"Élément JSON de plus de {taille_element_max} octets")
+                # Lecture doublée à chaque échec : un élément long reste décodé en temps linéaire
+                tampon.lire(minimum=len(tampon.texte) - tampon.position)
+            tampon.position = fin
+            yield element
+            separateur = tampon.caractere()
+            tampon.position += 1
+            if separateur == ']':
+                break
+            if separateur != ',':
+                raise ValueError("JSON invalide : ',' ou ']' attendu entre les éléments")
+    if tampon.caractere() != '':
+        raise ValueError("JSON invalide : contenu après la fin du tableau")
+
+
+def par_blocs(elements, taille):
+    """Regroupe un itérable en listes d'au plus `taille` éléments."""
+    bloc = []
+    for element in elements:
+        bloc.append(element)
+        if len(bloc) >= taille:
+            yield bloc
+            bloc = []
+    if bloc:
+        yield bloc
+
+
+def lignes_ndjson(elements):
+    """Une ligne JSON par élément, produite au fil de l'itération (réponse en flux)."""
+    for element in elements:
+        yield json.dumps(element, ensure_ascii=False, separators=(',', ':')) + '\n'
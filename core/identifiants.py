@@ -0,0 +1,142 @@
+# core/identifiants.py
+# Service d'identifiants unique pour Evenement, les transactions et les routes Flask.
+#
+# Un identifiant tient sur 53 bits (entier exact en JavaScript) :
+#   31 bits de secondes depuis EPOQUE | 10 bits de worker | 12 bits de séquence
+# soit 4096 identifiants par seconde et par worker, sans accès disque ni verrou global.
+# Le numéro de worker est obtenu en verrouillant (flock) un fichier "slot" dans un
+# dossier partagé : deux processus vivants (ex. workers gunicorn) n'ont jamais le même.
+# Le fichier slot garde aussi la dernière seconde utilisée, pour qu'un redémarrage
+# rapide ne réutilise pas une seconde déjà consommée par le processus précédent.
+import atexit
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de flock, le worker vient de ASSISTANT_WORKER_ID ou du pid
+    fcntl = None
+
+EPOQUE = int(datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp())
+BITS_WORKER = 10
+BITS_SEQUENCE = 12
+MAX_WORKER = (1 << BITS_WORKER) - 1
+MAX_SEQUENCE = (1 << BITS_SEQUENCE) - 1
+
+DOSSIER_PAR_DEFAUT = os.environ.get(
+    'ASSISTANT_IDS_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "storage", "ids"))
+
+
+class AllocateurIds:
+    """Allocation O(1) d'identifiants uniques entre threads, processus et redémarrages."""
+
+    def __init__(self, dossier=DOSSIER_PAR_DEFAUT):
+        self.dossier = dossier
+        self._verrou = threading.Lock()
+        self._pid = None
+        self._fichier_slot = None
+        self._worker = None
+        self._seconde = 0
+        self._sequence = 0
+
+    # --- Attribution du numéro de worker ---
+
+    def _reserver_slot(self):
+        """Verrouille le premier fichier slot libre ; renvoie (worker, dernière seconde notée)."""
+        force = os.environ.get('ASSISTANT_WORKER_ID')
+        if force is not None or fcntl is None:
+            return int(force) if force is not None else os.getpid() & MAX_WORKER, 0
+        os.makedirs(self.dossier, exist_ok=True)
+        for worker in range(MAX_WORKER + 1):
+            fichier = open(os.path.join(self.dossier, f"slot-{worker}.lock"), 'a+')
+            try:
+                fcntl.flock(fichier, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                fichier.close()
+                continue
+            fichier.seek(0)
+            contenu = fichier.read().strip()
+            self._fichier_slot = fichier
+            return worker, int(contenu) if contenu else 0
+        raise RuntimeError(f"Plus de slot de worker libre dans {self.dossier}")
+
+    def _noter_seconde(self):
+        if self._fichier_slot is not None:
+            self._fichier_slot.seek(0)
+            self._fichier_slot.truncate()
+            self._fichier_slot.write(str(self._seconde))
+            self._fichier_slot.flush()
+
+    def _verifier_processus(self):
+        """Réserve un slot au premier appel, et de nouveau après un fork."""
+        if self._pid == os.getpid():
+            return
+        if self._fichier_slot is not None:
+            # Descripteur hérité du processus parent : le verrou reste au parent
+            self._fichier_slot.close()
+            self._fichier_slot = None
+        self._pid = os.getpid()
+        self._worker, derniere = self._reserver_slot()
+        self._seconde = max(self._maintenant(), derniere) + 1
+        self._sequence = 0
+        self._noter_seconde()
+
+    @staticmethod
+    def _maintenant():
+        return int(time.time()) - EPOQUE
+
+    # --- Allocation ---
+
+    def allouer(self, n=1):
+        """Renvoie n identifiants consécutifs par blocs (utile pour les insertions par lot)."""
+        identifiants = []
+        with self._verrou:
+            self._verifier_processus()
+            while n > 0:
+                maintenant = self._maintenant()
+                if maintenant > self._seconde:
+                    self._seconde, self._sequence = maintenant, 0
+                elif self._sequence > MAX_SEQUENCE:
+                    # Séquence épuisée : on emprunte la seconde suivante (notée sur disque)
+                    self._seconde, self._sequence = self._seconde + 1, 0
+                    self._noter_seconde()
+                pris = min(n, MAX_SEQUENCE + 1 - self._sequence)
+                base = (self._seconde << (BITS_WORKER + BITS_SEQUENCE)) | (self._worker << BITS_SEQUENCE)
+                identifiants.extend(range(base + self._sequence, base + self._sequence + pris))
+                self._sequence += pris
+                n -= pris
+        return identifiants
+
+    def allouer_un(self):
+        return self.allouer(1)[0]
+
+    def fermer(self):
+        """Note la dernière seconde utilisée et libère le slot."""
+        with self._verrou:
+            if self._fichier_slot is not None and self._pid == os.getpid():
+                self._noter_seconde()
+                self._fichier_slot.close()
+            self._fichier_slot = None
+            self._pid = None
+
+
+_allocateur = AllocateurIds()
+atexit.register(lambda: _allocateur.fermer())
+
+
+def configurer(dossier):
+    """Change le dossier des slots (ex. DATA_PATH de l'API) ; à appeler avant la première allocation."""
+    global _allocateur
+    _allocateur.fermer()
+    _allocateur = AllocateurIds(dossier)
+
+
+def allouer_id():
+    return _allocateur.allouer_un()
+
+
+def allouer_ids(n):
+    return _allocateur.allouer(n)
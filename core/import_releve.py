@@ -0,0 +1,169 @@
+# core/import_releve.py
+# Import de relevés bancaires (CSV, sous-ensemble d'OFX) en Transaction, ligne à ligne.
+# Chaque ligne reçoit une empreinte (date, montant, description, rang d'apparition) : deux
+# exports qui se recouvrent produisent les mêmes empreintes, et l'index persistant des
+# empreintes déjà importées (utils/persistence.py) élimine les doublons.
+import csv
+import hashlib
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from core.finance_agent import Transaction
+
+# Correspondance des colonnes du CSV ; ajustable par banque (clé absente = colonne ignorée)
+CONFIG_CSV_DEFAUT = {
+    'date': 'Date',
+    'montant': 'Montant',
+    'description': 'Libellé',
+    'categorie': 'Catégorie',
+    'type': None,               # sans colonne de type, le signe du montant décide
+    'debit': None,              # relevés avec deux colonnes Débit / Crédit
+    'credit': None,
+    'separateur': ';',
+    'format_date': '%d/%m/%Y',
+    'virgule_decimale': True,
+    'encodage': 'utf-8-sig',
+}
+
+# Libellés de type rencontrés dans les relevés -> type_transaction
+ALIAS_TYPES = {
+    'Debit': 'Dépense', 'Débit': 'Dépense', 'Depense': 'Dépense', 'Dépense': 'Dépense',
+    'Credit': 'Revenu', 'Crédit': 'Revenu', 'Revenu': 'Revenu',
+}
+
+_BLANCS = re.compile(r'\s+')
+# Partie entière avec séparateur de milliers (ramené à '.') : 1.234 ou -12.345.678
+_MILLIERS = re.compile(r'[+-]?\d{1,3}(\.\d{3})+$')
+_BALISE_OFX = re.compile(r'<(/?)([A-Z0-9.]+)>([^<\r\n]*)')
+
+
+class LigneInvalide(ValueError):
+    pass
+
+
+def normaliser_type(valeur, montant):
+    """Même normalisation que Transaction.__post_init__ (capitalize), plus les alias bancaires."""
+    if valeur:
+        nom = valeur.strip().capitalize()
+        return ALIAS_TYPES.get(nom, nom)
+    return 'Dépense' if montant < 0 else 'Revenu'
+
+
+def lire_montant(texte, virgule_decimale=True):
+    """
+    Montant d'une cellule. Le séparateur de milliers ('.' si la virgule est décimale, ',' sinon)
+    n'est accepté qu'entre des groupes de 3 chiffres : '12.50' lu avec la virgule décimale est
+    refusé plutôt que lu 1250.
+    """
+    texte = texte.strip().replace('\xa0', '').replace(' ', '')
+    decimale, milliers = (',', '.') if virgule_decimale else ('.', ',')
+    if milliers in texte:
+        if not _MILLIERS.match(texte.split(decimale, 1)[0].replace(milliers, '.')):
+            raise LigneInvalide(f"Montant ambigu : {texte!r} (séparateur décimal attendu : {decimale!r})")
+        texte = texte.replace(milliers, '')
+    try:
+        return Decimal(texte.replace(decimale, '.'))
+    except InvalidOperation:
+        raise LigneInvalide(f"Montant illisible : {texte!r}") from None
+
+
+def empreinte_transaction(date_creation, montant, description, rang=0):
+    """Empreinte 64 bits (entier) d'une ligne de relevé ; `montant` est signé (dépense < 0)."""
+    description = _BLANCS.sub(' ', description).strip().casefold()
+    cle = f"{date_creation[:10]}|{Decimal(montant).quantize(Decimal('0.01'))}|{description}|{rang}"
+    return int.from_bytes(hashlib.blake2b(cle.encode(), digest_size=8).digest(), 'little')
+
+
+def empreinte_de(transaction, rang=0):
+    signe = -1 if transaction.type_transaction == 'Dépense' else 1
+    return empreinte_transaction(transaction.date_creation, signe * Decimal(str(transaction.montant)),
+                                 transaction.description, rang)
+
+
+# --- 1. LECTURE DES FORMATS ---
+
+def lignes_csv(flux, config=CONFIG_CSV_DEFAUT):
+    """Générateur de (date, montant signé, description, catégorie, type brut) depuis un CSV."""
+    config = {**CONFIG_CSV_DEFAUT, **config}
+    lecteur = csv.DictReader(flux, delimiter=config['separateur'])
+    dates = {}   # les relevés répètent les mêmes dates : strptime une fois par date
+    for ligne in lecteur:
+        try:
+            texte_date = ligne[config['date']].strip()
+            date = dates.get(texte_date)
+            if date is None:
+                date = dates[texte_date] = datetime.strptime(texte_date, config['format_date']).strftime(
+                    "%Y-%m-%d %H:%M:%S")
+            if config['debit'] or config['credit']:
+                debit = (ligne.get(config['debit']) or '').strip()
+                credit = (ligne.get(config['credit']) or '').strip()
+                montant = (-abs(lire_montant(debit, config['virgule_decimale'])) if debit
+                           else abs(lire_montant(credit, config['virgule_decimale'])))
+            else:
+                montant = lire_montant(ligne[config['montant']], config['virgule_decimale'])
+            yield (date, montant, (ligne.get(config['description']) or '').strip(),
+                   (ligne.get(config['categorie']) or '').strip() if config['categorie'] else '',
+                   (ligne.get(config['type']) or '') if config['type'] else '')
+        except (KeyError, ValueError, AttributeError) as erreur:
+            raise LigneInvalide(f"Ligne {lecteur.line_num} : {erreur}") from None
+
+
+def lignes_ofx(flux):
+    """
+    Sous-ensemble d'OFX (SGML 1.x ou XML 2.x) : blocs <STMTTRN> avec DTPOSTED, TRNAMT,
+    NAME / MEMO et TRNTYPE. Les balises fermantes sont facultatives.
+    """
+    courante = None
+    for ligne in flux:
+        for fermante, balise, valeur in _BALISE_OFX.findall(ligne):
+            if balise == 'STMTTRN':
+                if fermante and courante is not None:
+                    yield _transaction_ofx(courante)
+                    courante = None
+                elif not fermante:
+                    courante = {}
+            elif courante is not None and not fermante and valeur.strip():
+                courante[balise] = valeur.strip()
+    if courante is not None:
+        yield _transaction_ofx(courante)
+
+
+def _transaction_ofx(champs):
+    try:
+        date = datetime.strptime(champs['DTPOSTED'][:8], "%Y%m%d").strftime("%Y-%m-%d %H:%M:%S")
+        montant = lire_montant(champs['TRNAMT'], virgule_decimale=',' in champs['TRNAMT'])
+    except (KeyError, ValueError) as erreur:
+        raise LigneInvalide(f"Transaction OFX incomplète : {erreur}") from None
+    description = champs.get('NAME') or champs.get('MEMO', '')
+    # TRNTYPE vaut DEBIT / CREDIT, mais aussi POS, ATM, CHECK... : seul le signe est fiable
+    return date, montant, description, '', ''
+
+
+# --- 2. PIPELINE ---
+
+def lire_releve(chemin, config=None):
+    """Générateur des lignes d'un relevé ; le format est déduit de l'extension."""
+    config = {**CONFIG_CSV_DEFAUT, **(config or {})}
+    with open(chemin, encoding=config['encodage'], errors='replace', newline='') as flux:
+        if chemin.lower().endswith(('.ofx', '.qfx')):
+            yield from lignes_ofx(flux)
+        else:
+            yield from lignes_csv(flux, config)
+
+
+def transactions_nouvelles(lignes, deja_importees, categorie_defaut='Autre'):
+    """
+    Transforme les lignes en Transaction en ignorant celles dont l'empreinte est connue.
+    Renvoie un générateur de (empreinte, transaction) ; `deja_importees` ne doit offrir que `in`.
+    """
+    rangs = {}   # lignes identiques d'un même relevé (deux cafés le même jour) : rang 0, 1, ...
+    for date, montant, description, categorie, type_brut in lignes:
+        base = (date[:10], montant, description)
+        rang = rangs.get(base, 0)
+        rangs[base] = rang + 1
+        empreinte = empreinte_transaction(date, montant, description, rang)
+        if empreinte in deja_importees:
+            continue
+        yield empreinte, Transaction(description, float(abs(montant)), normaliser_type(type_brut, montant),
+                                     categorie or categorie_defaut, date)
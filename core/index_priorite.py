@@ -0,0 +1,203 @@
+# core/index_priorite.py
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+import heapq
+
+from .score_lot import scores_evenements
+
+
+def _inverser(priorite):
+    """Transforme une priorité (plus grand = meilleur) en clé de tri croissante."""
+    if isinstance(priorite, tuple):
+        return tuple(-p for p in priorite)
+    return (-priorite,)
+
+
+def _retablir(cle):
+    return -cle[0] if len(cle) == 1 else tuple(-c for c in cle)
+
+
+class IndexPriorite:
+    """
+    Index trié des tâches candidates, maintenu à jour à chaque ajout / modification.
+
+    Deux listes triées sont tenues en parallèle : par priorité décroissante et par
+    durée restante. À priorité égale, l'ordre d'insertion est conservé (comme un tri
+    stable sur la liste d'origine).
+    """
+
+    def __init__(self, priorite, duree_restante, identifiant, est_candidate, elements=()):
+        self._priorite = priorite
+        self._duree_restante = duree_restante
+        self._identifiant = identifiant
+        self._est_candidate = est_candidate
+        self._ordre = []        # (cle, seq, ident) triés : le meilleur en premier
+        self._par_duree = []    # (duree_restante, cle, seq, ident) triés par durée
+        self._entrees = {}      # ident -> (element, cle, seq, duree)
+        self._seqs = {}         # ident -> rang d'insertion (conservé même hors index)
+        self._seq = 0
+        self._jour = date.today()
+        for element in elements:
+            self.ajouter(element)
+
+    def __len__(self):
+        return len(self._entrees)
+
+    # --- Mises à jour ---
+
+    def ajouter(self, element, priorite=None):
+        """
+        Ajoute ou met à jour un élément (retiré de l'index s'il n'est plus candidat).
+        La priorité peut être fournie si elle a déjà été calculée (ex. par lot).
+        """
+        ident = self._identifiant(element)
+        ancienne = self._entrees.get(ident)
+        if ancienne is not None:
+            self._retirer_entree(ident, ancienne)
+        seq = self._seqs.get(ident)
+        if seq is None:
+            seq = self._seqs[ident] = self._seq
+            self._seq += 1
+        if not self._est_candidate(element):
+            return
+        cle = _inverser(self._priorite(element) if priorite is None else priorite)
+        duree = self._duree_restante(element)
+        self._entrees[ident] = (element, cle, seq, duree)
+        insort(self._ordre, (cle, seq, ident))
+        insort(self._par_duree, (duree, cle, seq, ident))
+
+    mettre_a_jour = ajouter
+
+    def retirer(self, ident):
+        self._seqs.pop(ident, None)
+        entree = self._entrees.get(ident)
+        if entree is not None:
+            self._retirer_entree(ident, entree)
+
+    def _retirer_entree(self, ident, entree):
+        _, cle, seq, duree = entree
+        del self._ordre[bisect_left(self._ordre, (cle, seq, ident))]
+        del self._par_duree[bisect_left(self._par_duree, (duree, cle, seq, ident))]
+        del self._entrees[ident]
+
+    def _verifier_jour(self):
+        """Les priorités peuvent dépendre de la date du jour : on recalcule au changement de jour."""
+        if self._jour == date.today():
+            return
+        elements = [self._entrees[ident][0] for _, _, ident in self._ordre]
+        self._ordre, self._par_duree, self._entrees = [], [], {}
+        self._jour = date.today()
+        # Les rangs d'insertion (self._seqs) sont conservés
+        for element in elements:
+            self.ajouter(element)
+
+    # --- Requêtes ---
+
+    def meilleures(self, k=None):
+        """Les k meilleures entrées [(element, priorite)] en O(k)."""
+        self._verifier_jour()
+        entrees = self._ordre if k is None else self._ordre[:k]
+        return [(self._entrees[ident][0], _retablir(cle)) for cle, _, ident in entrees]
+
+    def meilleures_pour_creneau(self, duree_max, k=3):
+        """Les k meilleures entrées dont la durée restante est dans ]0, duree_max]."""
+        self._verifier_jour()
+        debut = bisect_right(self._par_duree, 0, key=lambda e: e[0])
+        fin = bisect_right(self._par_duree, duree_max, key=lambda e: e[0])
+        nb_compatibles = fin - debut
+        if nb_compatibles <= 0:
+            return []
+
+        if nb_compatibles * nb_compatibles <= k * len(self._ordre):
+            # Peu de tâches tiennent dans le créneau : sélection sur la tranche par durée
+            tranche = heapq.nsmallest(k, (e[1:] for e in self._par_duree[debut:fin]))
+        else:
+            # La plupart tiennent : on parcourt l'ordre de priorité jusqu'à en avoir k
+            tranche = []
+            for cle, seq, ident in self._ordre:
+                if 0 < self._entrees[ident][3] <= duree_max:
+                    tranche.append((cle, seq, ident))
+                    if len(tranche) == k:
+                        break
+        return [(self._entrees[ident][0], _retablir(cle)) for cle, _, ident in tranche]
+
+
+# --- Index prêts à l'emploi ---
+
+def index_evenements(evenements=()):
+    """
+    Index des objets Evenement : tâches actives triées par calculer_score_priorite.
+    Les scores initiaux sont calculés en un seul lot (voir core.score_lot).
+    """
+    index = IndexPriorite(
+        priorite=lambda e: e.calculer_score_priorite(),
+        duree_restante=lambda e: e.get_duree_restante_minutes(),
+        identifiant=id,
+        est_candidate=lambda e: e.type_event == 'Tache' and not e.est_complete,
+    )
+    evenements = list(evenements)
+    for evenement, score in zip(evenements, scores_evenements(evenements)):
+        index.ajouter(evenement, score)
+    return index
+
+
+def duree_restante_dict(tache):
+    """Durée restante (minutes) d'une tâche au format API, d'après sa progression."""
+    duree = tache.get('duree_totale_minutes') or 0
+    return round(duree * (100 - (tache.get('progression_pourcentage') or 0)) / 100)
+
+
+def index_taches_api(taches=()):
+    """Index des tâches au format API : (importance + urgence) puis db_id, décroissants."""
+    return IndexPriorite(
+        priorite=lambda t: (t.get('importance', 0) + t.get('urgence', 0), t.get('db_id')),
+        duree_restante=duree_restante_dict,
+        identifiant=lambda t: t.get('db_id'),
+        est_candidate=lambda t: t.get('est_complete') is not True and t.get('type_event') == 'Tache',
+        elements=taches,
+    )
+
+
+class IndexSynchronise:
+    """
+    Garde un index aligné sur un stockage partagé entre processus.
+
+    Seuls les db_id listés dans le journal de modifications du stockage sont relus ;
+    l'index est reconstruit entièrement si ce journal a été purgé entre-temps. Par
+    défaut : index_taches_api sur les tâches actives.
+    """
+
+    def __init__(self, stockage, fabrique=None, charger=None):
+        self.stockage = stockage
+        self._fabrique = fabrique or index_taches_api
+        self._charger = charger or (lambda s: s.taches_actives())
+        self._verrou = threading.Lock()
+        self._index = None
+        self._seq = 0
+
+    def lire(self, fonction):
+        """
+        Résultat de fonction(index), calculé sous le verrou après resynchronisation. L'index est
+        modifié en place par les requêtes concurrentes : il ne doit être lu que par ce biais,
+        et `fonction` doit renvoyer un résultat déjà matérialisé (liste, pas générateur).
+        """
+        with self._verrou:
+            return fonction(self._synchroniser())
+
+    def _synchroniser(self):
+        modifications = None
+        if self._index is not None:
+            modifications = self.stockage.modifications_depuis(self._seq)
+        if modifications is None:
+            self._seq = self.stockage.dernier_seq()
+            self._index = self._fabrique(self._charger(self.stockage))
+            return self._index
+        self._seq, db_ids = modifications
+        for db_id in db_ids:
+            evenement = self.stockage.obtenir(db_id)
+            if evenement is None:
+                self._index.retirer(db_id)
+            else:
+                self._index.mettre_a_jour(evenement)
+        return self._index
@@ -1,22 +1,24 @@
 # core/logique.py
+import heapq
+
 from .evenement import Evenement, LISTE_EVENEMENTS_INVENTAIRE
+from .index_priorite import index_evenements
+from .score_lot import scores_evenements
 
-def suggerer_tache(liste_evenements, duree_creneau_minutes):
+def suggerer_tache(liste_evenements, duree_creneau_minutes, index=None):
     """
     Identifie la tâche la plus prioritaire, non terminée, dont le temps restant 
     peut être complété dans la durée du créneau spécifié. Retourne le top 3.
+
+    Si un IndexPriorite tenu à jour est fourni (voir index_evenements), la requête
+    ne parcourt plus la liste : O(k log n). Sinon, un seul parcours en O(n).
     """
-    taches_candidates = [e for e in liste_evenements if e.type_event == "Tache" and not e.est_complete]
-    
-    # Filtre
-    taches_filtrees = [
-        t for t in taches_candidates
-        if 0 < t.get_duree_restante_minutes() <= duree_creneau_minutes
-    ]
-    
-    # Calcul des scores
-    taches_avec_score = [{"tache": t, "score": t.calculer_score_priorite()} for t in taches_filtrees]
+    if index is None:
+        # Requête ponctuelle : une sélection en un passage (scores en lot) suffit, sans
+        # construire l'index trié. Même ordre : score décroissant puis ordre de la liste.
+        candidates = ((score, -rang, e) for rang, (e, score) in enumerate(zip(liste_evenements, scores_evenements(liste_evenements)))
+                      if e.type_event == 'Tache' and not e.est_complete and 0 < e.get_duree_restante_minutes() <= duree_creneau_minutes)
+        return [{"tache": e, "score": score} for score, _, e in heapq.nlargest(3, candidates, key=lambda c: c[:2])]
     
-    # Tri et retour du Top 3
-    suggestions = sorted(taches_avec_score, key=lambda x: x["score"], reverse=True)
-    return suggestions[:3]
\ No newline at end of file
+    suggestions = index.meilleures_pour_creneau(duree_creneau_minutes, k=3)
+    return [{"tache": t, "score": score} for t, score in suggestions]
@@ -0,0 +1,199 @@
+# core/partitions.py
+# Stockage serveur par utilisateur, réparti sur N fichiers SQLite (partitions) sous un même
+# dossier. La partition d'un utilisateur est donnée par un hachage cohérent (jump consistent
+# hash) de sa clé : passer de N à M partitions ne déplace que les utilisateurs qui doivent
+# changer de fichier (environ 1 - N/M d'entre eux en ajoutant des partitions, et toujours
+# vers les nouvelles). Les écritures de partitions différentes ne se bloquent pas entre
+# elles : le débit d'écriture croît avec le nombre de fichiers au lieu d'attendre le verrou
+# d'une base unique. Le nombre de partitions est gardé dans partitions.json.
+#   python -m core.partitions DOSSIER                  # répartition actuelle
+#   python -m core.partitions DOSSIER --partitions 16  # rééquilibrage (serveurs arrêtés)
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+
+from .identifiants import allouer_ids, configurer as configurer_identifiants
+from .stockage import StockageSQLite, PoolConnexions, CHAMPS_EVENEMENT, CONNEXIONS_MAX, initialiser_schema
+
+PARTITIONS_DEFAUT = 8
+# Clé d'utilisateur acceptée (en-tête X-Utilisateur de l'API)
+UTILISATEUR_VALIDE = re.compile(r'^[A-Za-z0-9._@+-]{1,128}$')
+
+
+def _jump(cle, nombre):
+    """Jump consistent hash (Lamping & Veach) : seau de `cle` (entier 64 bits) parmi `nombre`."""
+    seau, suivant = -1, 0
+    while suivant < nombre:
+        seau = suivant
+        cle = (cle * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        suivant = int((seau + 1) * ((1 << 31) / ((cle >> 33) + 1)))
+    return seau
+
+
+def partition(utilisateur, nombre):
+    cle = int.from_bytes(hashlib.blake2b(utilisateur.encode(), digest_size=8).digest(), 'little')
+    return _jump(cle, nombre)
+
+
+class StockagePartitionne:
+    """
+    Fabrique des stockages par utilisateur (StockageSQLite limité à ses lignes) sur les
+    fichiers partition-XXXX.sqlite3. Les connexions sont partagées entre utilisateurs
+    d'une même partition et bornées par thread (PoolConnexions).
+    """
+
+    def __init__(self, dossier, nombre=None, connexions_max=CONNEXIONS_MAX):
+        self.dossier = dossier
+        self.chemin_config = os.path.join(dossier, "partitions.json")
+        os.makedirs(dossier, exist_ok=True)
+        config = self._lire_config()
+        if config is None:
+            self.nombre = nombre or PARTITIONS_DEFAUT
+            self._ecrire_config({'nombre': self.nombre})
+        elif 'reequilibrage' in config:
+            raise RuntimeError(f"Rééquilibrage vers {config['reequilibrage']} partitions inachevé : "
+                               f"relancer python -m core.partitions {dossier} --partitions {config['reequilibrage']}")
+        elif nombre is not None and nombre != config['nombre']:
+            raise ValueError(f"{dossier} compte {config['nombre']} partitions (demandé : {nombre}) : "
+                             f"utiliser python -m core.partitions {dossier} --partitions {nombre}")
+        else:
+            self.nombre = config['nombre']
+        self.connexions = PoolConnexions(connexions_max)
+
+    def _lire_config(self):
+        if not os.path.exists(self.chemin_config):
+            return None
+        with open(self.chemin_config, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _ecrire_config(self, config):
+        temporaire = f"{self.chemin_config}.tmp"
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+        os.replace(temporaire, self.chemin_config)
+
+    def chemin(self, numero):
+        return os.path.join(self.dossier, f"partition-{numero:04d}.sqlite3")
+
+    def stockage(self, utilisateur):
+        if not UTILISATEUR_VALIDE.match(utilisateur or ''):
+            raise ValueError(f"Utilisateur invalide : {utilisateur!r}")
+        return StockageSQLite(self.chemin(partition(utilisateur, self.nombre)), utilisateur=utilisateur,
+                              connexions=self.connexions, ids_globaux=True)
+
+    def compter(self):
+        """Nombre total d'événements, toutes partitions et tous utilisateurs confondus."""
+        return sum(self.connexions.connexion(self.chemin(numero)).execute(
+            "SELECT COUNT(*) FROM evenements").fetchone()[0] for numero in range(self.nombre))
+
+    def repartition(self):
+        """{numéro de partition: {utilisateur: nombre d'événements}}."""
+        return {numero: dict(self.connexions.connexion(self.chemin(numero)).execute(
+                    "SELECT utilisateur, COUNT(*) FROM evenements GROUP BY utilisateur"))
+                for numero in range(self.nombre)}
+
+    # --- Rééquilibrage ---
+
+    def _deplacer(self, utilisateur, source, cible):
+        """
+        Copie les lignes d'un utilisateur dans la partition cible puis les efface de la
+        source. En WAL, une transaction sur deux fichiers n'est pas atomique entre eux :
+        une copie partielle est d'abord effacée de la cible, un rééquilibrage interrompu se
+        relance. Un db_id déjà pris par un autre utilisateur de la cible (lignes importées
+        avec l'identifiant du fichier, avant que l'import ne les réattribue) reçoit un
+        nouvel identifiant global.
+        """
+        colonnes = ', '.join((*CHAMPS_EVENEMENT, 'extra', 'utilisateur'))
+        conn = sqlite3.connect(self.chemin(source), timeout=30.0)
+        try:
+            conn.execute("ATTACH DATABASE ? AS cible", (self.chemin(cible),))
+            with conn:
+                conn.execute("DELETE FROM cible.evenements WHERE utilisateur = ?", (utilisateur,))
+                collisions = [db_id for (db_id,) in conn.execute(
+                    "SELECT db_id FROM main.evenements WHERE utilisateur = ? "
+                    "AND db_id IN (SELECT db_id FROM cible.evenements)", (utilisateur,))]
+                for ancien, nouveau in zip(collisions, allouer_ids(len(collisions))):
+                    conn.execute("UPDATE main.evenements SET db_id = ? WHERE db_id = ?", (nouveau, ancien))
+                nombre = conn.execute(f"INSERT INTO cible.evenements ({colonnes}) "
+                                      f"SELECT {colonnes} FROM main.evenements WHERE utilisateur = ?",
+                                      (utilisateur,)).rowcount
+                # Les index des serveurs se resynchronisent sur le journal de la cible
+                conn.execute("INSERT INTO cible.modifications (db_id, utilisateur) "
+                             "SELECT db_id, utilisateur FROM main.evenements WHERE utilisateur = ?", (utilisateur,))
+                conn.execute("DELETE FROM main.evenements WHERE utilisateur = ?", (utilisateur,))
+                conn.execute("DELETE FROM main.modifications WHERE utilisateur = ?", (utilisateur,))
+            conn.execute("DETACH DATABASE cible")
+        finally:
+            conn.close()
+        return nombre
+
+    def reequilibrer(self, nouveau):
+        """
+        Passe à `nouveau` partitions en déplaçant les utilisateurs dont la partition change.
+        À lancer serveurs arrêtés ; renvoie {utilisateurs, evenements} déplacés.
+        """
+        if nouveau < 1:
+            raise ValueError("Au moins une partition")
+        ancien = self.nombre
+        self._ecrire_config({'nombre': ancien, 'reequilibrage': nouveau})
+        for numero in range(nouveau):
+            conn = sqlite3.connect(self.chemin(numero))
+            with conn:
+                initialiser_schema(conn)
+            conn.close()
+        deplaces = {'utilisateurs': 0, 'evenements': 0}
+        # Un rééquilibrage interrompu a pu laisser des partitions au-delà des deux tailles
+        numero = 0
+        while numero < max(ancien, nouveau) or os.path.exists(self.chemin(numero)):
+            if os.path.exists(self.chemin(numero)):
+                conn = sqlite3.connect(self.chemin(numero))
+                utilisateurs = [u for (u,) in conn.execute("SELECT DISTINCT utilisateur FROM evenements")]
+                conn.close()
+                for utilisateur in utilisateurs:
+                    cible = partition(utilisateur, nouveau)
+                    if cible != numero:
+                        deplaces['evenements'] += self._deplacer(utilisateur, numero, cible)
+                        deplaces['utilisateurs'] += 1
+                if numero >= nouveau:
+                    for suffixe in ('', '-wal', '-shm'):
+                        if os.path.exists(self.chemin(numero) + suffixe):
+                            os.remove(self.chemin(numero) + suffixe)
+            numero += 1
+        self._ecrire_config({'nombre': nouveau})
+        self.nombre = nouveau
+        self.connexions = PoolConnexions(self.connexions.capacite)
+        return deplaces
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Répartition et rééquilibrage des partitions SQLite par utilisateur")
+    parser.add_argument('dossier', help="Dossier des partitions (ASSISTANT_DATA_PATH/partitions)")
+    parser.add_argument('--partitions', type=int, help="Nouveau nombre de partitions")
+    args = parser.parse_args()
+
+    # Mêmes slots d'identifiants que l'API (DATA_PATH/ids, à côté de DATA_PATH/partitions)
+    configurer_identifiants(os.path.join(os.path.dirname(os.path.abspath(args.dossier)), 'ids'))
+    config = os.path.join(args.dossier, "partitions.json")
+    reprise = None
+    if os.path.exists(config):
+        with open(config, encoding='utf-8') as f:
+            reprise = json.load(f).get('reequilibrage')
+        if reprise is not None:
+            # Rééquilibrage interrompu : toutes les partitions sont reparcourues vers la cible
+            with open(config, 'w', encoding='utf-8') as f:
+                json.dump({'nombre': reprise}, f)
+    partitions = StockagePartitionne(args.dossier)
+    cible = args.partitions or reprise
+    if cible is not None and (reprise is not None or cible != partitions.nombre):
+        deplaces = partitions.reequilibrer(cible)
+        print(f"{deplaces['utilisateurs']} utilisateurs ({deplaces['evenements']} événements) déplacés ; "
+              f"{partitions.nombre} partitions.")
+    for numero, utilisateurs in partitions.repartition().items():
+        print(f"partition {numero:>4} : {len(utilisateurs):>6} utilisateurs, {sum(utilisateurs.values()):>9} événements")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+# core/planificateur.py
+# Planification d'une journée (ou d'une semaine) : les créneaux libres entre les rendez-vous
+# sont remplis par les tâches actives de façon à maximiser la somme des scores de priorité.
+#
+# Le problème (sac à dos multiple) est résolu en deux temps, avec un budget de temps :
+# 1. glouton : tâches par densité (score / minute) décroissante, chacune placée dans le
+#    créneau le plus serré qui peut la contenir (capacités restantes triées, bisection) ;
+# 2. réparation : une tâche non placée de score élevé remplace, dans un créneau, les
+#    tâches de plus faible score si le gain total est positif ; chaque créneau est ensuite
+#    réoptimisé par un sac à dos exact (sur ses tâches et les meilleures non placées), et
+#    les minutes restantes sont comblées par la meilleure tâche qui y tient encore.
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+
+from core.conflits import est_rdv
+from core.recurrence import iterer_occurrences
+from core.index_priorite import duree_restante_dict
+from core.score_lot import colonnes_depuis_dicts, calculer_scores
+
+BUDGET_DEFAUT_S = 0.2
+CRENEAU_MIN_MINUTES = 5
+JOURNEE_DEFAUT = (9, 18)    # heures de travail [début, fin[
+CANDIDATES_SAC_A_DOS = 60   # tâches non placées proposées au sac à dos exact de chaque créneau
+
+
+def creneaux_libres(occupations, debut, fin, journee=JOURNEE_DEFAUT, duree_min=CRENEAU_MIN_MINUTES):
+    """
+    Créneaux libres [(début, fin)] dans les heures de travail de chaque jour de [debut, fin[,
+    en dehors des occupations (intervalles (début, fin) quelconques, éventuellement chevauchants).
+    """
+    occupees = sorted(occupations)
+    creneaux = []
+    jour = datetime.combine(debut.date(), datetime.min.time())
+    i = 0
+    while jour < fin:
+        curseur = max(debut, jour + timedelta(hours=journee[0]))
+        fin_jour = min(fin, jour + timedelta(hours=journee[1]))
+        # Occupations terminées avant le curseur : plus utiles pour les jours suivants
+        while i < len(occupees) and occupees[i][1] <= curseur:
+            i += 1
+        j = i
+        while curseur < fin_jour and j < len(occupees) and occupees[j][0] < fin_jour:
+            occupation_debut, occupation_fin = occupees[j]
+            if occupation_debut > curseur:
+                creneaux.append((curseur, occupation_debut))
+            curseur = max(curseur, occupation_fin)
+            j += 1
+        if curseur < fin_jour:
+            creneaux.append((curseur, fin_jour))
+        jour += timedelta(days=1)
+    return [(d, f) for d, f in creneaux if (f - d) >= timedelta(minutes=duree_min)]
+
+
+class _Creneau:
+    __slots__ = ('debut', 'capacite', 'reste', 'taches')
+
+    def __init__(self, debut, fin):
+        self.debut = debut
+        self.capacite = self.reste = int((fin - debut).total_seconds() // 60)
+        self.taches = []    # indices des tâches placées
+
+
+def _sac_a_dos(capacite, choix, durees, scores):
+    """Sous-ensemble de `choix` de score maximal tenant en `capacite` minutes (programmation dynamique)."""
+    meilleur = [0.0] * (capacite + 1)
+    pris = []
+    for i in choix:
+        d, score = durees[i], scores[i]
+        marque = bytearray(capacite + 1)
+        for c in range(capacite, d - 1, -1):
+            if meilleur[c - d] + score > meilleur[c]:
+                meilleur[c] = meilleur[c - d] + score
+                marque[c] = 1
+        pris.append(marque)
+    retenues, c = [], capacite
+    for i, marque in zip(reversed(choix), reversed(pris)):
+        if marque[c]:
+            retenues.append(i)
+            c -= durees[i]
+    return retenues
+
+
+def _remplir(slots, choix, durees, scores):
+    """Sac à dos exact créneau après créneau (dans l'ordre donné) ; [(créneau, tâches retenues)]."""
+    nouvelles = []
+    for slot in slots:
+        retenues = _sac_a_dos(slot.capacite, choix, durees, scores)
+        nouvelles.append((slot, retenues))
+        retenues = set(retenues)
+        choix = [i for i in choix if i not in retenues]
+    return nouvelles
+
+
+def planifier(creneaux, durees, scores, budget_s=BUDGET_DEFAUT_S):
+    """
+    Affecte des tâches (durées en minutes, scores) aux créneaux [(début, fin)].
+    Renvoie la liste, pour chaque créneau, des indices de tâches placées (dans l'ordre).
+    """
+    limite = time.perf_counter() + budget_s
+    slots = [_Creneau(debut, fin) for debut, fin in creneaux]
+    candidates = [i for i in range(len(durees)) if durees[i] > 0 and scores[i] > 0]
+
+    # 1. Glouton par densité, placement dans le créneau le plus serré (best fit)
+    candidates.sort(key=lambda i: (-scores[i] / durees[i], durees[i]))
+    restes = sorted((s.reste, k) for k, s in enumerate(slots))
+    non_placees = []
+    for i in candidates:
+        position = bisect_left(restes, (durees[i], -1))
+        if position == len(restes):
+            non_placees.append(i)
+            continue
+        reste, k = restes.pop(position)
+        slots[k].taches.append(i)
+        slots[k].reste = reste - durees[i]
+        insort(restes, (slots[k].reste, k))
+
+    # 2a. Réparation : une tâche de score élevé remplace des tâches de plus faible score
+    non_placees.sort(key=lambda i: -scores[i])
+    liberees = []
+    for rang, i in enumerate(non_placees):
+        # Un remplacement retire au moins une tâche placée : sans gain possible au-delà du
+        # plus petit score placé (qui ne fait que croître), les suivantes ne peuvent pas entrer
+        plancher = min((scores[j] for slot in slots for j in slot.taches), default=0.0)
+        if scores[i] <= plancher or time.perf_counter() > limite:
+            liberees.extend(non_placees[rang:])
+            break
+        meilleur = None
+        for slot in slots:
+            if slot.capacite < durees[i]:
+                continue
+            besoin, retirees, perte = durees[i] - slot.reste, [], 0.0
+            for j in sorted(slot.taches, key=lambda j: scores[j]):
+                if besoin <= 0:
+                    break
+                retirees.append(j)
+                besoin -= durees[j]
+                perte += scores[j]
+            gain = scores[i] - perte
+            if besoin <= 0 and gain > 0 and (meilleur is None or gain > meilleur[0]):
+                meilleur = (gain, slot, retirees)
+        if meilleur is None:
+            liberees.append(i)
+            continue
+        _, slot, retirees = meilleur
+        for j in retirees:
+            slot.taches.remove(j)
+            slot.reste += durees[j]
+            liberees.append(j)
+        slot.taches.append(i)
+        slot.reste -= durees[i]
+
+    # 2b. Sac à dos exact par paire de créneaux : les tâches des deux créneaux et les
+    #     meilleures non placées sont redistribuées ; le résultat n'est gardé que s'il
+    #     améliore la somme des scores
+    ordre = sorted(slots, key=lambda s: -s.capacite)
+    paires = [(a, b) for k, a in enumerate(ordre) for b in ordre[k + 1:]] or [(a, None) for a in ordre]
+    for a, b in paires:
+        if time.perf_counter() > limite:
+            break
+        liberees.sort(key=lambda i: -scores[i])
+        groupe = [slot for slot in (a, b) if slot is not None]
+        actuelles = [i for slot in groupe for i in slot.taches]
+        choix = actuelles + [i for i in liberees if durees[i] <= a.capacite][:CANDIDATES_SAC_A_DOS]
+        # Remplir un créneau puis l'autre, dans les deux ordres : le meilleur est gardé
+        nouvelles = max((_remplir(ordre_slots, choix, durees, scores) for ordre_slots in (groupe, groupe[::-1])),
+                        key=lambda remplis: sum(scores[i] for _, taches in remplis for i in taches))
+        if sum(scores[i] for _, taches in nouvelles for i in taches) > sum(scores[i] for i in actuelles) + 1e-9:
+            placees = {i for _, taches in nouvelles for i in taches}
+            liberees = [i for i in liberees if i not in placees] + [i for i in actuelles if i not in placees]
+            for slot, taches in nouvelles:
+                slot.taches = taches
+                slot.reste = slot.capacite - sum(durees[i] for i in taches)
+
+    # 2c. Comblement : meilleure tâche restante qui tient dans les minutes libres de chaque créneau
+    liberees.sort(key=lambda i: durees[i])
+    cles_durees = [durees[i] for i in liberees]
+    for slot in sorted(slots, key=lambda s: s.reste):
+        while slot.reste > 0 and liberees and time.perf_counter() <= limite:
+            fin = bisect_right(cles_durees, slot.reste)
+            if fin == 0:
+                break
+            position = max(range(fin), key=lambda p: scores[liberees[p]])
+            i = liberees.pop(position)
+            del cles_durees[position]
+            slot.taches.append(i)
+            slot.reste -= durees[i]
+
+    # Dans chaque créneau, les tâches au meilleur score d'abord
+    return [sorted(slot.taches, key=lambda i: -scores[i]) for slot in slots]
+
+
+def _plan(creneaux, taches, durees, scores, budget_s):
+    """[{début, fin, tâche, score}] trié par début, à partir de l'affectation de planifier()."""
+    plan = []
+    for (debut, _), indices in zip(creneaux, planifier(creneaux, durees, scores, budget_s)):
+        for i in indices:
+            fin = debut + timedelta(minutes=durees[i])
+            plan.append({'debut': debut, 'fin': fin, 'tache': taches[i], 'score': float(scores[i])})
+            debut = fin
+    return plan
+
+
+# --- Entrées prêtes à l'emploi ---
+
+def planifier_dicts(inventaire, debut, fin, journee=JOURNEE_DEFAUT, budget_s=BUDGET_DEFAUT_S):
+    """Plan à partir d'un inventaire au format API (rendez-vous récurrents développés)."""
+    occupations = [(d, f) for e in inventaire if est_rdv(e) for d, f in iterer_occurrences(e, debut, fin)]
+    creneaux = creneaux_libres(occupations, debut, fin, journee)
+    taches = [t for t in inventaire if t.get('type_event') == 'Tache' and t.get('est_complete') is not True]
+    scores = [float(score) for score in calculer_scores(colonnes_depuis_dicts(taches))]
+    return creneaux, _plan(creneaux, taches, [duree_restante_dict(t) for t in taches], scores, budget_s)
+
+
+def planifier_evenements(evenements, debut, fin, journee=JOURNEE_DEFAUT, budget_s=BUDGET_DEFAUT_S):
+    """Plan à partir d'objets Evenement (CLI)."""
+    occupations = [(e.date_debut, e.date_debut + timedelta(minutes=e.duree_totale_minutes))
+                   for e in evenements if e.type_event == 'RDV' and not e.est_complete and e.date_debut]
+    creneaux = creneaux_libres(occupations, debut, fin, journee)
+    taches = [e for e in evenements if e.type_event == 'Tache' and not e.est_complete]
+    return creneaux, _plan(creneaux, taches, [t.get_duree_restante_minutes() for t in taches],
+                           [t.calculer_score_priorite() for t in taches], budget_s)
@@ -0,0 +1,203 @@
+# core/profil_imports.py
+# Coût d'import des dépendances (requirements.txt) et des points d'entrée du projet, mesuré
+# hors ligne avec `python -X importtime` dans des sous-processus isolés (plusieurs en
+# parallèle). Chaque mesure est la meilleure de plusieurs exécutions ; les modules déjà
+# chargés par un interpréteur vide (site, encodings...) sont retirés. Les résultats sont
+# ajoutés à un historique (une ligne JSON par profil) pour suivre leur évolution.
+#   python -m core.profil_imports [--repetitions 3] [--paralleles 4]
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+RACINE_PROJET = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHEMIN_HISTORIQUE = os.path.join(RACINE_PROJET, "storage", "profil_imports.jsonl")
+POINTS_ENTREE = ('interfaces.api_main', 'interfaces.cli_main')
+# Budget de démarrage (imports du point d'entrée le plus lourd), en millisecondes
+BUDGET_DEMARRAGE_MS = float(os.environ.get('ASSISTANT_BUDGET_IMPORTS_MS', 800))
+DELAI_MAX_S = 60
+
+_LIGNE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+_NOM_REQUIREMENT = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+
+
+def lire_importtime(texte):
+    """[(module, self_us, cumul_us, profondeur)] depuis la sortie de -X importtime."""
+    entrees = []
+    for ligne in texte.splitlines():
+        correspondance = _LIGNE.match(ligne)
+        if correspondance:
+            propre, cumul, retrait, module = correspondance.groups()
+            entrees.append((module, int(propre), int(cumul), len(retrait) // 2))
+    return entrees
+
+
+def module_de_requirement(ligne):
+    """'flask-cors>=4' -> 'flask_cors' (module importable, d'après les métadonnées installées)."""
+    correspondance = _NOM_REQUIREMENT.match(ligne)
+    if correspondance is None:
+        return None
+    distribution = correspondance.group(1)
+    try:
+        from importlib.metadata import packages_distributions
+        for module, distributions in packages_distributions().items():
+            if any(d.lower().replace('_', '-') == distribution.lower().replace('_', '-') for d in distributions):
+                if not module.startswith('_'):
+                    return module
+    except ImportError:
+        pass
+    return distribution.lower().replace('-', '_')
+
+
+def _environnement(dossier):
+    # Les points d'entrée créent leurs dossiers de données à l'import : on les isole dans
+    # `dossier` (temporaire, supprimé à la fin du profil)
+    return {**os.environ, 'PYTHONPATH': RACINE_PROJET, 'ASSISTANT_DATA_PATH': dossier,
+            'ASSISTANT_IDS_DIR': os.path.join(dossier, 'ids'), 'PYTHONDONTWRITEBYTECODE': '1'}
+
+
+def _executer(code, environnement):
+    resultat = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=RACINE_PROJET,
+                              env=environnement, capture_output=True, text=True, timeout=DELAI_MAX_S)
+    return resultat.returncode, lire_importtime(resultat.stderr), resultat.stderr
+
+
+def mesurer(module, base=frozenset(), environnement=None):
+    """
+    Une mesure de l'import de `module` dans un interpréteur neuf :
+    {total_us, modules: {nom: [self_us, cumul_us]}} ou {erreur}.
+    """
+    if environnement is None:
+        with tempfile.TemporaryDirectory(prefix='profil_imports_') as dossier:
+            return mesurer(module, base, _environnement(dossier))
+    code_retour, entrees, sortie = _executer(f"import {module}", environnement)
+    if code_retour != 0:
+        derniere = sortie.strip().splitlines()[-1] if sortie.strip() else f"code {code_retour}"
+        return {'erreur': derniere}
+    modules = {nom: [propre, cumul] for nom, propre, cumul, _ in entrees if nom not in base}
+    total = sum(cumul for nom, _, cumul, profondeur in entrees if profondeur == 0 and nom not in base)
+    return {'total_us': total, 'modules': modules}
+
+
+def _base(environnement):
+    """Modules chargés par un interpréteur vide (retirés de toutes les mesures)."""
+    _, entrees, _ = _executer("pass", environnement)
+    return frozenset(nom for nom, *_ in entrees)
+
+
+def profiler(cibles, repetitions=3, paralleles=4):
+    """
+    {cible: mesure} pour chaque module, meilleure de `repetitions` exécutions. Les
+    exécutions tournent en parallèle (`paralleles` sous-processus à la fois).
+    """
+    taches = [cible for cible in cibles for _ in range(repetitions)]
+    with tempfile.TemporaryDirectory(prefix='profil_imports_') as dossier:
+        environnement = _environnement(dossier)
+        base = _base(environnement)
+        with ThreadPoolExecutor(max_workers=paralleles) as pool:
+            mesures = list(pool.map(lambda cible: mesurer(cible, base, environnement), taches))
+    par_cible = {}
+    for cible, mesure in zip(taches, mesures):
+        par_cible.setdefault(cible, []).append(mesure)
+    resultats = {}
+    for cible, liste in par_cible.items():
+        valides = [m for m in liste if 'erreur' not in m]
+        resultats[cible] = min(valides, key=lambda m: m['total_us']) if valides else liste[0]
+    return resultats
+
+
+def plus_lourds(resultats, n=15):
+    """Les n modules au plus grand coût propre (self), toutes cibles confondues [(module, self_us)]."""
+    couts = {}
+    for mesure in resultats.values():
+        for module, (propre, _) in mesure.get('modules', {}).items():
+            couts[module] = max(couts.get(module, 0), propre)
+    return sorted(couts.items(), key=lambda e: e[1], reverse=True)[:n]
+
+
+def cibles_projet(dependances):
+    return [m for m in map(module_de_requirement, dependances) if m] + list(POINTS_ENTREE)
+
+
+# --- Historique ---
+
+def enregistrer(resultats, chemin=CHEMIN_HISTORIQUE):
+    """Ajoute le profil à l'historique (temps propre de chaque module, sans le cumul)."""
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    ligne = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'cibles': {cible: ({'total_us': m['total_us'],
+                            'modules': {nom: propre for nom, (propre, _) in sorted(m['modules'].items())}}
+                           if 'erreur' not in m else m) for cible, m in resultats.items()},
+    }
+    with open(chemin, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(ligne, ensure_ascii=False) + "\n")
+
+
+def historique(chemin=CHEMIN_HISTORIQUE):
+    if not os.path.exists(chemin):
+        return []
+    with open(chemin, encoding='utf-8') as f:
+        return [json.loads(ligne) for ligne in f if ligne.strip()]
+
+
+def estimer_demarrage(module, chemin=CHEMIN_HISTORIQUE):
+    """
+    Démarrage estimé (ms) du point d'entrée le plus lourd si `module` y est ajouté, sans rien
+    exécuter : dernier profil enregistré + temps propre des modules de `module` (d'après le
+    dernier profil qui l'a mesuré) que le point d'entrée ne charge pas déjà.
+    Renvoie (estimation_ms, surcoût_ms), ou None si l'un ou l'autre n'a jamais été mesuré.
+    """
+    profils = historique(chemin)
+    if not profils:
+        return None
+    points = [m for c, m in profils[-1]['cibles'].items() if c in POINTS_ENTREE and 'erreur' not in m]
+    mesure = next((p['cibles'][module] for p in reversed(profils)
+                   if module in p['cibles'] and 'erreur' not in p['cibles'][module]), None)
+    if not points or mesure is None:
+        return None
+    reference = max(points, key=lambda m: m['total_us'])
+    deja_charges = set(reference['modules'])
+    modules = mesure['modules']
+    if isinstance(modules, dict):
+        surcout = sum(propre for nom, propre in modules.items() if nom not in deja_charges)
+    else:
+        # Profils antérieurs au temps par module : part du total au prorata des modules absents
+        surcout = mesure['total_us'] * sum(nom not in deja_charges for nom in modules) // max(len(modules), 1)
+    return (reference['total_us'] + surcout) / 1000, surcout / 1000
+
+
+def main():
+    from core.code_agent import lire_dependances
+
+    parser = argparse.ArgumentParser(description="Coût d'import des dépendances et des points d'entrée")
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--paralleles', type=int, default=4)
+    parser.add_argument('--sans-historique', action='store_true')
+    args = parser.parse_args()
+
+    precedents = historique()
+    precedent = precedents[-1]['cibles'] if precedents else {}
+    resultats = profiler(cibles_projet(lire_dependances()), args.repetitions, args.paralleles)
+    for cible, mesure in sorted(resultats.items(), key=lambda e: -e[1].get('total_us', 0)):
+        if 'erreur' in mesure:
+            print(f"{cible:<28} erreur : {mesure['erreur']}")
+            continue
+        ancien = precedent.get(cible, {}).get('total_us')
+        evolution = f"  {(mesure['total_us'] - ancien) / 1000:+.1f} ms depuis le dernier profil" if ancien else ""
+        print(f"{cible:<28} {mesure['total_us'] / 1000:>8.1f} ms  ({len(mesure['modules'])} modules){evolution}")
+    print("\nModules les plus lourds (temps propre) :")
+    for module, propre in plus_lourds(resultats):
+        print(f"  {module:<40} {propre / 1000:>8.1f} ms")
+    if not args.sans_historique:
+        enregistrer(resultats)
+
+
+if __name__ == '__main__':
+    main()
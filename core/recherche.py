@@ -0,0 +1,132 @@
+# core/recherche.py
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, insort
+
+_MOTS = re.compile(r'[0-9a-z]+')
+# Ligatures que NFKD ne décompose pas (après casefold, Œ et Æ sont déjà en minuscules)
+_LIGATURES = str.maketrans({'œ': 'oe', 'æ': 'ae'})
+
+
+def replier(texte):
+    """Minuscules sans accents : 'Vérifier' -> 'verifier', 'Mettre à jour' -> 'mettre a jour', 'Cœur' -> 'coeur'."""
+    decompose = unicodedata.normalize('NFKD', texte.casefold().translate(_LIGATURES))
+    return ''.join(c for c in decompose if not unicodedata.combining(c))
+
+
+def mots(texte):
+    return _MOTS.findall(replier(texte)) if texte else []
+
+
+class IndexRecherche:
+    """
+    Index inversé (mot -> identifiants) sur les champs texte d'événements, tenu à jour à
+    chaque ajout / modification / suppression.
+
+    Le vocabulaire est gardé trié : les mots commençant par un préfixe forment une tranche
+    trouvée par bisection. Pour une requête de plusieurs mots, seule la liste du mot le
+    plus rare est parcourue ; les autres mots sont vérifiés sur les mots de chaque candidat.
+    """
+
+    def __init__(self, textes, identifiant, elements=()):
+        self._textes = textes
+        self._identifiant = identifiant
+        self._postings = {}     # mot -> set(ident)
+        self._vocabulaire = []  # mots triés
+        self._entrees = {}      # ident -> (element, mots, seq)
+        self._seq = 0
+        for element in elements:
+            self.ajouter(element)
+
+    def __len__(self):
+        return len(self._entrees)
+
+    # --- Mises à jour ---
+
+    def ajouter(self, element):
+        """Ajoute ou met à jour un élément."""
+        ident = self._identifiant(element)
+        ancienne = self._entrees.get(ident)
+        if ancienne is not None:
+            self._retirer_mots(ident, ancienne[1])
+            seq = ancienne[2]
+        else:
+            seq = self._seq
+            self._seq += 1
+        mots_element = frozenset(m for texte in self._textes(element) for m in mots(texte))
+        for mot in mots_element:
+            identifiants = self._postings.get(mot)
+            if identifiants is None:
+                identifiants = self._postings[mot] = set()
+                insort(self._vocabulaire, mot)
+            identifiants.add(ident)
+        self._entrees[ident] = (element, mots_element, seq)
+
+    mettre_a_jour = ajouter
+
+    def retirer(self, ident):
+        entree = self._entrees.pop(ident, None)
+        if entree is not None:
+            self._retirer_mots(ident, entree[1])
+
+    def _retirer_mots(self, ident, mots_element):
+        for mot in mots_element:
+            identifiants = self._postings[mot]
+            identifiants.discard(ident)
+            if not identifiants:
+                del self._postings[mot]
+                del self._vocabulaire[bisect_left(self._vocabulaire, mot)]
+
+    # --- Requêtes ---
+
+    def _tranche(self, prefixe):
+        """Mots du vocabulaire commençant par le préfixe."""
+        debut = bisect_left(self._vocabulaire, prefixe)
+        fin = bisect_left(self._vocabulaire, prefixe + '\uffff', debut)
+        return self._vocabulaire[debut:fin]
+
+    def _candidats(self, prefixes):
+        """Identifiants dont les mots couvrent tous les préfixes."""
+        tranches = [(sum(len(self._postings[m]) for m in tranche), prefixe, tranche)
+                    for prefixe in prefixes for tranche in [self._tranche(prefixe)]]
+        if not tranches or min(tranches)[0] == 0:
+            return ()
+        _, plus_rare, tranche = min(tranches)
+        autres = [prefixe for _, prefixe, _ in tranches if prefixe != plus_rare]
+        candidats = set().union(*(self._postings[mot] for mot in tranche))
+        if not autres:
+            return candidats
+        return [ident for ident in candidats
+                if all(any(m.startswith(p) for m in self._entrees[ident][1]) for p in autres)]
+
+    def rechercher(self, requete, limite=50, decalage=0, filtre=None):
+        """
+        (total, éléments) : éléments dont chaque mot de la requête est le début d'un mot du
+        nom ou du projet. Les correspondances exactes passent en premier, puis l'ordre
+        d'insertion. `filtre(element)` restreint les résultats (type, complétion, projet).
+        """
+        prefixes = list(dict.fromkeys(mots(requete)))
+        if not prefixes:
+            return 0, []
+        entrees = self._entrees
+        candidats = self._candidats(prefixes)
+        if filtre is not None:
+            candidats = [ident for ident in candidats if filtre(entrees[ident][0])]
+        # Mots complets d'abord, puis ordre d'insertion
+        meilleurs = heapq.nsmallest(decalage + limite, candidats,
+                                    key=lambda i: (-sum(p in entrees[i][1] for p in prefixes), entrees[i][2]))
+        return len(candidats), [entrees[ident][0] for ident in meilleurs[decalage:]]
+
+
+# --- Index prêts à l'emploi ---
+
+def index_recherche_evenements(evenements=()):
+    """Index des objets Evenement (CLI), sur le nom et le projet."""
+    return IndexRecherche(textes=lambda e: (e.nom, e.projet), identifiant=id, elements=evenements)
+
+
+def index_recherche_api(taches=()):
+    """Index des événements au format API, identifiés par db_id."""
+    return IndexRecherche(textes=lambda t: (t.get('nom'), t.get('projet')),
+                          identifiant=lambda t: t.get('db_id'), elements=taches)
@@ -0,0 +1,201 @@
+# core/recurrence.py
+import calendar
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta, timezone
+
+# Règles acceptées dans le champ 'recurrence' (voir api_main.construire_evenement)
+PAS_FIXES = {'daily': timedelta(days=1), 'weekly': timedelta(days=7)}
+RECURRENCES = ('daily', 'weekly', 'monthly')
+
+# Au-delà de cette durée, un événement ponctuel est rangé à part (parcouru à chaque requête)
+DUREE_LONGUE = timedelta(days=31)
+
+
+def lire_date(valeur):
+    """Convertit une date ISO (ou un datetime) en datetime naïf UTC ; None si illisible."""
+    if isinstance(valeur, str):
+        try:
+            valeur = datetime.fromisoformat(valeur.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if not isinstance(valeur, datetime):
+        return None
+    if valeur.tzinfo is not None:
+        valeur = valeur.astimezone(timezone.utc).replace(tzinfo=None)
+    return valeur
+
+
+def format_iso(valeur):
+    """Format identique à Date.toISOString() côté navigateur."""
+    return valeur.strftime('%Y-%m-%dT%H:%M:%S.') + f"{valeur.microsecond // 1000:03d}Z"
+
+
+def _ajouter_mois(valeur, mois):
+    """Décale de n mois, en ramenant le jour au dernier jour du mois si nécessaire."""
+    total = valeur.month - 1 + mois
+    annee, mois_cible = valeur.year + total // 12, total % 12 + 1
+    jour = min(valeur.day, calendar.monthrange(annee, mois_cible)[1])
+    return valeur.replace(year=annee, month=mois_cible, day=jour)
+
+
+def _occurrence(debut, recurrence, k):
+    """Début de la k-ième occurrence (k = 0 : l'événement d'origine)."""
+    if recurrence == 'monthly':
+        return _ajouter_mois(debut, k)
+    return debut + PAS_FIXES[recurrence] * k
+
+
+def _premier_rang(debut, duree, recurrence, fenetre_debut):
+    """Rang de la première occurrence pouvant finir après fenetre_debut, calculé sans itérer."""
+    seuil = fenetre_debut - duree
+    if seuil <= debut:
+        return 0
+    if recurrence == 'monthly':
+        k = (seuil.year - debut.year) * 12 + seuil.month - debut.month - 1
+    else:
+        k = (seuil - debut) // PAS_FIXES[recurrence]
+    return max(0, k)
+
+
+def _intervalle(evenement):
+    """(début, durée) d'un événement ; None s'il n'est pas daté."""
+    debut = lire_date(evenement.get('date_debut'))
+    if debut is None:
+        return None
+    fin = lire_date(evenement.get('date_fin'))
+    if fin is not None and fin >= debut:
+        return debut, fin - debut
+    return debut, timedelta(minutes=evenement.get('duree_totale_minutes') or 0)
+
+
+def _chevauche(debut, fin, fenetre_debut, fenetre_fin):
+    return debut < fenetre_fin and (fin > fenetre_debut or debut >= fenetre_debut)
+
+
+def iterer_occurrences(evenement, fenetre_debut, fenetre_fin):
+    """
+    Générateur des occurrences (début, fin) d'un événement dans [fenetre_debut, fenetre_fin[.
+    Pour une série, on saute directement à la première occurrence utile : le coût ne
+    dépend que du nombre d'occurrences dans la fenêtre, pas de l'ancienneté de la série.
+    """
+    intervalle = _intervalle(evenement)
+    if intervalle is None:
+        return
+    debut, duree = intervalle
+    recurrence = evenement.get('recurrence')
+    if recurrence not in RECURRENCES:
+        if _chevauche(debut, debut + duree, fenetre_debut, fenetre_fin):
+            yield debut, debut + duree
+        return
+
+    k = _premier_rang(debut, duree, recurrence, fenetre_debut)
+    while True:
+        occurrence = _occurrence(debut, recurrence, k)
+        if occurrence >= fenetre_fin:
+            return
+        if _chevauche(occurrence, occurrence + duree, fenetre_debut, fenetre_fin):
+            yield occurrence, occurrence + duree
+        k += 1
+
+
+def instance(evenement, debut, fin):
+    """Dict d'une occurrence, au même format que expandRecurrences (index.html)."""
+    origine = lire_date(evenement.get('date_debut'))
+    if debut == origine:
+        return evenement
+    return dict(
+        evenement,
+        db_id=f"{evenement.get('db_id')}_{int(debut.replace(tzinfo=timezone.utc).timestamp() * 1000)}",
+        date_debut=format_iso(debut),
+        date_fin=format_iso(fin),
+        is_recurring_instance=True,
+    )
+
+
+class IndexCalendrier:
+    """
+    Index d'intervalles sur les événements datés non complétés.
+
+    Les événements ponctuels sont triés par date de début : une fenêtre ne regarde que
+    ceux qui commencent dans [fenetre_debut - durée max, fenetre_fin[. Les séries ne
+    sont pas développées : on ne garde que leur début, et seules celles commencées
+    avant la fin de la fenêtre sont parcourues.
+    """
+
+    def __init__(self, evenements=()):
+        self._ponctuels = []    # (début, ident) triés
+        self._series = []       # (début, ident) triés
+        self._longs = set()     # ident des événements ponctuels plus longs que DUREE_LONGUE
+        self._entrees = {}      # ident -> (evenement, début, liste)
+        self._duree_max = timedelta(0)
+        self._seq = 0
+        for evenement in evenements:
+            self.ajouter(evenement)
+
+    def __len__(self):
+        return len(self._entrees)
+
+    def _ident(self, evenement):
+        db_id = evenement.get('db_id')
+        if db_id is None:
+            self._seq += 1
+            return ('_', self._seq)
+        return db_id
+
+    def ajouter(self, evenement):
+        """Ajoute ou met à jour un événement (retiré s'il est complété ou non daté)."""
+        ident = self._ident(evenement)
+        self.retirer(ident)
+        intervalle = _intervalle(evenement)
+        if intervalle is None or evenement.get('est_complete') is True:
+            return
+        debut, duree = intervalle
+        if evenement.get('recurrence') in RECURRENCES:
+            liste = self._series
+        else:
+            liste = self._ponctuels
+            if duree > DUREE_LONGUE:
+                self._longs.add(ident)
+            else:
+                self._duree_max = max(self._duree_max, duree)
+        insort(liste, (debut, ident), key=lambda e: e[0])
+        self._entrees[ident] = (evenement, debut, liste)
+
+    mettre_a_jour = ajouter
+
+    def retirer(self, ident):
+        entree = self._entrees.pop(ident, None)
+        if entree is None:
+            return
+        _, debut, liste = entree
+        i = bisect_left(liste, debut, key=lambda e: e[0])
+        while liste[i][1] != ident:
+            i += 1
+        del liste[i]
+        self._longs.discard(ident)
+
+    def _candidats(self, fenetre_debut, fenetre_fin):
+        debut = bisect_left(self._ponctuels, fenetre_debut - self._duree_max, key=lambda e: e[0])
+        fin = bisect_left(self._ponctuels, fenetre_fin, key=lambda e: e[0])
+        for _, ident in self._ponctuels[debut:fin]:
+            yield self._entrees[ident][0]
+        for ident in self._longs:
+            if self._entrees[ident][1] < fenetre_debut - self._duree_max:
+                yield self._entrees[ident][0]
+        fin = bisect_left(self._series, fenetre_fin, key=lambda e: e[0])
+        for _, ident in self._series[:fin]:
+            yield self._entrees[ident][0]
+
+    def evenements(self, fenetre_debut, fenetre_fin):
+        """Événements pouvant avoir une occurrence dans la fenêtre (séries non développées)."""
+        return self._candidats(fenetre_debut, fenetre_fin)
+
+    def occurrences(self, fenetre_debut, fenetre_fin):
+        """Générateur des occurrences (dicts) dans la fenêtre, sans ordre particulier."""
+        for evenement in self._candidats(fenetre_debut, fenetre_fin):
+            for debut, fin in iterer_occurrences(evenement, fenetre_debut, fenetre_fin):
+                yield instance(evenement, debut, fin)
+
+    def occurrences_triees(self, fenetre_debut, fenetre_fin):
+        return sorted(self.occurrences(fenetre_debut, fenetre_fin),
+                      key=lambda e: lire_date(e['date_debut']))
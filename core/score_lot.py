@@ -0,0 +1,112 @@
+# core/score_lot.py
+# Calcul des scores de priorité par lot, sur une représentation en colonnes de l'inventaire.
+# Même formule que Evenement.calculer_score_priorite, mais avec un seul instantané "maintenant"
+# pour tout le lot (bonus x1.5 cohérent). NumPy est utilisé s'il est installé, sinon un
+# calcul en Python pur donne les mêmes valeurs.
+from datetime import date, datetime
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel
+    np = None
+
+# Jour (ordinal) utilisé quand la date de début est absente ou illisible : jamais de bonus
+JOUR_INCONNU = date.max.toordinal()
+
+
+def _jour_ordinal(date_debut):
+    """Ordinal du jour de début d'une date ISO (format API) ou JOUR_INCONNU."""
+    if not isinstance(date_debut, str):
+        return JOUR_INCONNU
+    try:
+        return date.fromisoformat(date_debut[:10]).toordinal()
+    except ValueError:
+        return JOUR_INCONNU
+
+
+class ColonnesInventaire:
+    """Inventaire en colonnes : une liste (ou un tableau NumPy) par champ utile au score."""
+
+    def __init__(self, urgence, importance, duree, jour_debut, est_complete, est_tache, db_id):
+        if np is not None:
+            self.urgence = np.asarray(urgence, dtype=np.int64)
+            self.importance = np.asarray(importance, dtype=np.int64)
+            self.duree = np.asarray(duree, dtype=np.int64)
+            self.jour_debut = np.asarray(jour_debut, dtype=np.int64)
+            self.est_complete = np.asarray(est_complete, dtype=bool)
+            self.est_tache = np.asarray(est_tache, dtype=bool)
+            self.db_id = np.asarray(db_id, dtype=np.int64)
+        else:
+            self.urgence, self.importance, self.duree = urgence, importance, duree
+            self.jour_debut, self.est_complete, self.est_tache = jour_debut, est_complete, est_tache
+            self.db_id = db_id
+
+    def __len__(self):
+        return len(self.urgence)
+
+
+def colonnes_depuis_evenements(evenements):
+    """Construit les colonnes à partir d'objets Evenement."""
+    return ColonnesInventaire(
+        urgence=[e.urgence for e in evenements],
+        importance=[e.importance for e in evenements],
+        duree=[e.duree_totale_minutes for e in evenements],
+        # Comme calculer_score_priorite : seul un datetime donne droit au bonus
+        jour_debut=[e.date_debut.date().toordinal() if isinstance(e.date_debut, datetime) else JOUR_INCONNU
+                    for e in evenements],
+        est_complete=[bool(e.est_complete) for e in evenements],
+        est_tache=[e.type_event == 'Tache' for e in evenements],
+        db_id=[e.db_id if isinstance(e.db_id, int) else 0 for e in evenements],
+    )
+
+
+def colonnes_depuis_dicts(taches):
+    """Construit les colonnes à partir de tâches au format API (dates en chaînes ISO)."""
+    return ColonnesInventaire(
+        urgence=[t.get('urgence', 3) for t in taches],
+        importance=[t.get('importance', 3) for t in taches],
+        duree=[t.get('duree_totale_minutes', 60) for t in taches],
+        jour_debut=[_jour_ordinal(t.get('date_debut')) for t in taches],
+        est_complete=[t.get('est_complete') is True for t in taches],
+        est_tache=[t.get('type_event') == 'Tache' for t in taches],
+        db_id=[t.get('db_id') if isinstance(t.get('db_id'), int) else 0 for t in taches],
+    )
+
+
+def calculer_scores(colonnes, maintenant=None):
+    """Scores de priorité de tout le lot, calculés avec un seul instantané 'maintenant'."""
+    aujourd_hui = (maintenant or datetime.now()).date().toordinal()
+
+    if np is not None:
+        duree_ajustee = np.maximum(15, colonnes.duree)
+        scores = (colonnes.urgence * colonnes.importance * 10) / (duree_ajustee / 60)
+        scores = np.where(colonnes.jour_debut <= aujourd_hui, scores * 1.5, scores)
+        return np.where(colonnes.est_tache & ~colonnes.est_complete, scores, 0)
+
+    scores = []
+    for u, i, d, jour, complete, tache in zip(colonnes.urgence, colonnes.importance, colonnes.duree,
+                                               colonnes.jour_debut, colonnes.est_complete,
+                                               colonnes.est_tache):
+        if not tache or complete:
+            scores.append(0)
+            continue
+        score = (u * i * 10) / (max(15, d) / 60)
+        if jour <= aujourd_hui:
+            score *= 1.5
+        scores.append(score)
+    return scores
+
+
+def scores_evenements(evenements, maintenant=None):
+    """Raccourci : liste des scores (floats) d'une liste d'Evenement."""
+    scores = calculer_scores(colonnes_depuis_evenements(evenements), maintenant)
+    return scores.tolist() if np is not None else scores
+
+
+def classer(colonnes, scores, k=None):
+    """Indices triés par score décroissant puis db_id décroissant (k premiers si précisé)."""
+    if np is not None:
+        ordre = np.lexsort((-colonnes.db_id, -np.asarray(scores, dtype=float)))
+        return ordre[:k].tolist() if k is not None else ordre.tolist()
+    ordre = sorted(range(len(scores)), key=lambda i: (-scores[i], -colonnes.db_id[i]))
+    return ordre[:k] if k is not None else ordre
@@ -0,0 +1,405 @@
+# core/stockage.py
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from .identifiants import allouer_id
+
+# Champs stockés en colonnes (le reste d'un événement va dans la colonne 'extra')
+CHAMPS_EVENEMENT = (
+    'db_id', 'nom', 'type_event', 'importance', 'urgence', 'duree_totale_minutes',
+    'projet', 'date_creation', 'est_complete', 'date_complete',
+    'date_debut', 'date_fin', 'recurrence',
+)
+
+# Nombre d'entrées conservées dans le journal des modifications
+TAILLE_JOURNAL_MODIFICATIONS = 10000
+
+# Fichiers SQLite ouverts au plus par thread (voir PoolConnexions)
+CONNEXIONS_MAX = 8
+
+# Champs modifiables via une mise à jour partielle (PATCH)
+CHAMPS_MODIFIABLES = (
+    'nom', 'type_event', 'importance', 'urgence', 'duree_totale_minutes',
+    'projet', 'est_complete', 'date_debut', 'date_fin', 'recurrence',
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS evenements (
+    db_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nom TEXT NOT NULL,
+    type_event TEXT NOT NULL DEFAULT 'Tache',
+    importance INTEGER,
+    urgence INTEGER,
+    duree_totale_minutes INTEGER,
+    projet TEXT,
+    date_creation TEXT,
+    est_complete INTEGER NOT NULL DEFAULT 0,
+    date_complete TEXT,
+    date_debut TEXT,
+    date_fin TEXT,
+    recurrence TEXT,
+    extra TEXT,
+    utilisateur TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS modifications (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    db_id INTEGER NOT NULL,
+    utilisateur TEXT NOT NULL DEFAULT ''
+);
+"""
+
+# Créés après la migration des bases antérieures à la colonne 'utilisateur'
+_INDEX = """
+DROP INDEX IF EXISTS idx_evenements_actifs;
+CREATE INDEX IF NOT EXISTS idx_evenements_utilisateur ON evenements (utilisateur, db_id);
+CREATE INDEX IF NOT EXISTS idx_evenements_utilisateur_actifs ON evenements (utilisateur, type_event, est_complete);
+CREATE INDEX IF NOT EXISTS idx_modifications_utilisateur ON modifications (utilisateur, seq);
+"""
+
+
+def initialiser_schema(conn):
+    """Crée les tables et les index ; ajoute la colonne 'utilisateur' aux bases existantes."""
+    conn.executescript(_SCHEMA)
+    for table in ('evenements', 'modifications'):
+        colonnes = {ligne[1] for ligne in conn.execute(f"PRAGMA table_info({table})")}
+        if 'utilisateur' not in colonnes:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN utilisateur TEXT NOT NULL DEFAULT ''")
+    conn.executescript(_INDEX)
+
+
+class PoolConnexions:
+    """
+    Connexions SQLite réutilisées d'une requête à l'autre. Une connexion ne se partage pas
+    entre threads : chaque thread garde les siennes, au plus `capacite` fichiers ouverts,
+    et ferme la moins récemment utilisée au-delà. Le schéma est créé une fois par fichier.
+    """
+
+    def __init__(self, capacite=CONNEXIONS_MAX):
+        self.capacite = capacite
+        self._local = threading.local()
+        self._verrou = threading.Lock()
+        self._initialises = set()
+
+    def connexion(self, chemin):
+        connexions = getattr(self._local, 'connexions', None)
+        if connexions is None:
+            connexions = self._local.connexions = OrderedDict()
+        conn = connexions.get(chemin)
+        if conn is not None:
+            connexions.move_to_end(chemin)
+            return conn
+        conn = sqlite3.connect(chemin, timeout=5.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._verrou:
+            if chemin not in self._initialises:
+                with conn:
+                    initialiser_schema(conn)
+                self._initialises.add(chemin)
+        connexions[chemin] = conn
+        while len(connexions) > self.capacite:
+            _, ancienne = connexions.popitem(last=False)
+            ancienne.close()
+        return conn
+
+    def ouvertes(self):
+        """Connexions ouvertes par le thread courant."""
+        return len(getattr(self._local, 'connexions', ()))
+
+
+def _vers_ligne(evenement):
+    """Sépare un événement (dict) en valeurs de colonnes + JSON des champs libres."""
+    valeurs = [evenement.get(champ) for champ in CHAMPS_EVENEMENT]
+    valeurs[CHAMPS_EVENEMENT.index('est_complete')] = 1 if evenement.get('est_complete') else 0
+    extra = {k: v for k, v in evenement.items() if k not in CHAMPS_EVENEMENT}
+    valeurs.append(json.dumps(extra) if extra else None)
+    return valeurs
+
+
+def _depuis_ligne(ligne):
+    """Reconstruit le dict d'un événement tel que l'API le renvoie."""
+    evenement = dict(zip(CHAMPS_EVENEMENT, ligne[:-1]))
+    evenement['est_complete'] = bool(evenement['est_complete'])
+    if evenement['date_complete'] is None:
+        del evenement['date_complete']
+    if ligne[-1]:
+        evenement.update(json.loads(ligne[-1]))
+    return evenement
+
+
+class StockageSQLite:
+    """
+    Inventaire persistant côté serveur (SQLite en mode WAL, connexions par thread).
+
+    Toutes les lectures et écritures sont limitées aux lignes de `utilisateur` : plusieurs
+    utilisateurs peuvent partager un même fichier (voir core/partitions.py). Avec
+    ids_globaux, les db_id sont alloués par core.identifiants plutôt que par la base, pour
+    qu'un utilisateur puisse être déplacé d'un fichier à l'autre sans collision.
+    """
+
+    def __init__(self, chemin, utilisateur='', connexions=None, ids_globaux=False):
+        self.chemin = chemin
+        self.utilisateur = utilisateur
+        self.ids_globaux = ids_globaux
+        self._connexions = connexions or PoolConnexions(capacite=1)
+        self._connexion()
+
+    def _connexion(self):
+        return self._connexions.connexion(self.chemin)
+
+    def _select(self, conditions=(), params=(), suite=''):
+        colonnes = ', '.join(CHAMPS_EVENEMENT) + ', extra'
+        clause = ' AND '.join(('utilisateur = ?', *conditions))
+        curseur = self._connexion().execute(f"SELECT {colonnes} FROM evenements WHERE {clause} {suite}",
+                                            (self.utilisateur, *params))
+        return [_depuis_ligne(ligne) for ligne in curseur]
+
+    # --- Lecture ---
+
+    def obtenir(self, db_id):
+        resultat = self._select(("db_id = ?",), (db_id,))
+        return resultat[0] if resultat else None
+
+    def lister(self, apres=None, limite=50, type_event=None, est_complete=None):
+        """Page d'événements triés par db_id (pagination par curseur 'apres')."""
+        conditions, params = [], []
+        if apres is not None:
+            conditions.append("db_id > ?")
+            params.append(apres)
+        if type_event is not None:
+            conditions.append("type_event = ?")
+            params.append(type_event)
+        if est_complete is not None:
+            conditions.append("est_complete = ?")
+            params.append(1 if est_complete else 0)
+        return self._select(conditions, (*params, limite), "ORDER BY db_id LIMIT ?")
+
+    def compter(self):
+        return self._connexion().execute("SELECT COUNT(*) FROM evenements WHERE utilisateur = ?",
+                                         (self.utilisateur,)).fetchone()[0]
+
+    def taches_actives(self):
+        """Tâches non complétées (utilise l'index idx_evenements_utilisateur_actifs)."""
+        return self._select(("type_event = 'Tache'", "est_complete = 0"))
+
+    def evenements_planifies(self):
+        """Événements datés non complétés (base du calendrier)."""
+        return self._select(("est_complete = 0", "date_debut IS NOT NULL"))
+
+    # --- Écriture ---
+
+    def ajouter(self, evenement):
+        """Insère l'événement ; le db_id est attribué par la base s'il est absent."""
+        conn = self._connexion()
+        with conn:
+            return self._inserer(conn, evenement)
+
+    def mettre_a_jour(self, db_id, champs):
+        """Applique une mise à jour partielle ; renvoie l'événement ou None s'il n'existe pas."""
+        conn = self._connexion()
+        with conn:
+            return self._modifier(conn, db_id, champs)
+
+    def terminer(self, db_id, date_complete):
+        return self.mettre_a_jour(db_id, {'est_complete': True, 'date_complete': date_complete})
+
+    def supprimer(self, db_id):
+        conn = self._connexion()
+        with conn:
+            return self._effacer(conn, db_id)
+
+    def appliquer_lot(self, operations, atomique=False):
+        """
+        Applique [(nature, db_id, donnees)] (nature : 'ajouter', 'modifier' ou 'supprimer')
+        dans une seule transaction, donc un seul commit. Renvoie (resultats, valide) : un
+        résultat par opération (l'événement, True pour une suppression, None si l'ID est
+        introuvable ou l'écriture refusée). En mode atomique, le premier échec annule tout.
+        """
+        conn = self._connexion()
+        resultats = []
+        with conn:
+            for nature, db_id, donnees in operations:
+                try:
+                    if nature == 'ajouter':
+                        resultat = self._inserer(conn, donnees)
+                    elif nature == 'modifier':
+                        resultat = self._modifier(conn, db_id, donnees)
+                    else:
+                        resultat = self._effacer(conn, db_id) or None
+                except sqlite3.IntegrityError:
+                    resultat = None
+                resultats.append(resultat)
+                if resultat is None and atomique:
+                    conn.rollback()
+                    return resultats, False
+        return resultats, True
+
+    # Les méthodes suivantes écrivent sans valider la transaction en cours
+
+    def _inserer(self, conn, evenement):
+        if self.ids_globaux and evenement.get('db_id') is None:
+            evenement = dict(evenement, db_id=allouer_id())
+        colonnes = ', '.join(CHAMPS_EVENEMENT) + ', extra, utilisateur'
+        marqueurs = ', '.join('?' * (len(CHAMPS_EVENEMENT) + 2))
+        curseur = conn.execute(f"INSERT INTO evenements ({colonnes}) VALUES ({marqueurs})",
+                               (*_vers_ligne(evenement), self.utilisateur))
+        self._noter_modification(conn, curseur.lastrowid)
+        return dict(evenement, db_id=curseur.lastrowid)
+
+    def _modifier(self, conn, db_id, champs):
+        evenement = self.obtenir(db_id)
+        if evenement is None:
+            return None
+        evenement.update(champs)
+        evenement['db_id'] = db_id
+        affectations = ', '.join(f"{c} = ?" for c in CHAMPS_EVENEMENT[1:]) + ', extra = ?'
+        conn.execute(f"UPDATE evenements SET {affectations} WHERE db_id = ? AND utilisateur = ?",
+                     (*_vers_ligne(evenement)[1:], db_id, self.utilisateur))
+        self._noter_modification(conn, db_id)
+        return evenement
+
+    def _effacer(self, conn, db_id):
+        curseur = conn.execute("DELETE FROM evenements WHERE db_id = ? AND utilisateur = ?",
+                               (db_id, self.utilisateur))
+        if curseur.rowcount > 0:
+            self._noter_modification(conn, db_id)
+        return curseur.rowcount > 0
+
+    # --- Journal des modifications (synchronisation des index entre workers) ---
+
+    def _noter_modification(self, conn, db_id):
+        seq = conn.execute("INSERT INTO modifications (db_id, utilisateur) VALUES (?, ?)",
+                           (db_id, self.utilisateur)).lastrowid
+        # Purge commune à tous les utilisateurs du fichier
+        if seq % TAILLE_JOURNAL_MODIFICATIONS == 0:
+            conn.execute("DELETE FROM modifications WHERE seq <= ?", (seq - TAILLE_JOURNAL_MODIFICATIONS,))
+
+    def dernier_seq(self):
+        return self._connexion().execute("SELECT COALESCE(MAX(seq), 0) FROM modifications WHERE utilisateur = ?",
+                                         (self.utilisateur,)).fetchone()[0]
+
+    def modifications_depuis(self, seq):
+        """(dernier seq, db_id modifiés après seq), ou None si le journal a été purgé depuis."""
+        conn = self._connexion()
+        premier = conn.execute("SELECT MIN(seq) FROM modifications").fetchone()[0]
+        if premier is not None and seq < premier - 1:
+            return None
+        lignes = conn.execute("SELECT seq, db_id FROM modifications WHERE utilisateur = ? AND seq > ? ORDER BY seq",
+                              (self.utilisateur, seq)).fetchall()
+        if not lignes:
+            return seq, set()
+        return lignes[-1][0], {db_id for _, db_id in lignes}
+
+
+class StockageMemoire:
+    """Variante en mémoire (même interface), utile pour le développement local."""
+
+    def __init__(self):
+        self._evenements = {}
+        self._verrou = threading.Lock()
+        self._modifications = []
+
+    def obtenir(self, db_id):
+        evenement = self._evenements.get(db_id)
+        return dict(evenement) if evenement else None
+
+    def lister(self, apres=None, limite=50, type_event=None, est_complete=None):
+        resultat = []
+        for db_id in sorted(self._evenements):
+            if apres is not None and db_id <= apres:
+                continue
+            evenement = self._evenements[db_id]
+            if type_event is not None and evenement.get('type_event') != type_event:
+                continue
+            if est_complete is not None and bool(evenement.get('est_complete')) != est_complete:
+                continue
+            resultat.append(dict(evenement))
+            if len(resultat) >= limite:
+                break
+        return resultat
+
+    def compter(self):
+        return len(self._evenements)
+
+    def taches_actives(self):
+        return [dict(e) for e in self._evenements.values()
+                if e.get('type_event') == 'Tache' and not e.get('est_complete')]
+
+    def evenements_planifies(self):
+        return [dict(e) for e in self._evenements.values()
+                if e.get('date_debut') and not e.get('est_complete')]
+
+    def ajouter(self, evenement):
+        with self._verrou:
+            db_id = evenement.get('db_id') or allouer_id()
+            self._evenements[db_id] = dict(evenement, db_id=db_id)
+            self._modifications.append(db_id)
+        return dict(self._evenements[db_id])
+
+    def mettre_a_jour(self, db_id, champs):
+        with self._verrou:
+            if db_id not in self._evenements:
+                return None
+            self._evenements[db_id].update(champs)
+            self._evenements[db_id]['db_id'] = db_id
+            self._modifications.append(db_id)
+        return dict(self._evenements[db_id])
+
+    def terminer(self, db_id, date_complete):
+        return self.mettre_a_jour(db_id, {'est_complete': True, 'date_complete': date_complete})
+
+    def supprimer(self, db_id):
+        with self._verrou:
+            if self._evenements.pop(db_id, None) is None:
+                return False
+            self._modifications.append(db_id)
+            return True
+
+    def appliquer_lot(self, operations, atomique=False):
+        """Même contrat que StockageSQLite.appliquer_lot (annulation via un journal d'undo)."""
+        resultats, annulations = [], []
+        for nature, db_id, donnees in operations:
+            if nature == 'ajouter':
+                db_id = donnees.get('db_id') or allouer_id()
+                if db_id in self._evenements:
+                    resultat = None
+                else:
+                    annulations.append((db_id, None))
+                    resultat = self.ajouter(dict(donnees, db_id=db_id))
+            else:
+                precedent = self._evenements.get(db_id)
+                annulations.append((db_id, dict(precedent) if precedent else None))
+                if nature == 'modifier':
+                    resultat = self.mettre_a_jour(db_id, donnees)
+                else:
+                    resultat = self.supprimer(db_id) or None
+            resultats.append(resultat)
+            if resultat is None and atomique:
+                with self._verrou:
+                    for ident, precedent in reversed(annulations):
+                        if precedent is None:
+                            self._evenements.pop(ident, None)
+                        else:
+                            self._evenements[ident] = precedent
+                        self._modifications.append(ident)
+                return resultats, False
+        return resultats, True
+
+    def dernier_seq(self):
+        return len(self._modifications)
+
+    def modifications_depuis(self, seq):
+        return len(self._modifications), set(self._modifications[seq:])
+
+
+def creer_stockage(dossier, backend=None):
+    """Crée le stockage configuré (variable STOCKAGE_BACKEND : 'sqlite' par défaut ou 'memoire')."""
+    backend = backend or os.environ.get('STOCKAGE_BACKEND', 'sqlite')
+    if backend == 'memoire':
+        return StockageMemoire()
+    if backend != 'sqlite':
+        raise ValueError(f"Backend de stockage inconnu : {backend}")
+    return StockageSQLite(os.path.join(dossier, 'inventaire.sqlite3'))
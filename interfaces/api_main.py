@@ -1,8 +1,32 @@
 import os
 import json
+import gzip
+import heapq
 import logging
+import math
 import sys
-from flask import Flask, render_template, request, jsonify
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
+from werkzeug.local import LocalProxy
+
+# Ajout du répertoire parent au path pour les imports du domaine (comme le CLI)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.identifiants import configurer as configurer_identifiants, allouer_id, allouer_ids
+from core.stockage import creer_stockage, CHAMPS_MODIFIABLES
+from core.partitions import StockagePartitionne, UTILISATEUR_VALIDE
+from core.index_priorite import IndexSynchronise, duree_restante_dict
+from core.recurrence import IndexCalendrier, lire_date, format_iso
+from core.recherche import index_recherche_api, replier
+from core.conflits import detecter_conflits, conflits_nouvel_evenement, fenetre_evenement
+from core.planificateur import planifier_dicts, JOURNEE_DEFAUT, BUDGET_DEFAUT_S
+from core.score_lot import colonnes_depuis_dicts, calculer_scores, classer
+from core.flux_json import iterer_tableau, par_blocs, lignes_ndjson
+from interfaces.metriques import Metriques, instrumenter
+from interfaces.format_compact import installer_compression
+from interfaces.cache_reponses import CacheReponses, empreinte, empreinte_corps, taux_succes
 
 # --- 1. CONFIGURATION DU LOGGER (CORRECTION DE L'ERREUR) ---
 # Ceci configure le logger pour utiliser le format standard et éviter le "KeyError: 'message.s'".
@@ -18,18 +42,160 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__, template_folder='../templates', static_folder='../static')
 
 # Définition du chemin des données (optionnel, mais propre)
-DATA_PATH = os.path.join(os.path.dirname(__file__), 'data')
+# (ASSISTANT_DATA_PATH permet de pointer ailleurs, ex. un dossier temporaire pour les benchmarks)
+DATA_PATH = os.environ.get('ASSISTANT_DATA_PATH', os.path.join(os.path.dirname(__file__), 'data'))
 os.makedirs(DATA_PATH, exist_ok=True)
 
+# Identifiants uniques entre workers gunicorn : les slots de worker sont sous DATA_PATH
+configurer_identifiants(os.path.join(DATA_PATH, 'ids'))
+
+# Mode multi-utilisateur (ASSISTANT_PARTITIONS=N) : chaque utilisateur (en-tête X-Utilisateur)
+# a son inventaire dans l'une des N partitions SQLite de DATA_PATH/partitions, et ses propres
+# index ; les ASSISTANT_LOCATAIRES_MAX utilisateurs les plus récents gardent les leurs en mémoire.
+# L'API n'authentifie pas cet en-tête : elle doit être derrière un proxy qui authentifie
+# l'utilisateur, remplace tout X-Utilisateur envoyé par le client et pose le sien. Exposée
+# directement, n'importe quel client lirait l'inventaire d'un autre en changeant l'en-tête.
+PARTITIONS = int(os.environ.get('ASSISTANT_PARTITIONS', 0))
+LOCATAIRES_MAX = int(os.environ.get('ASSISTANT_LOCATAIRES_MAX', 256))
+EN_TETE_UTILISATEUR = 'X-Utilisateur'
+
+class Locataire:
+    """Stockage et index d'un utilisateur (mêmes rôles que les globales du mode mono-utilisateur)."""
+
+    def __init__(self, stockage):
+        self.stockage = stockage
+        self.priorites = IndexSynchronise(stockage)
+        self.calendrier = IndexSynchronise(stockage, fabrique=IndexCalendrier,
+                                           charger=lambda s: s.evenements_planifies())
+        self.recherche = IndexSynchronise(stockage, fabrique=index_recherche_api,
+                                          charger=lambda s: parcourir_stockage(source=s))
+
+_locataires = OrderedDict()
+_verrou_locataires = threading.Lock()
+
+def locataire_courant():
+    """Locataire de la requête en cours (créé au premier accès, LRU par worker)."""
+    utilisateur = g.utilisateur
+    with _verrou_locataires:
+        locataire = _locataires.get(utilisateur)
+        if locataire is not None:
+            _locataires.move_to_end(utilisateur)
+            return locataire
+    locataire = Locataire(partitions.stockage(utilisateur))
+    with _verrou_locataires:
+        locataire = _locataires.setdefault(utilisateur, locataire)
+        while len(_locataires) > LOCATAIRES_MAX:
+            _locataires.popitem(last=False)
+    return locataire
+
+if PARTITIONS:
+    partitions = StockagePartitionne(os.path.join(DATA_PATH, 'partitions'), PARTITIONS)
+    # Les routes utilisent ces noms comme en mode mono-utilisateur : ils désignent ceux du locataire courant
+    stockage = LocalProxy(lambda: locataire_courant().stockage)
+    index_priorites = LocalProxy(lambda: locataire_courant().priorites)
+    index_calendrier = LocalProxy(lambda: locataire_courant().calendrier)
+else:
+    partitions = None
+    # Inventaire persistant côté serveur (SQLite en mode WAL par défaut)
+    stockage = creer_stockage(DATA_PATH)
+    # Index de priorité des tâches actives, resynchronisé via le journal de modifications du stockage
+    index_priorites = IndexSynchronise(stockage)
+    # Index d'intervalles des événements datés, pour les requêtes de calendrier par fenêtre
+    index_calendrier = IndexSynchronise(stockage, fabrique=IndexCalendrier,
+                                        charger=lambda s: s.evenements_planifies())
+
+# Routes de compatibilité (inventaire envoyé dans la requête, appelées par l'interface web) :
+# elles n'accèdent pas au stockage serveur et n'exigent donc pas d'utilisateur
+ROUTES_STATELESS = {'get_priorites', 'ajouter_tache', 'terminer_tache', 'calendrier_stateless',
+                    'rapport_conflits_stateless', 'planning_stateless'}
+
+@app.before_request
+def resoudre_utilisateur():
+    """En mode partitionné, toute route /api/ du stockage serveur exige un utilisateur valide."""
+    if partitions is None or not request.path.startswith('/api/'):
+        return None
+    if request.endpoint in ROUTES_STATELESS or (
+            request.endpoint == 'traiter_lot' and 'inventaire' in (request.get_json(silent=True) or {})):
+        return None
+    utilisateur = request.headers.get(EN_TETE_UTILISATEUR, '')
+    if not UTILISATEUR_VALIDE.match(utilisateur):
+        return jsonify({"error": f"En-tête {EN_TETE_UTILISATEUR} manquant ou invalide"}), 400
+    g.utilisateur = utilisateur
+    return None
+
+# Métriques par route (latence, tailles, phases), agrégées entre workers pour /metrics.
+# Les requêtes plus longues que ASSISTANT_SEUIL_LENT_MS sont journalisées avec leur détail.
+metriques = Metriques(os.environ.get('ASSISTANT_METRIQUES_DIR', os.path.join(DATA_PATH, 'metriques')))
+instrumenter(app, metriques, float(os.environ.get('ASSISTANT_SEUIL_LENT_MS', 500)), logger)
+# gzip au-delà d'un seuil et format en colonnes négocié (voir interfaces/format_compact.py)
+installer_compression(app)
+
+# Réponses des routes de lecture (priorités, calendrier, liste) gardées par ETag : une
+# requête dont le contenu n'a pas changé depuis l'appel précédent n'est pas recalculée.
+cache_reponses = CacheReponses(metriques)
+
+def empreinte_stockage():
+    """Empreinte des routes serveur : change à chaque modification de l'inventaire."""
+    return empreinte(request.headers.get(EN_TETE_UTILISATEUR, ''), stockage.dernier_seq())
+
+# Taille maximale d'une fenêtre de calendrier (en jours)
+FENETRE_MAX_JOURS = 366
+
+# Nombre maximal d'opérations dans un appel à /api/v1/taches/batch
+TAILLE_LOT_MAX = 5000
+
+# Import en flux : événements validés et écrits par blocs (une transaction par bloc)
+TAILLE_BLOC_IMPORT = 500
+ERREURS_IMPORT_MAX = 100
+
+# Réponses NDJSON (?format=ndjson ou Accept: application/x-ndjson) : pages lues dans le stockage
+TYPE_NDJSON = 'application/x-ndjson'
+TAILLE_PAGE_FLUX = 500
+
 # --- 3. LOGIQUE MÉTIER DE BASE ---
 
-def get_new_db_id(inventaire):
-    """Calcule le prochain ID unique."""
-    if not inventaire:
-        return 1
-    # On assure de prendre le max des IDs qui sont des entiers (les récurrents sont ignorés)
-    current_ids = [item.get('db_id') for item in inventaire if isinstance(item.get('db_id'), int)]
-    return max(current_ids) + 1 if current_ids else 1
+def construire_evenement(data, db_id):
+    """Construit le dict d'un nouvel événement à partir des champs envoyés par le client."""
+    return {
+        "db_id": db_id,
+        "nom": data.get('nom'),
+        "type_event": data.get('type_event', 'Tache'),
+        "importance": int(data.get('importance', 3)),
+        "urgence": int(data.get('urgence', 3)),
+        "duree_totale_minutes": int(data.get('duree')),
+        "projet": data.get('projet', 'Divers'),
+        "date_creation": os.environ.get('CURRENT_TIME', '2025-01-01T00:00:00Z'), # Placeholder, utiliser la date réelle côté client
+        "est_complete": False,
+        
+        # Champs pour la planification
+        "date_debut": data.get('date_debut'), # ISO string
+        "date_fin": data.get('date_fin'),     # ISO string
+        "recurrence": data.get('recurrence', 'none') # 'none', 'daily', 'weekly', 'monthly'
+    }
+
+def cle_priorite(t):
+    return (t.get('importance', 0) + t.get('urgence', 0), t.get('db_id'))
+
+def trier_par_priorite(taches_actives, limite=None):
+    """Trie par (importance + urgence) décroissant, puis par db_id décroissant."""
+    if limite is not None:
+        # Top-k en O(n log k) (même ordre que le tri complet)
+        return heapq.nlargest(limite, taches_actives, key=cle_priorite)
+    taches_actives.sort(key=cle_priorite, reverse=True)
+    return taches_actives
+
+def champs_modification(data):
+    """Extrait d'une requête les champs qu'une mise à jour partielle peut modifier."""
+    champs = {k: v for k, v in data.items() if k in CHAMPS_MODIFIABLES}
+    if 'duree' in data:
+        champs['duree_totale_minutes'] = int(data['duree'])
+    return champs
+
+def trier_par_score(taches_actives, limite=None):
+    """Trie par score de priorité (calcul vectorisé par lot), puis par db_id décroissant."""
+    colonnes = colonnes_depuis_dicts(taches_actives)
+    scores = calculer_scores(colonnes)
+    return [dict(taches_actives[i], score=float(scores[i])) for i in classer(colonnes, scores, limite)]
 
 def calculate_priority(importance, urgence):
     """Calcule une priorité simple (ex: 1=faible, 2=moyen, 3=élevé) basée sur une matrice de 1 à 5."""
@@ -39,6 +205,53 @@ def calculate_priority(importance, urgence):
         return 'medium'
     return 'low'
 
+def normaliser_import(donnees):
+    """Valide un événement d'un fichier exporté et complète les champs par défaut ; lève ValueError."""
+    if not isinstance(donnees, dict):
+        raise ValueError("Objet JSON attendu")
+    if not isinstance(donnees.get('nom'), str) or not donnees['nom']:
+        raise ValueError("Le champ 'nom' est requis")
+    evenement = dict(donnees)
+    for champ in ('urgence', 'importance', 'duree_totale_minutes', 'progression_pourcentage'):
+        if evenement.get(champ) is not None:
+            evenement[champ] = int(evenement[champ])
+    for champ in ('date_debut', 'date_fin'):
+        if evenement.get(champ) and lire_date(evenement[champ]) is None:
+            raise ValueError(f"Date illisible dans '{champ}'")
+    if not isinstance(evenement.get('est_complete', False), bool):
+        raise ValueError("Le champ 'est_complete' doit être un booléen")
+    if not isinstance(evenement.get('db_id'), int):
+        evenement['db_id'] = None  # identifiant absent ou d'une occurrence ("123_456") : réattribué
+    for champ, defaut in (('type_event', 'Tache'), ('urgence', 3), ('importance', 3), ('duree_totale_minutes', 60),
+                          ('projet', 'Divers'), ('est_complete', False), ('recurrence', 'none')):
+        evenement.setdefault(champ, defaut)
+    return evenement
+
+def demande_ndjson():
+    return request.args.get('format') == 'ndjson' or TYPE_NDJSON in request.headers.get('Accept', '')
+
+def reponse_ndjson(elements):
+    """Réponse en flux, une ligne JSON par élément : la liste complète n'est jamais sérialisée d'un bloc."""
+    # Le générateur est parcouru après le retour de la vue : il garde le contexte de la requête
+    # (utilisateur courant du mode partitionné, stockage résolu à la première page)
+    return Response(stream_with_context(lignes_ndjson(elements)), mimetype=TYPE_NDJSON)
+
+def parcourir_stockage(apres=None, source=None, **filtres):
+    """Générateur sur tout l'inventaire serveur, lu par pages de TAILLE_PAGE_FLUX."""
+    source = source or stockage
+    while True:
+        page = source.lister(apres=apres, limite=TAILLE_PAGE_FLUX, **filtres)
+        yield from page
+        if len(page) < TAILLE_PAGE_FLUX:
+            return
+        apres = page[-1]['db_id']
+
+def reponse_conflits(conflits):
+    """409 listant les occurrences existantes qu'un nouveau rendez-vous chevaucherait."""
+    existant = conflits[0]['evenements'][0]
+    return jsonify({"error": f"Chevauchement avec « {existant['nom']} » ({len(conflits)} conflit(s))",
+                    "conflits": conflits}), 409
+
 # --- 4. ROUTES FLASK ---
 
 @app.route('/')
@@ -49,6 +262,7 @@ def home():
     return render_template('index.html')
 
 @app.route('/api/v1/taches/priorite', methods=['POST'])
+@cache_reponses.mis_en_cache(empreinte_corps)
 def get_priorites():
     """Endpoint pour calculer et retourner la liste des tâches par priorité."""
     data = request.get_json()
@@ -62,10 +276,11 @@ def get_priorites():
     
     # Appliquer un calcul de score ou utiliser les champs importance/urgence directement
     # Nous allons ici trier par (importance + urgence) décroissant
-    taches_actives.sort(
-        key=lambda t: (t.get('importance', 0) + t.get('urgence', 0), t.get('db_id')), 
-        reverse=True
-    )
+    limite = request.args.get('limite', type=int)
+    if request.args.get('tri') == 'score':
+        taches_actives = trier_par_score(taches_actives, limite)
+    else:
+        taches_actives = trier_par_priorite(taches_actives, limite)
     
     # Renvoyer l'inventaire filtré et trié
     return jsonify(taches_actives)
@@ -81,24 +296,16 @@ def ajouter_tache():
         if not data.get('nom') or not data.get('duree'):
             return jsonify({"error": "Nom et durée sont requis"}), 400
 
-        nouvel_id = get_new_db_id(inventaire)
+        nouvel_id = allouer_id()
         
-        nouvel_evenement = {
-            "db_id": nouvel_id,
-            "nom": data.get('nom'),
-            "type_event": data.get('type_event', 'Tache'),
-            "importance": int(data.get('importance', 3)),
-            "urgence": int(data.get('urgence', 3)),
-            "duree_totale_minutes": int(data.get('duree')),
-            "projet": data.get('projet', 'Divers'),
-            "date_creation": os.environ.get('CURRENT_TIME', '2025-01-01T00:00:00Z'), # Placeholder, utiliser la date réelle côté client
-            "est_complete": False,
-            
-            # Champs pour la planification
-            "date_debut": data.get('date_debut'), # ISO string
-            "date_fin": data.get('date_fin'),     # ISO string
-            "recurrence": data.get('recurrence', 'none') # 'none', 'daily', 'weekly', 'monthly'
-        }
+        nouvel_evenement = construire_evenement(data, nouvel_id)
+
+        # Un rendez-vous qui en chevauche un autre est signalé avant d'être ajouté
+        # (le client renvoie la requête avec "forcer": true pour l'ajouter quand même)
+        if not data.get('forcer'):
+            conflits = conflits_nouvel_evenement(nouvel_evenement, inventaire)
+            if conflits:
+                return reponse_conflits(conflits)
         
         inventaire.append(nouvel_evenement)
         logger.info(f"Ajout de l'événement #{nouvel_id}: {nouvel_evenement['nom']}")
@@ -137,6 +344,472 @@ def terminer_tache():
         logger.error(f"Erreur lors de la complétion de la tâche: {e}")
         return jsonify({"error": f"Erreur interne: {e}"}), 500
 
+# --- 5. ROUTES AVEC STOCKAGE SERVEUR (adressées par ID) ---
+# Les routes ci-dessus restent le mode de compatibilité "stateless" (inventaire complet
+# dans chaque requête). Celles-ci n'échangent que l'élément modifié.
+
+@app.route('/api/v1/taches', methods=['GET'])
+@cache_reponses.mis_en_cache(empreinte_stockage)
+def lister_taches():
+    """
+    Liste paginée de l'inventaire serveur (curseur 'apres' = dernier db_id reçu).
+    En NDJSON, tout l'inventaire est envoyé en flux.
+    """
+    try:
+        apres = request.args.get('apres', type=int)
+        limite = min(request.args.get('limite', 50, type=int), 500)
+        est_complete = request.args.get('est_complete')
+        if est_complete is not None:
+            est_complete = est_complete.lower() in ('1', 'true', 'oui')
+
+        if demande_ndjson():
+            # Tout l'inventaire (à partir de 'apres'), sans limite ni curseur
+            return reponse_ndjson(parcourir_stockage(apres, type_event=request.args.get('type_event'),
+                                                     est_complete=est_complete))
+
+        elements = stockage.lister(apres=apres, limite=limite,
+                                   type_event=request.args.get('type_event'),
+                                   est_complete=est_complete)
+        suivant = elements[-1]['db_id'] if len(elements) == limite else None
+        return jsonify({"elements": elements, "suivant": suivant})
+    
+    except Exception as e:
+        logger.error(f"Erreur lors de la lecture de l'inventaire: {e}")
+        return jsonify({"error": f"Erreur interne: {e}"}), 500
+
+@app.route('/api/v1/taches', methods=['POST'])
+def creer_tache():
+    """Ajoute un événement à l'inventaire serveur et ne renvoie que cet événement."""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "Objet JSON attendu dans le corps de la requête"}), 400
+        if not data.get('nom') or not data.get('duree'):
+            return jsonify({"error": "Nom et durée sont requis"}), 400
+
+        nouvel_evenement = construire_evenement(data, allouer_id())
+        fenetre = fenetre_evenement(nouvel_evenement)
+        if not data.get('forcer') and fenetre is not None:
+            # Seuls les événements de la fenêtre du rendez-vous sont examinés (index d'intervalles)
+            conflits = conflits_nouvel_evenement(nouvel_evenement, index_calendrier.lire(
+                lambda index: list(index.evenements(*fenetre))))
+            if conflits:
+                return reponse_conflits(conflits)
+
+        nouvel_evenement = stockage.ajouter(nouvel_evenement)
+        logger.info(f"Ajout de l'événement #{nouvel_evenement['db_id']}: {nouvel_evenement['nom']}")
+        return jsonify(nouvel_evenement), 201
+    
+    except Exception as e:
+        logger.error(f"Erreur lors de l'ajout de la tâche: {e}")
+        return jsonify({"error": f"Erreur interne: {e}"}), 500
+
+@app.route('/api/v1/taches/priorite', methods=['GET'])
+@cache_reponses.mis_en_cache(empreinte_stockage)
+def get_priorites_serveur():
+    """
+    Tâches actives de l'inventaire serveur, triées comme get_priorites.
+    ?limite=k renvoie le top k ; ?creneau=N les meilleures tâches qui tiennent en N minutes ;
+    ?tri=score classe par score de priorité (calcul par lot) au lieu de importance + urgence.
+    """
+    limite = request.args.get('limite', type=int)
+    creneau = request.args.get('creneau', type=int)
+    if request.args.get('tri') == 'score':
+        taches = index_priorites.lire(lambda index: [tache for tache, _ in index.meilleures()])
+        if creneau is not None:
+            taches = [t for t in taches if 0 < duree_restante_dict(t) <= creneau]
+        taches = trier_par_score(taches, limite)
+        return reponse_ndjson(taches) if demande_ndjson() else jsonify(taches)
+    if creneau is not None:
+        entrees = index_priorites.lire(lambda index: list(index.meilleures_pour_creneau(creneau, k=limite or 3)))
+    else:
+        entrees = index_priorites.lire(lambda index: list(index.meilleures(limite)))
+    if demande_ndjson():
+        return reponse_ndjson(tache for tache, _ in entrees)
+    return jsonify([tache for tache, _ in entrees])
+
+@app.route('/api/v1/taches/<int:db_id>', methods=['GET'])
+def obtenir_tache(db_id):
+    evenement = stockage.obtenir(db_id)
+    if evenement is None:
+        return jsonify({"error": f"Tâche avec l'ID {db_id} non trouvée."}), 404
+    return jsonify(evenement)
+
+@app.route('/api/v1/taches/<int:db_id>', methods=['PATCH'])
+def modifier_tache(db_id):
+    """Mise à jour partielle : seuls les champs envoyés sont modifiés."""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "Objet JSON attendu dans le corps de la requête"}), 400
+        try:
+            champs = champs_modification(data)
+        except (TypeError, ValueError):
+            return jsonify({"error": "La durée doit être un nombre entier de minutes"}), 400
+
+        evenement = stockage.mettre_a_jour(db_id, champs)
+        if evenement is None:
+            return jsonify({"error": f"Tâche avec l'ID {db_id} non trouvée."}), 404
+        logger.info(f"Tâche #{db_id} modifiée ({', '.join(champs)}).")
+        return jsonify(evenement)
+    
+    except Exception as e:
+        logger.error(f"Erreur lors de la modification de la tâche: {e}")
+        return jsonify({"error": f"Erreur interne: {e}"}), 500
+
+@app.route('/api/v1/taches/<int:db_id>', methods=['DELETE'])
+def supprimer_tache(db_id):
+    if not stockage.supprimer(db_id):
+        return jsonify({"error": f"Tâche avec l'ID {db_id} non trouvée."}), 404
+    logger.info(f"Tâche #{db_id} supprimée.")
+    return jsonify({"db_id": db_id, "supprime": True})
+
+@app.route('/api/v1/taches/<int:db_id>/terminer', methods=['POST'])
+def terminer_tache_serveur(db_id):
+    evenement = stockage.terminer(db_id, os.environ.get('CURRENT_TIME', '2025-01-01T00:00:00Z')) # Placeholder
+    if evenement is None:
+        return jsonify({"error": f"Tâche avec l'ID {db_id} non trouvée."}), 404
+    logger.info(f"Tâche #{db_id} marquée comme terminée.")
+    return jsonify(evenement)
+
+@app.route('/api/v1/taches/import', methods=['POST'])
+def importer_taches():
+    """
+    Importe un fichier exporté (tableau JSON, ex. assistant_inventaire_*.json) dans l'inventaire
+    serveur. Le corps (éventuellement en gzip) est lu en flux, validé et écrit par blocs de
+    TAILLE_BLOC_IMPORT dans une transaction chacun : la mémoire ne dépend pas de la taille du
+    fichier. Un fichier invalide au milieu garde les blocs déjà écrits (comptés dans 'importes').
+    En mode partitionné, les db_id du fichier sont ignorés et réattribués : les identifiants
+    sont globaux (un fichier de partition est partagé entre utilisateurs, qui peuvent changer
+    de partition), un db_id choisi par le client pourrait déjà appartenir à un autre.
+    """
+    bilan = {"importes": 0, "nb_erreurs": 0, "erreurs": []}
+
+    def noter_erreur(index, message):
+        bilan["nb_erreurs"] += 1
+        if len(bilan["erreurs"]) < ERREURS_IMPORT_MAX:
+            bilan["erreurs"].append({"index": index, "error": message})
+
+    try:
+        flux = request.stream
+        if request.headers.get('Content-Encoding') == 'gzip':
+            flux = gzip.GzipFile(fileobj=flux)
+        for bloc in par_blocs(enumerate(iterer_tableau(flux)), TAILLE_BLOC_IMPORT):
+            valides = []
+            for index, donnees in bloc:
+                try:
+                    valides.append((index, normaliser_import(donnees)))
+                except (TypeError, ValueError) as e:
+                    noter_erreur(index, str(e))
+            if partitions is not None:
+                for _, evenement in valides:
+                    evenement['db_id'] = None
+            nouveaux_ids = iter(allouer_ids(sum(1 for _, e in valides if e['db_id'] is None)))
+            for _, evenement in valides:
+                if evenement['db_id'] is None:
+                    evenement['db_id'] = next(nouveaux_ids)
+            resultats, _ = stockage.appliquer_lot([('ajouter', None, e) for _, e in valides])
+            for (index, evenement), resultat in zip(valides, resultats):
+                if resultat is None:
+                    noter_erreur(index, f"L'ID {evenement['db_id']} est déjà utilisé dans l'inventaire.")
+                else:
+                    bilan["importes"] += 1
+
+    except (ValueError, OSError, EOFError) as e:
+        logger.error(f"Import interrompu après {bilan['importes']} événements: {e}")
+        return jsonify(dict(bilan, error=f"Fichier invalide : {e}")), 400
+    except Exception as e:
+        logger.error(f"Erreur lors de l'import: {e}")
+        return jsonify(dict(bilan, error=f"Erreur interne: {e}")), 500
+
+    logger.info(f"Import de {bilan['importes']} événements ({bilan['nb_erreurs']} en erreur).")
+    return jsonify(bilan)
+
+# --- 6. OPÉRATIONS PAR LOT ---
+
+def preparer_operation(operation, nouveaux_ids):
+    """Traduit une opération du client en (nature, db_id, donnees) ; lève ValueError si invalide."""
+    if not isinstance(operation, dict):
+        raise ValueError("Opération invalide")
+    nature = operation.get('op')
+    if nature == 'add':
+        if not operation.get('nom') or not operation.get('duree'):
+            raise ValueError("Nom et durée sont requis")
+        return 'ajouter', None, construire_evenement(operation, next(nouveaux_ids))
+    if nature not in ('complete', 'update', 'delete'):
+        raise ValueError(f"Opération inconnue : {nature}")
+    db_id = operation.get('db_id')
+    if db_id is None:
+        raise ValueError("db_id requis")
+    if nature == 'complete':
+        return 'modifier', db_id, {'est_complete': True, 'date_complete': os.environ.get('CURRENT_TIME', '2025-01-01T00:00:00Z')} # Placeholder
+    if nature == 'update':
+        return 'modifier', db_id, champs_modification(operation)
+    return 'supprimer', db_id, None
+
+def appliquer_lot_stateless(inventaire, operations, atomique):
+    """Applique le lot sur l'inventaire reçu, avec un index db_id -> position construit une seule fois."""
+    positions = {item.get('db_id'): i for i, item in enumerate(inventaire)}
+    resultats = []
+    for nature, db_id, donnees in operations:
+        if nature == 'ajouter':
+            positions[donnees['db_id']] = len(inventaire)
+            inventaire.append(donnees)
+            resultat = donnees
+        elif positions.get(db_id) is None:
+            resultat = None
+        elif nature == 'modifier':
+            resultat = inventaire[positions[db_id]]
+            resultat.update(donnees)
+        else:
+            inventaire[positions.pop(db_id)] = None  # retiré en une passe à la fin
+            resultat = True
+        resultats.append(resultat)
+        if resultat is None and atomique:
+            return resultats, False
+    return resultats, True
+
+@app.route('/api/v1/taches/batch', methods=['POST'])
+def traiter_lot():
+    """
+    Applique une liste d'opérations add / complete / update / delete en un seul appel.
+    Avec 'inventaire' dans la requête : mode stateless (l'inventaire modifié est renvoyé) ;
+    sinon l'inventaire serveur est modifié dans une seule transaction. Avec "atomique": true,
+    le premier échec annule tout le lot (réponse 409).
+    """
+    try:
+        data = request.get_json()
+        operations = data.get('operations')
+        atomique = data.get('atomique') is True
+        if not isinstance(operations, list) or len(operations) > TAILLE_LOT_MAX:
+            return jsonify({"error": f"'operations' doit être une liste d'au plus {TAILLE_LOT_MAX} éléments"}), 400
+
+        nb_ajouts = sum(1 for op in operations if isinstance(op, dict) and op.get('op') == 'add')
+        nouveaux_ids = iter(allouer_ids(nb_ajouts))
+        preparees, erreurs = [], {}
+        for i, operation in enumerate(operations):
+            try:
+                preparees.append((i, preparer_operation(operation, nouveaux_ids)))
+            except (ValueError, TypeError) as e:
+                erreurs[i] = str(e)
+        if erreurs and atomique:
+            return jsonify({"annule": True, "resultats": [
+                {"index": i, "ok": False, "error": erreurs.get(i, "Lot annulé")} for i in range(len(operations))
+            ]}), 400
+
+        stateless = 'inventaire' in data
+        if stateless:
+            inventaire = data.get('inventaire') or []
+            resultats, valide = appliquer_lot_stateless(inventaire, [op for _, op in preparees], atomique)
+        else:
+            resultats, valide = stockage.appliquer_lot([op for _, op in preparees], atomique)
+
+        reponses = [{"index": i, "ok": False, "error": erreur} for i, erreur in erreurs.items()]
+        for (i, (nature, db_id, donnees)), resultat in zip(preparees, resultats):
+            if resultat is None:
+                reponses.append({"index": i, "ok": False, "error": f"Tâche avec l'ID {db_id} non trouvée."})
+            elif nature == 'supprimer':
+                reponses.append({"index": i, "ok": True, "db_id": db_id})
+            else:
+                reponses.append({"index": i, "ok": True, "db_id": resultat['db_id'], "element": resultat})
+        reponses.sort(key=lambda r: r['index'])
+
+        if not valide:
+            echec = reponses[-1]
+            reponses = [{"index": i, "ok": False, "error": "Lot annulé"} for i in range(len(operations))]
+            reponses[echec['index']] = echec
+            return jsonify({"annule": True, "resultats": reponses}), 409
+
+        logger.info(f"Lot de {len(operations)} opérations appliqué ({len(erreurs)} en erreur).")
+        if stateless:
+            return jsonify({"resultats": reponses, "inventaire": [e for e in inventaire if e is not None]})
+        return jsonify({"resultats": reponses})
+    
+    except Exception as e:
+        logger.error(f"Erreur lors du traitement du lot: {e}")
+        return jsonify({"error": f"Erreur interne: {e}"}), 500
+
+# --- 7. CALENDRIER (occurrences des événements récurrents dans une fenêtre) ---
+
+def lire_fenetre(source):
+    """Lit la fenêtre [debut, fin[ demandée ; renvoie (debut, fin) ou un message d'erreur."""
+    debut, fin = lire_date(source.get('debut')), lire_date(source.get('fin'))
+    if debut is None or fin is None or fin <= debut:
+        return None, "Paramètres 'debut' et 'fin' (dates ISO, debut < fin) requis"
+    if (fin - debut).days > FENETRE_MAX_JOURS:
+        return None, f"Fenêtre limitée à {FENETRE_MAX_JOURS} jours"
+    return (debut, fin), None
+
+@app.route('/api/v1/calendrier', methods=['GET'])
+@cache_reponses.mis_en_cache(empreinte_stockage)
+def calendrier():
+    """Occurrences (récurrences développées) de l'inventaire serveur dans la fenêtre demandée."""
+    fenetre, erreur = lire_fenetre(request.args)
+    if erreur:
+        return jsonify({"error": erreur}), 400
+    occurrences = index_calendrier.lire(lambda index: list(index.occurrences_triees(*fenetre)))
+    return reponse_ndjson(occurrences) if demande_ndjson() else jsonify(occurrences)
+
+@app.route('/api/v1/calendrier', methods=['POST'])
+@cache_reponses.mis_en_cache(empreinte_corps)
+def calendrier_stateless():
+    """Mode de compatibilité : même résultat, à partir de l'inventaire envoyé dans la requête."""
+    try:
+        data = request.get_json()
+        fenetre, erreur = lire_fenetre(data)
+        if erreur:
+            return jsonify({"error": erreur}), 400
+        index = IndexCalendrier(data.get('inventaire', []))
+        return jsonify(index.occurrences_triees(*fenetre))
+    
+    except Exception as e:
+        logger.error(f"Erreur lors du calcul du calendrier: {e}")
+        return jsonify({"error": f"Erreur interne: {e}"}), 500
+
+@app.route('/api/v1/conflits', methods=['GET'])
+@cache_reponses.mis_en_cache(empreinte_stockage)
+def rapport_conflits():
+    """Rendez-vous de l'inventaire serveur qui se chevauchent dans la fenêtre (récurrences comprises)."""
+    fenetre, erreur = lire_fenetre(request.args)
+    if erreur:
+        return jsonify({"error": erreur}), 400
+    evenements = index_calendrier.lire(lambda index: list(index.evenements(*fenetre)))
+    return jsonify(detecter_conflits(evenements, *fenetre))
+
+@app.route('/api/v1/conflits', methods=['POST'])
+@cache_reponses.mis_en_cache(empreinte_corps)
+def rapport_conflits_stateless():
+    """Mode de compatibilité : même rapport, à partir de l'inventaire envoyé dans la requête."""
+    try:
+        data = request.get_json()
+        fenetre, erreur = lire_fenetre(data)
+        if erreur:
+            return jsonify({"error": erreur}), 400
+        return jsonify(detecter_conflits(data.get('inventaire', []), *fenetre))
+    
+    except Exception as e:
+        logger.error(f"Erreur lors de la détection des conflits: {e}")
+        return jsonify({"error": f"Erreur interne: {e}"}), 500
+
+# --- 8. PLANIFICATION (tâches placées dans les créneaux libres entre les rendez-vous) ---
+
+# Budget de calcul maximal accepté pour un plan (ms)
+BUDGET_PLAN_MAX_MS = 2000
+
+def parametres_plan(source):
+    """(fenêtre, heures de travail, budget en s) d'une demande de plan ; aujourd'hui par défaut."""
+    if source.get('debut') is None and source.get('fin') is None:
+        debut = datetime.combine(date.today(), datetime.min.time())
+        fenetre, erreur = (debut, debut + timedelta(days=1)), None
+    else:
+        fenetre, erreur = lire_fenetre(source)
+    journee = (int(source.get('heure_debut', JOURNEE_DEFAUT[0])), int(source.get('heure_fin', JOURNEE_DEFAUT[1])))
+    if not 0 <= journee[0] < journee[1] <= 24:
+        erreur = erreur or "Heures de travail invalides (0 <= heure_debut < heure_fin <= 24)"
+    budget_ms = float(source.get('budget_ms', BUDGET_DEFAUT_S * 1000))
+    if not math.isfinite(budget_ms):
+        # NaN désactiverait toutes les comparaisons à l'échéance du planificateur
+        erreur, budget_ms = erreur or "budget_ms doit être un nombre fini", 0
+    budget = min(max(budget_ms, 0), BUDGET_PLAN_MAX_MS) / 1000
+    return fenetre, journee, budget, erreur
+
+def reponse_plan(creneaux, plan):
+    return jsonify({
+        "creneaux": [{"debut": format_iso(d), "fin": format_iso(f)} for d, f in creneaux],
+        "plan": [{"debut": format_iso(p['debut']), "fin": format_iso(p['fin']),
+                  "score": p['score'], "tache": p['tache']} for p in plan],
+        "score_total": sum(p['score'] for p in plan),
+        "minutes_planifiees": sum(duree_restante_dict(p['tache']) for p in plan),
+    })
+
+@app.route('/api/v1/planning', methods=['GET'])
+def planning():
+    """
+    Plan de l'inventaire serveur : tâches actives réparties dans les créneaux libres.
+    Paramètres : debut / fin (ISO, aujourd'hui par défaut), heure_debut / heure_fin (UTC), budget_ms.
+    """
+    try:
+        fenetre, journee, budget, erreur = parametres_plan(request.args)
+        if erreur:
+            return jsonify({"error": erreur}), 400
+        # Rendez-vous de la fenêtre (index d'intervalles) et tâches actives (index de priorité)
+        inventaire = [*index_calendrier.lire(lambda index: list(index.evenements(*fenetre))),
+                      *index_priorites.lire(lambda index: [tache for tache, _ in index.meilleures()])]
+        return reponse_plan(*planifier_dicts(inventaire, *fenetre, journee, budget))
+    
+    except ValueError as e:
+        return jsonify({"error": f"Paramètre invalide: {e}"}), 400
+
+@app.route('/api/v1/planning', methods=['POST'])
+def planning_stateless():
+    """Mode de compatibilité : même plan, à partir de l'inventaire envoyé dans la requête."""
+    try:
+        data = request.get_json()
+        fenetre, journee, budget, erreur = parametres_plan(data)
+        if erreur:
+            return jsonify({"error": erreur}), 400
+        return reponse_plan(*planifier_dicts(data.get('inventaire', []), *fenetre, journee, budget))
+    
+    except ValueError as e:
+        return jsonify({"error": f"Paramètre invalide: {e}"}), 400
+    except Exception as e:
+        logger.error(f"Erreur lors du calcul du planning: {e}")
+        return jsonify({"error": f"Erreur interne: {e}"}), 500
+
+# --- 9. RECHERCHE ---
+
+# Index inversé (nom, projet) de tout l'inventaire serveur, resynchronisé comme les autres index
+if partitions is None:
+    index_recherche = IndexSynchronise(stockage, fabrique=index_recherche_api,
+                                       charger=lambda s: parcourir_stockage(source=s))
+else:
+    index_recherche = LocalProxy(lambda: locataire_courant().recherche)
+
+@app.route('/api/v1/taches/recherche', methods=['GET'])
+@cache_reponses.mis_en_cache(empreinte_stockage)
+def rechercher_taches():
+    """
+    Recherche par mots (préfixes, sans accents) dans le nom et le projet.
+    Filtres : type_event, est_complete, projet ; pagination par 'limite' et 'decalage'.
+    """
+    requete = request.args.get('q', '').strip()
+    if not requete:
+        return jsonify({"error": "Paramètre 'q' requis"}), 400
+    limite = min(request.args.get('limite', 50, type=int), 500)
+    decalage = max(request.args.get('decalage', 0, type=int), 0)
+    type_event = request.args.get('type_event')
+    est_complete = request.args.get('est_complete')
+    if est_complete is not None:
+        est_complete = est_complete.lower() in ('1', 'true', 'oui')
+    projet = request.args.get('projet')
+    if projet is not None:
+        projet = replier(projet)
+
+    def filtre(tache):
+        return ((type_event is None or tache.get('type_event') == type_event)
+                and (est_complete is None or bool(tache.get('est_complete')) == est_complete)
+                and (projet is None or replier(tache.get('projet') or '') == projet))
+
+    filtres_actifs = type_event is not None or est_complete is not None or projet is not None
+    total, elements = index_recherche.lire(lambda index: index.rechercher(requete, limite, decalage,
+                                                                          filtre if filtres_actifs else None))
+    suivant = decalage + limite if decalage + limite < total else None
+    return jsonify({"total": total, "elements": elements, "suivant": suivant})
+
+# --- 10. MÉTRIQUES ---
+
+@app.route('/metrics')
+def exposer_metriques():
+    """Métriques de tous les workers au format texte Prometheus."""
+    def jauges(histogrammes, compteurs):
+        return {
+            'assistant_inventaire_serveur_elements': ((partitions or stockage).compter(),
+                                                      "Nombre d'événements de l'inventaire serveur"),
+            'assistant_cache_reponses_taux_succes': (taux_succes(compteurs),
+                                                     "Part des requêtes servies par 304 ou par le cache, par route"),
+        }
+    return Response(metriques.rendre(jauges), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 # Ce bloc est utilisé si vous lancez le script directement (non pas via gunicorn)
 if __name__ == '__main__':
     # Flask utilise par défaut le port 5000, mais Render utilise 10000.
@@ -0,0 +1,259 @@
+# interfaces/asgi_main.py
+# Point d'entrée ASGI de l'API, à côté du point d'entrée WSGI (interfaces.api_main:app) : mêmes
+# routes, mêmes contrats, puisque chaque requête est traitée par la même application Flask.
+#
+# La boucle d'événements ne fait que les E/S : elle lit le corps des requêtes en asynchrone
+# (un client lent qui envoie un gros 'inventaire' n'occupe qu'une coroutine, pas un worker),
+# puis confie le traitement (décodage JSON, tri, calcul des scores, SQLite) à un pool borné :
+#   - threads (par défaut, ASSISTANT_ASGI_TRAVAILLEURS threads) : partagent les index en
+#     mémoire et les connexions du worker ;
+#   - processus (ASSISTANT_ASGI_EXECUTEUR=processus) : le tri et le calcul des scores tournent
+#     en parallèle sur plusieurs cœurs ; chaque processus charge sa copie de l'application.
+# Au-delà de CORPS_MAX octets, la requête est refusée (413) sans être lue en entier.
+#   uvicorn interfaces.asgi_main:app --workers 2     (configuration : interfaces/serveur_conf.py)
+import asyncio
+import contextvars
+import io
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+EXECUTEUR = os.environ.get('ASSISTANT_ASGI_EXECUTEUR', 'threads')
+TRAVAILLEURS = int(os.environ.get('ASSISTANT_ASGI_TRAVAILLEURS',
+                                  min(32, (os.cpu_count() or 1) + 4) if EXECUTEUR == 'threads' else os.cpu_count() or 1))
+CORPS_MAX = int(os.environ.get('ASSISTANT_ASGI_CORPS_MAX', 64 * 1024 * 1024))
+# Taille minimale des envois au client : une réponse ordinaire part en un seul envoi
+TAILLE_ENVOI = 64 * 1024
+
+
+def _environ(scope, corps):
+    """Environnement WSGI (PEP 3333) d'une requête ASGI dont le corps a été lu."""
+    serveur = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': serveur[0],
+        'SERVER_PORT': str(serveur[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(corps)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(corps),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': EXECUTEUR == 'threads',
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for nom, valeur in scope['headers']:
+        nom = nom.decode('latin-1').upper().replace('-', '_')
+        valeur = valeur.decode('latin-1')
+        if nom == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = valeur
+        elif nom != 'CONTENT_LENGTH':
+            cle = f"HTTP_{nom}"
+            environ[cle] = f"{environ[cle]},{valeur}" if cle in environ else valeur
+    return environ
+
+
+def _demarrer(application, environ):
+    """
+    Appelle l'application WSGI et lit le début de sa réponse : (statut, en-têtes, premier
+    morceau, itérateur ou None si la réponse est complète, iterable, contexte).
+
+    Le reste de la réponse se lit par contexte.run(_lire, ...) et se ferme par
+    contexte.run(_fermer, ...) : les morceaux suivants passent sur d'autres threads du pool,
+    mais une réponse en flux (stream_with_context) doit retrouver les contextvars de Flask
+    qu'elle a posées, sans quoi elle échoue en refermant son contexte.
+    """
+    contexte = contextvars.copy_context()
+    return (*contexte.run(_appeler, application, environ), contexte)
+
+
+def _appeler(application, environ):
+    reponse = {}
+
+    def start_response(statut, en_tetes, exc_info=None):
+        if exc_info and reponse.get('envoye'):
+            raise exc_info[1].with_traceback(exc_info[2])
+        reponse['statut'], reponse['en_tetes'] = statut, en_tetes
+        return reponse.setdefault('ecrits', []).append
+
+    iterable = application(environ, start_response)
+    iterateur = iter(iterable)
+    morceau, fini = _lire(iterateur)
+    morceau = b''.join(reponse.pop('ecrits', [])) + morceau
+    reponse['envoye'] = True
+    if fini:
+        _fermer(iterable)
+        iterateur = iterable = None
+    return reponse['statut'], reponse['en_tetes'], morceau, iterateur, iterable
+
+
+def _lire(iterateur, taille=TAILLE_ENVOI):
+    """(morceaux réunis jusqu'à `taille` octets, True si la réponse est terminée)."""
+    morceaux, total = [], 0
+    for morceau in iterateur:
+        if morceau:
+            morceaux.append(morceau)
+            total += len(morceau)
+            if total >= taille:
+                return b''.join(morceaux), False
+    return b''.join(morceaux), True
+
+
+def _fermer(iterable):
+    if iterable is not None and hasattr(iterable, 'close'):
+        iterable.close()
+
+
+# --- Pool de processus ---
+# Chaque processus importe l'application une fois ; la réponse revient entière (les flux NDJSON
+# sont donc assemblés dans le processus avant d'être envoyés).
+
+_application = None
+
+
+def _initialiser_processus():
+    global _application
+    from interfaces.api_main import app as application
+    _application = application
+
+
+def _traiter_dans_processus(environ, corps):
+    environ['wsgi.input'] = io.BytesIO(corps)
+    environ['wsgi.errors'] = sys.stderr
+    statut, en_tetes, morceau, iterateur, iterable, contexte = _demarrer(_application, environ)
+    try:
+        if iterateur is not None:
+            morceau += contexte.run(b''.join, iterateur)
+    finally:
+        contexte.run(_fermer, iterable)
+    return statut, en_tetes, morceau
+
+
+class ApplicationASGI:
+    """Application ASGI 3 qui sert une application WSGI depuis un pool borné."""
+
+    def __init__(self, executeur=EXECUTEUR, travailleurs=TRAVAILLEURS, corps_max=CORPS_MAX):
+        if executeur not in ('threads', 'processus'):
+            raise ValueError(f"Exécuteur inconnu : {executeur!r} (threads ou processus)")
+        self.executeur = executeur
+        self.travailleurs = travailleurs
+        self.corps_max = corps_max
+        self._pool = None
+        self._wsgi = None
+
+    def demarrer(self):
+        if self._pool is not None:
+            return
+        if self.executeur == 'processus':
+            # spawn : pas de fork d'un processus qui fait déjà tourner une boucle et des threads
+            self._pool = ProcessPoolExecutor(self.travailleurs, mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=_initialiser_processus)
+        else:
+            from interfaces.api_main import app as application
+            self._wsgi = application
+            self._pool = ThreadPoolExecutor(self.travailleurs, thread_name_prefix='asgi')
+
+    def arreter(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._cycle_de_vie(receive, send)
+        elif scope['type'] == 'http':
+            self.demarrer()
+            await self._http(scope, receive, send)
+        else:
+            raise NotImplementedError(f"Type de connexion non pris en charge : {scope['type']}")
+
+    async def _cycle_de_vie(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    # Import de l'application ou lancement des processus hors de la boucle
+                    await asyncio.get_running_loop().run_in_executor(None, self.demarrer)
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await asyncio.get_running_loop().run_in_executor(None, self.arreter)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _lire_corps(self, scope, receive):
+        """Corps de la requête, ou None s'il dépasse corps_max (annoncé ou reçu)."""
+        for nom, valeur in scope['headers']:
+            if nom == b'content-length' and valeur.isdigit() and int(valeur) > self.corps_max:
+                return None
+        morceaux, total = [], 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                raise ConnectionResetError("Client déconnecté pendant l'envoi du corps")
+            morceau = message.get('body', b'')
+            total += len(morceau)
+            if total > self.corps_max:
+                return None
+            morceaux.append(morceau)
+            if not message.get('more_body', False):
+                return b''.join(morceaux)
+
+    async def _http(self, scope, receive, send):
+        try:
+            corps = await self._lire_corps(scope, receive)
+        except ConnectionResetError:
+            return
+        if corps is None:
+            await self._envoyer(send, '413 Request Entity Too Large',
+                                [('Content-Type', 'application/json'), ('Connection', 'close')],
+                                json.dumps({"error": f"Corps de requête limité à {self.corps_max} octets"},
+                                           ensure_ascii=False, separators=(',', ':')).encode() + b"\n")
+            return
+
+        boucle = asyncio.get_running_loop()
+        environ = _environ(scope, corps)
+        if self.executeur == 'processus':
+            del environ['wsgi.input'], environ['wsgi.errors']
+            statut, en_tetes, morceau = await boucle.run_in_executor(self._pool, _traiter_dans_processus,
+                                                                      environ, corps)
+            await self._envoyer(send, statut, en_tetes, morceau)
+            return
+
+        statut, en_tetes, morceau, iterateur, iterable, contexte = await boucle.run_in_executor(
+            self._pool, _demarrer, self._wsgi, environ)
+        try:
+            await self._envoyer(send, statut, en_tetes, morceau, suite=iterateur is not None)
+            while iterateur is not None:
+                morceau, fini = await boucle.run_in_executor(self._pool, contexte.run, _lire, iterateur)
+                await send({'type': 'http.response.body', 'body': morceau, 'more_body': not fini})
+                if fini:
+                    break
+        finally:
+            if iterable is not None:
+                await boucle.run_in_executor(self._pool, contexte.run, _fermer, iterable)
+
+    @staticmethod
+    async def _envoyer(send, statut, en_tetes, corps, suite=False):
+        await send({
+            'type': 'http.response.start',
+            'status': int(statut.split(' ', 1)[0]),
+            'headers': [(nom.lower().encode('latin-1'), valeur.encode('latin-1')) for nom, valeur in en_tetes],
+        })
+        await send({'type': 'http.response.body', 'body': corps, 'more_body': suite})
+
+
+app = ApplicationASGI()
@@ -0,0 +1,127 @@
+# interfaces/cache_reponses.py
+# ETag par empreinte de contenu et cache LRU des réponses calculées (priorités, calendrier,
+# listes). L'empreinte couvre la route, les paramètres, le format demandé (Accept), le jour
+# courant (les scores en dépendent) et soit le corps brut de la requête (mode stateless),
+# soit le numéro de la dernière modification du stockage serveur. Une requête inchangée ne décode pas son JSON :
+# réponse 304 si le client a déjà la version, sinon le corps mis en cache.
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+
+from flask import Response, request
+
+ENTREES_MAX = 512
+OCTETS_MAX = 64 * 1024 * 1024
+
+
+def empreinte(*parties):
+    """ETag (entre guillemets) de la requête courante, du jour et des parties fournies (bytes ou str)."""
+    h = hashlib.blake2b(digest_size=16)
+    for partie in (request.method, request.path, request.query_string, request.headers.get('Accept', ''),
+                   date.today().isoformat(), *parties):
+        h.update(partie if isinstance(partie, bytes) else str(partie).encode())
+        h.update(b'\0')
+    return f'"{h.hexdigest()}"'
+
+
+def empreinte_corps():
+    """Empreinte du corps brut : aucun décodage JSON nécessaire pour reconnaître une requête."""
+    return empreinte(request.get_data(cache=True))
+
+
+class CacheReponses:
+    """Cache LRU borné (en entrées et en octets) des corps de réponses, indexé par ETag."""
+
+    def __init__(self, metriques=None, entrees_max=ENTREES_MAX, octets_max=OCTETS_MAX):
+        self.metriques = metriques
+        self.entrees_max = entrees_max
+        self.octets_max = octets_max
+        self._verrou = threading.Lock()
+        self._entrees = OrderedDict()   # etag -> (corps, mimetype)
+        self._octets = 0
+        self._jour = date.today()
+
+    def __len__(self):
+        return len(self._entrees)
+
+    def _verifier_jour(self):
+        # Le jour fait partie de l'empreinte : les entrées de la veille ne servent plus
+        if self._jour != date.today():
+            self._entrees.clear()
+            self._octets = 0
+            self._jour = date.today()
+
+    def obtenir(self, etag):
+        with self._verrou:
+            self._verifier_jour()
+            entree = self._entrees.get(etag)
+            if entree is not None:
+                self._entrees.move_to_end(etag)
+            return entree
+
+    def stocker(self, etag, corps, mimetype):
+        if len(corps) > self.octets_max // 4:
+            return  # une seule réponse ne doit pas vider tout le cache
+        with self._verrou:
+            self._verifier_jour()
+            precedent = self._entrees.pop(etag, None)
+            if precedent is not None:
+                self._octets -= len(precedent[0])
+            self._entrees[etag] = (corps, mimetype)
+            self._octets += len(corps)
+            while len(self._entrees) > self.entrees_max or self._octets > self.octets_max:
+                _, (ancien, _) = self._entrees.popitem(last=False)
+                self._octets -= len(ancien)
+
+    def _compter(self, resultat):
+        if self.metriques is not None:
+            self.metriques.incrementer('assistant_cache_reponses_total', resultat=resultat,
+                                       route=request.url_rule.rule, methode=request.method)
+
+    def mis_en_cache(self, calculer_empreinte):
+        """
+        Décorateur de route : 304 si If-None-Match correspond, corps en cache sinon, et à
+        défaut appel de la vue (seules les réponses 200 sont gardées).
+        """
+        def decorateur(vue):
+            @functools.wraps(vue)
+            def enveloppe(*args, **kwargs):
+                etag = calculer_empreinte()
+                # ETag faible : même contenu, mais l'encodage (gzip, colonnes) peut varier.
+                # If-None-Match est analysé (liste, W/, *) : comparaison faible, sans les guillemets
+                if request.if_none_match.contains_weak(etag.strip('"')):
+                    self._compter('304')
+                    return Response(status=304, headers={'ETag': f"W/{etag}", 'Cache-Control': 'no-cache'})
+                entree = self.obtenir(etag)
+                if entree is not None:
+                    self._compter('cache')
+                    corps, mimetype = entree
+                    reponse = Response(corps, mimetype=mimetype,
+                                       headers={'ETag': f"W/{etag}", 'Cache-Control': 'no-cache'})
+                    reponse.vary.add('Accept')
+                    return reponse
+
+                self._compter('calcul')
+                reponse = vue(*args, **kwargs)
+                if isinstance(reponse, Response) and reponse.status_code == 200 and not reponse.is_streamed:
+                    self.stocker(etag, reponse.get_data(), reponse.mimetype)
+                    reponse.headers['ETag'] = f"W/{etag}"
+                    reponse.headers['Cache-Control'] = 'no-cache'
+                return reponse
+            return enveloppe
+        return decorateur
+
+
+def taux_succes(compteurs):
+    """Part des requêtes servies sans calcul (304 ou cache), par route, depuis les compteurs agrégés."""
+    totaux = {}
+    for (nom, labels), valeur in compteurs.items():
+        if nom != 'assistant_cache_reponses_total':
+            continue
+        serie = tuple(paire for paire in labels if paire[0] != 'resultat')
+        resultat = dict(labels)['resultat']
+        succes, total = totaux.get(serie, (0, 0))
+        totaux[serie] = (succes + (valeur if resultat != 'calcul' else 0), total + valeur)
+    return [(serie, succes / total) for serie, (succes, total) in sorted(totaux.items()) if total]
@@ -1,5 +1,13 @@
 # interfaces/cli_main.py
+# Les domaines (événements, code, finances) ne sont importés et chargés qu'à leur première
+# utilisation : le menu s'affiche sans lire les inventaires ni importer marshmallow / numpy.
+#   python interfaces/cli_main.py                   # menu interactif
+#   python interfaces/cli_main.py --suggest 45      # meilleures tâches pour 45 min, puis quitte
+#   python interfaces/cli_main.py --bilan           # bilan financier, puis quitte
+import argparse
 import datetime
+import json
+from functools import cached_property
 from colorama import Fore, Style
 import sys
 import os
@@ -7,16 +15,12 @@ import os
 # Ajout du répertoire parent au path pour les imports relatifs
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Import de tous les composants
-from core.evenement import Evenement, LISTE_EVENEMENTS_INVENTAIRE
-from core.logique import suggerer_tache
-from core.code_agent import lire_dependances, ajouter_dependance, generer_et_sauvegarder_code, analyser_fichier_source 
-from core.finance_agent import Transaction, LISTE_TRANSACTIONS
-from utils.persistence import charger_inventaire, sauvegarder_inventaire, charger_transactions, sauvegarder_transactions
-
 # === FONCTIONS D'INTERACTION ===
 
-def ajouter_evenement_cli(liste_evenements):
+def ajouter_evenement_cli(liste_evenements, index=None, recherche=None):
+    from core.evenement import Evenement
+    from utils.persistence import enregistrer_evenement
+
     print(f"\n{Fore.BLUE}--- AJOUTER UN NOUVEL ÉVÉNEMENT ---{Style.RESET_ALL}")
     type_event = input("Type (Tache/RDV) : ").strip().capitalize()
     nom = input("Nom de l'événement : ").strip()
@@ -24,12 +28,17 @@ def ajouter_evenement_cli(liste_evenements):
     if type_event == 'Rdv':
         try:
             date_str = input("Date et heure de début (AAAA-MM-JJ HH:MM) : ").strip()
+            date_debut = datetime.datetime.strptime(date_str, "%Y-%m-%d %H:%M")
             duree_minutes = int(input("Durée (en minutes) : "))
             
-            nouveau_event = Evenement(nom=nom, type_event='RDV', duree_totale_minutes=duree_minutes, date_heure_debut=date_str)
+            nouveau_event = Evenement(nom=nom, type_event='RDV', duree_totale_minutes=duree_minutes, date_debut=date_debut)
             liste_evenements.append(nouveau_event)
+            if index is not None:
+                index.ajouter(nouveau_event)
+            if recherche is not None:
+                recherche.ajouter(nouveau_event)
             print(f"{Fore.GREEN}✅ Rendez-vous '{nom}' ajouté.{Style.RESET_ALL}")
-            sauvegarder_inventaire(liste_evenements)
+            enregistrer_evenement(nouveau_event)
         except ValueError:
             print(f"{Fore.RED}❌ Erreur de format. Annulation.{Style.RESET_ALL}")
     elif type_event == 'Tache':
@@ -39,35 +48,44 @@ def ajouter_evenement_cli(liste_evenements):
             duree_minutes = int(input("Durée estimée (en minutes) : "))
             projet = input("Projet associé : ").strip()
             date_limite = input("Date limite (AAAA-MM-JJ) : ").strip() or None
+            if date_limite:
+                date_limite = datetime.datetime.strptime(date_limite, "%Y-%m-%d")
             
-            nouveau_event = Evenement(nom=nom, type_event='Tache', urgence=urgence, importance=importance, duree_totale_minutes=duree_minutes, projet=projet, date_limite=date_limite)
+            # La date limite d'une tâche est stockée comme date de fin
+            nouveau_event = Evenement(nom=nom, type_event='Tache', urgence=urgence, importance=importance, duree_totale_minutes=duree_minutes, projet=projet, date_fin=date_limite)
             liste_evenements.append(nouveau_event)
+            if index is not None:
+                index.ajouter(nouveau_event)
+            if recherche is not None:
+                recherche.ajouter(nouveau_event)
             print(f"{Fore.GREEN}✅ Tâche '{nom}' ajoutée.{Style.RESET_ALL}")
-            sauvegarder_inventaire(liste_evenements)
+            enregistrer_evenement(nouveau_event)
         except ValueError:
             print(f"{Fore.RED}❌ Erreur de format. Annulation.{Style.RESET_ALL}")
     else:
         print(f"{Fore.RED}❌ Type non reconnu.{Style.RESET_ALL}")
 
-def afficher_inventaire_cli(liste_evenements):
+def afficher_inventaire_cli(liste_evenements, index=None):
     print(f"\n{Fore.CYAN}--- INVENTAIRE COMPLET ({len(liste_evenements)} ÉLÉMENTS) ---{Style.RESET_ALL}")
     
-    taches_actives = [e for e in liste_evenements if e.type_event == 'Tache' and not e.est_complete]
     taches_completes = [e for e in liste_evenements if e.type_event == 'Tache' and e.est_complete]
     rdv = [e for e in liste_evenements if e.type_event == 'RDV']
     
     print(f"\n{Fore.MAGENTA}--- TÂCHES ACTIVES (Priorisées) ---{Style.RESET_ALL}")
-    taches_actives_triees = sorted(taches_actives, key=lambda x: x.calculer_score_priorite(), reverse=True)
+    if index is None:
+        from core.index_priorite import index_evenements
+        index = index_evenements(liste_evenements)
+    taches_actives_triees = index.meilleures()
     if taches_actives_triees:
-        for t in taches_actives_triees:
-            print(f"- (Score {t.calculer_score_priorite():.2f}) {t.nom} [{t.progression_pourcentage}%] (Reste {t.get_duree_restante_minutes()} min)")
+        for t, score in taches_actives_triees:
+            print(f"- (Score {score:.2f}) {t.nom} [{t.progression_pourcentage}%] (Reste {t.get_duree_restante_minutes()} min)")
     else:
         print(f"  {Fore.YELLOW}Aucune tâche active.{Style.RESET_ALL}")
 
     print(f"\n{Fore.MAGENTA}--- RENDEZ-VOUS ---{Style.RESET_ALL}")
     if rdv:
         for r in rdv:
-            print(f"- {r.nom} (Le {r.date_heure_debut})")
+            print(f"- {r.nom} (Le {r.date_debut:%Y-%m-%d %H:%M})")
     else:
         print(f"  {Fore.YELLOW}Aucun rendez-vous.{Style.RESET_ALL}")
 
@@ -78,7 +96,9 @@ def afficher_inventaire_cli(liste_evenements):
     else:
         print(f"  {Fore.YELLOW}Aucune tâche complétée.{Style.RESET_ALL}")
 
-def marquer_terminee_cli(liste_evenements):
+def marquer_terminee_cli(liste_evenements, index=None):
+    from utils.persistence import enregistrer_evenement
+
     taches_actives = [e for e in liste_evenements if e.type_event == 'Tache' and not e.est_complete]
     if not taches_actives:
         print(f"{Fore.YELLOW}Aucune tâche active à terminer.{Style.RESET_ALL}")
@@ -90,12 +110,16 @@ def marquer_terminee_cli(liste_evenements):
         choix = int(input("Numéro de la tâche à terminer (0 pour annuler) : "))
         if 1 <= choix <= len(taches_actives):
             taches_actives[choix - 1].marquer_terminee()
-            sauvegarder_inventaire(liste_evenements)
+            if index is not None:
+                index.mettre_a_jour(taches_actives[choix - 1])
+            enregistrer_evenement(taches_actives[choix - 1])
             print(f"{Fore.GREEN}✅ Tâche marquée comme terminée.{Style.RESET_ALL}")
     except ValueError:
         print(f"{Fore.RED}❌ Choix invalide.{Style.RESET_ALL}")
 
-def marquer_progression_cli(liste_evenements):
+def marquer_progression_cli(liste_evenements, index=None):
+    from utils.persistence import enregistrer_evenement
+
     taches_actives = [e for e in liste_evenements if e.type_event == 'Tache' and not e.est_complete]
     if not taches_actives:
         print(f"{Fore.YELLOW}Aucune tâche active.{Style.RESET_ALL}")
@@ -111,12 +135,122 @@ def marquer_progression_cli(liste_evenements):
             tache.progression_pourcentage = min(100, tache.progression_pourcentage + progression)
             if tache.progression_pourcentage == 100:
                 tache.marquer_terminee()
-            sauvegarder_inventaire(liste_evenements)
+            if index is not None:
+                index.mettre_a_jour(tache)
+            enregistrer_evenement(tache)
             print(f"{Fore.GREEN}✅ Progression mise à jour.{Style.RESET_ALL}")
     except ValueError:
         print(f"{Fore.RED}❌ Entrée invalide.{Style.RESET_ALL}")
 
-def gerer_finance_ajout_cli(liste_transactions):
+def rechercher_evenements_cli(liste_evenements, recherche=None):
+    requete = input("Rechercher (nom ou projet, début de mot accepté) : ").strip()
+    if recherche is None:
+        from core.recherche import index_recherche_evenements
+        recherche = index_recherche_evenements(liste_evenements)
+    total, resultats = recherche.rechercher(requete, limite=20)
+    print(f"\n{Fore.CYAN}--- RÉSULTATS ({total}) ---{Style.RESET_ALL}")
+    if not resultats:
+        print(f"  {Fore.YELLOW}Aucun événement trouvé.{Style.RESET_ALL}")
+    for e in resultats:
+        etat = " (Terminée)" if e.est_complete else ""
+        print(f"- [{e.type_event}] {e.nom} — {e.projet}{etat}")
+    if total > len(resultats):
+        print(f"  ... et {total - len(resultats)} autres.")
+
+def suggerer_cli(liste_evenements, duree, index=None):
+    from core.logique import suggerer_tache
+
+    suggestions = suggerer_tache(liste_evenements, duree, index)
+    if suggestions:
+        print(f"{Fore.GREEN}✅ TOP SUGGESTIONS :{Style.RESET_ALL}")
+        for s in suggestions:
+            print(f"   - {s['tache'].nom} (Score: {s['score']:.2f})")
+    else:
+        print(f"{Fore.YELLOW}Aucune tâche ne correspond.{Style.RESET_ALL}")
+
+def afficher_planning_cli(liste_evenements):
+    from core.planificateur import planifier_evenements
+
+    print(f"\n{Fore.CYAN}--- PLANNING DU JOUR ---{Style.RESET_ALL}")
+    try:
+        nb_jours = int(input("Nombre de jours à planifier (1 = aujourd'hui) : ").strip() or 1)
+    except ValueError:
+        print(f"{Fore.RED}❌ Nombre invalide.{Style.RESET_ALL}")
+        return
+    maintenant = datetime.datetime.now().replace(second=0, microsecond=0)
+    fin = datetime.datetime.combine(maintenant.date(), datetime.time()) + datetime.timedelta(days=max(1, nb_jours))
+    creneaux, plan = planifier_evenements(liste_evenements, maintenant, fin)
+    if not creneaux:
+        print(f"  {Fore.YELLOW}Aucun créneau libre.{Style.RESET_ALL}")
+        return
+    rdv = sorted((e for e in liste_evenements if e.type_event == 'RDV' and not e.est_complete
+                  and e.date_debut and maintenant <= e.date_debut < fin), key=lambda e: e.date_debut)
+    lignes = [(e.date_debut, f"{Fore.BLUE}📅 {e.nom} ({e.duree_totale_minutes} min){Style.RESET_ALL}") for e in rdv]
+    lignes += [(p['debut'], f"✅ {p['tache'].nom} [{p['tache'].projet}] jusqu'à {p['fin']:%H:%M} "
+                            f"(Score {p['score']:.2f})") for p in plan]
+    jour = None
+    for debut, texte in sorted(lignes, key=lambda l: l[0]):
+        if debut.date() != jour:
+            jour = debut.date()
+            print(f"\n{Fore.MAGENTA}{jour:%d/%m/%Y}{Style.RESET_ALL}")
+        print(f"  {debut:%H:%M} {texte}")
+    libres = sum((f - d).total_seconds() // 60 for d, f in creneaux)
+    occupees = sum(p['tache'].get_duree_restante_minutes() for p in plan)
+    print(f"\n{len(plan)} tâches planifiées : {occupees:.0f} min sur {libres:.0f} min libres.")
+
+def analyser_projet_cli():
+    from core.analyse_code import analyser_projet, plus_complexes
+
+    print(f"\n{Fore.CYAN}--- ANALYSE DU PROJET ---{Style.RESET_ALL}")
+    rapport = analyser_projet()
+    totaux = rapport['totaux']
+    print(f"{totaux['fichiers']} fichiers ({rapport['analyses']} analysés, {rapport['cache']} depuis le cache) "
+          f"en {rapport['duree_s']:.2f} s")
+    print(f"{totaux['lignes']} lignes ({totaux['lignes_code']} de code), {totaux['fonctions']} fonctions, "
+          f"{totaux['classes']} classes, complexité totale {totaux['complexite']}")
+    if totaux['erreurs']:
+        print(f"{Fore.RED}❌ {totaux['erreurs']} fichiers non analysables.{Style.RESET_ALL}")
+    print(f"\n{Fore.MAGENTA}--- Fichiers les plus complexes ---{Style.RESET_ALL}")
+    for chemin, stats in plus_complexes(rapport, 5):
+        print(f"- {chemin} : complexité {stats['complexite']} (max {stats['complexite_max']} dans {stats['fonction_max']})")
+    sortie = input("Enregistrer le rapport JSON (chemin, Entrée pour ignorer) : ").strip()
+    if sortie:
+        try:
+            with open(sortie, 'w', encoding='utf-8') as f:
+                json.dump(rapport, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            print(f"{Fore.RED}❌ Écriture impossible : {e}{Style.RESET_ALL}")
+            return
+        print(f"{Fore.GREEN}✅ Rapport enregistré : {sortie}{Style.RESET_ALL}")
+
+def profiler_imports_cli():
+    from core.code_agent import lire_dependances
+    from core.profil_imports import profiler, cibles_projet, plus_lourds, enregistrer, historique, BUDGET_DEMARRAGE_MS
+
+    print(f"\n{Fore.CYAN}--- COÛT DES IMPORTS ---{Style.RESET_ALL}")
+    print("Mesure en cours (sous-processus python -X importtime)...")
+    precedents = historique()
+    precedent = precedents[-1]['cibles'] if precedents else {}
+    resultats = profiler(cibles_projet(lire_dependances()))
+    for cible, mesure in sorted(resultats.items(), key=lambda e: -e[1].get('total_us', 0)):
+        if 'erreur' in mesure:
+            print(f"{Fore.RED}- {cible} : {mesure['erreur']}{Style.RESET_ALL}")
+            continue
+        ms = mesure['total_us'] / 1000
+        couleur = Fore.RED if ms > BUDGET_DEMARRAGE_MS else ''
+        ancien = precedent.get(cible, {}).get('total_us')
+        evolution = f" ({ms - ancien / 1000:+.1f} ms)" if ancien else ""
+        print(f"{couleur}- {cible} : {ms:.1f} ms{evolution}{Style.RESET_ALL}")
+    print(f"\n{Fore.MAGENTA}--- Modules les plus lourds ---{Style.RESET_ALL}")
+    for module, propre in plus_lourds(resultats, 10):
+        print(f"- {module} : {propre / 1000:.1f} ms")
+    enregistrer(resultats)
+    print(f"{Fore.GREEN}✅ Profil ajouté à l'historique ({len(precedents) + 1} profils).{Style.RESET_ALL}")
+
+def gerer_finance_ajout_cli(liste_transactions, grand_livre=None):
+    from core.finance_agent import Transaction
+    from utils.persistence import enregistrer_transaction, ajouter_au_grand_livre
+
     print(f"\n{Fore.BLUE}--- AJOUTER UNE TRANSACTION ---{Style.RESET_ALL}")
     try:
         description = input("Description : ").strip()
@@ -127,23 +261,40 @@ def gerer_finance_ajout_cli(liste_transactions):
         if description and montant != 0 and type_transaction in ['Dépense', 'Revenu']:
             nouvelle_tr = Transaction(description, montant, type_transaction, categorie)
             liste_transactions.append(nouvelle_tr)
-            sauvegarder_transactions(liste_transactions)
+            enregistrer_transaction(nouvelle_tr)
+            if grand_livre is not None:
+                ajouter_au_grand_livre(grand_livre, nouvelle_tr)
             print(f"{Fore.GREEN}✅ Transaction ajoutée.{Style.RESET_ALL}")
         else:
             print(f"{Fore.RED}❌ Informations invalides.{Style.RESET_ALL}")
     except ValueError:
         print(f"{Fore.RED}❌ Le montant doit être un nombre.{Style.RESET_ALL}")
 
-def afficher_bilan_finance_cli(liste_transactions):
+def afficher_bilan_finance_cli(liste_transactions, grand_livre=None):
     print(f"\n{Fore.CYAN}--- BILAN FINANCIER ---{Style.RESET_ALL}")
-    total_revenu = sum(t.montant for t in liste_transactions if t.type_transaction == 'Revenu')
-    total_depense = sum(t.montant for t in liste_transactions if t.type_transaction == 'Dépense')
-    solde_net = total_revenu - total_depense
+    # Totaux tenus à jour à chaque ajout : aucun parcours de l'historique
+    if grand_livre is None:
+        from core.finance_agent import construire_grand_livre
+        grand_livre = construire_grand_livre(liste_transactions)
+    total_revenu = grand_livre.total_revenu
+    total_depense = grand_livre.total_depense
+    solde_net = grand_livre.solde
     
     couleur_solde = Fore.GREEN if solde_net >= 0 else Fore.RED
     print(f"💰 Total Revenu : {Fore.GREEN}{total_revenu:.2f}€{Style.RESET_ALL}")
     print(f"💸 Total Dépense : {Fore.RED}{total_depense:.2f}€{Style.RESET_ALL}")
     print(f"Net Solde Actuel : {couleur_solde}{solde_net:.2f}€{Style.RESET_ALL}")
+
+    mois = grand_livre.mois(f"{datetime.date.today():%Y-%m}")
+    print(f"📅 Ce mois-ci : {Fore.GREEN}+{mois.get('Revenu', 0.0):.2f}€{Style.RESET_ALL} / "
+          f"{Fore.RED}-{mois.get('Dépense', 0.0):.2f}€{Style.RESET_ALL}")
+
+    depenses = sorted(((cumuls['Dépense'], nom) for nom, cumuls in grand_livre.par_categorie().items()
+                       if cumuls.get('Dépense')), reverse=True)
+    if depenses:
+        print(f"\n{Fore.MAGENTA}--- Dépenses par Catégorie ---{Style.RESET_ALL}")
+        for montant, nom in depenses[:5]:
+            print(f"- {nom or 'Autre'} : {montant:.2f}€")
     
     print(f"\n{Fore.MAGENTA}--- Dernières Transactions ---{Style.RESET_ALL}")
     if liste_transactions:
@@ -153,25 +304,108 @@ def afficher_bilan_finance_cli(liste_transactions):
     else:
         print(f"  {Fore.YELLOW}Aucune transaction.{Style.RESET_ALL}")
 
+def importer_releve_cli(liste_transactions, grand_livre=None):
+    from core.import_releve import lire_releve, transactions_nouvelles, LigneInvalide
+    from utils.persistence import empreintes_importees, importer_transactions
+
+    print(f"\n{Fore.BLUE}--- IMPORTER UN RELEVÉ BANCAIRE (CSV/OFX) ---{Style.RESET_ALL}")
+    chemin = input("Chemin du fichier : ").strip()
+    config = {}
+    if not chemin.lower().endswith(('.ofx', '.qfx')):
+        print("Colonnes par défaut : Date;Montant;Libellé;Catégorie (Entrée pour garder)")
+        for cle, question in (('date', "Colonne date"), ('montant', "Colonne montant"),
+                              ('description', "Colonne libellé"), ('format_date', "Format de date")):
+            valeur = input(f"{question} : ").strip()
+            if valeur:
+                config[cle] = valeur
+        separateur = input("Séparateur de colonnes (;) : ").strip()
+        if separateur:
+            config['separateur'] = '\t' if separateur.lower() in ('tab', '\\t') else separateur
+        # Sans réponse, montants à la française (1.234,56) ; '.' pour les relevés 1,234.56 / 12.50
+        if input("Séparateur décimal (, ou .) : ").strip() == '.':
+            config['virgule_decimale'] = False
+    try:
+        lignes = lire_releve(chemin, config)
+        nouvelles = list(transactions_nouvelles(lignes, empreintes_importees(liste_transactions)))
+    except OSError as e:
+        print(f"{Fore.RED}❌ Lecture impossible : {e}{Style.RESET_ALL}")
+        return
+    except LigneInvalide as e:
+        print(f"{Fore.RED}❌ Relevé invalide, rien n'a été importé. {e}{Style.RESET_ALL}")
+        return
+    if nouvelles:
+        importer_transactions(liste_transactions, grand_livre, nouvelles)
+        print(f"{Fore.GREEN}✅ {len(nouvelles)} transactions importées.{Style.RESET_ALL}")
+    else:
+        print(f"{Fore.YELLOW}Aucune nouvelle transaction (relevé déjà importé).{Style.RESET_ALL}")
+
+
+class Session:
+    """
+    Données du CLI, chargées à la première utilisation de chaque domaine : une session qui
+    ne touche qu'aux finances ne lit pas l'inventaire, et inversement.
+    """
+
+    @cached_property
+    def evenements(self):
+        from core.evenement import Evenement
+        from utils.persistence import charger_inventaire, sauvegarder_inventaire
+
+        evenements = charger_inventaire()
+        # Logique de démo si DB vide (optionnel)
+        if not evenements:
+            print(f"{Fore.YELLOW}Création des données de démo...{Style.RESET_ALL}")
+            evenements.append(Evenement(nom="Vérifier contrat A", type_event='Tache', urgence=5, importance=5, duree_totale_minutes=120, projet="Financement", date_fin=datetime.datetime(2025, 11, 15)))
+            evenements.append(Evenement(nom="Finaliser le rapport", type_event='Tache', urgence=4, importance=4, duree_totale_minutes=60, projet="Gestion", date_fin=datetime.datetime(2025, 11, 10)))
+            sauvegarder_inventaire(evenements)
+        print(f"{Fore.GREEN}✅ {len(evenements)} événements chargés.{Style.RESET_ALL}")
+        return evenements
+
+    @cached_property
+    def index_priorite(self):
+        # Index de priorité tenu à jour à chaque modification (évite un tri complet par affichage)
+        from core.index_priorite import index_evenements
+        return index_evenements(self.evenements)
+
+    @cached_property
+    def index_recherche(self):
+        from core.recherche import index_recherche_evenements
+        return index_recherche_evenements(self.evenements)
+
+    @cached_property
+    def transactions(self):
+        from core.finance_agent import Transaction
+        from utils.persistence import charger_transactions, sauvegarder_transactions
+
+        transactions = charger_transactions()
+        if not transactions:
+            transactions.append(Transaction("Salaire", 3000, "Revenu", "Salaire"))
+            sauvegarder_transactions(transactions)
+        print(f"{Fore.GREEN}✅ {len(transactions)} transactions chargées.{Style.RESET_ALL}")
+        return transactions
+
+    @cached_property
+    def grand_livre(self):
+        from utils.persistence import charger_grand_livre
+        return charger_grand_livre(self.transactions)
+
+    def charge(self, nom):
+        """L'attribut s'il est déjà chargé, sinon None (sans le charger)."""
+        return self.__dict__.get(nom)
+
+    def fermer(self):
+        """Fin de session : met à jour le cache binaire des inventaires chargés."""
+        if 'evenements' in self.__dict__:
+            from utils.persistence import memoriser_inventaire
+            memoriser_inventaire(self.evenements)
+        if 'transactions' in self.__dict__:
+            from utils.persistence import memoriser_transactions
+            memoriser_transactions(self.transactions)
+
+
+def main_menu(session=None):
+    session = session or Session()
 
-def main_menu():
-    global LISTE_EVENEMENTS_INVENTAIRE, LISTE_TRANSACTIONS
-    
-    LISTE_EVENEMENTS_INVENTAIRE = charger_inventaire()
-    LISTE_TRANSACTIONS = charger_transactions()
-    
-    print(f"{Fore.GREEN}✅ {len(LISTE_EVENEMENTS_INVENTAIRE)} événements et {len(LISTE_TRANSACTIONS)} transactions chargés.{Style.RESET_ALL}")
-    
-    # Logique de démo si DB vide (optionnel)
-    if not LISTE_EVENEMENTS_INVENTAIRE:
-        print(f"{Fore.YELLOW}Création des données de démo...{Style.RESET_ALL}")
-        LISTE_EVENEMENTS_INVENTAIRE.append(Evenement(nom="Vérifier contrat A", type_event='Tache', urgence=5, importance=5, duree_totale_minutes=120, projet="Financement", date_limite="2025-11-15"))
-        LISTE_EVENEMENTS_INVENTAIRE.append(Evenement(nom="Finaliser le rapport", type_event='Tache', urgence=4, importance=4, duree_totale_minutes=60, projet="Gestion", date_limite="2025-11-10"))
-        sauvegarder_inventaire(LISTE_EVENEMENTS_INVENTAIRE)
-    if not LISTE_TRANSACTIONS:
-        LISTE_TRANSACTIONS.append(Transaction("Salaire", 3000, "Revenu", "Salaire"))
-        sauvegarder_transactions(LISTE_TRANSACTIONS)
-    
     while True:
         print(f"\n{Fore.CYAN}=== ASSISTANT PERSONNEL IA (CLI) ==={Style.RESET_ALL}")
         print("1. Afficher l'inventaire complet")
@@ -179,64 +413,97 @@ def main_menu():
         print("3. Suggérer la meilleure tâche pour un créneau libre")
         print("4. Marquer une tâche comme terminée")
         print("5. Mettre à jour la progression d'une tâche")
+        print("14. Rechercher un événement")
+        print("15. Planifier la journée (créneaux libres)")
         print(f"\n{Fore.MAGENTA}--- DOMAINE CODE ---{Style.RESET_ALL}")
         print("7. Afficher les dépendances")
         print("8. Ajouter une dépendance")
         print("9. Générer squelette de code")
         print("10. Analyser Fichier Source")
+        print("16. Profiler le coût des imports")
         print(f"\n{Fore.YELLOW}--- DOMAINE FINANCEMENT ---{Style.RESET_ALL}")
         print("11. Afficher Bilan Financier")
         print("12. Ajouter une Transaction")
+        print("13. Importer un Relevé Bancaire (CSV/OFX)")
         print(f"\n{Fore.RED}6. Quitter{Style.RESET_ALL}")
         
-        choix = input("Entrez votre choix (1-12) : ").strip()
+        choix = input("Entrez votre choix (1-16) : ").strip()
         
         if choix == '1':
-            afficher_inventaire_cli(LISTE_EVENEMENTS_INVENTAIRE)
+            afficher_inventaire_cli(session.evenements, session.index_priorite)
         elif choix == '2':
-            ajouter_evenement_cli(LISTE_EVENEMENTS_INVENTAIRE)
+            ajouter_evenement_cli(session.evenements, session.charge('index_priorite'), session.charge('index_recherche'))
         elif choix == '3':
             try:
                 duree = int(input("Durée du créneau libre (en minutes) : "))
-                suggestions = suggerer_tache(LISTE_EVENEMENTS_INVENTAIRE, duree)
-                if suggestions:
-                    print(f"{Fore.GREEN}✅ TOP SUGGESTIONS :{Style.RESET_ALL}")
-                    for s in suggestions:
-                        print(f"   - {s['tache'].nom} (Score: {s['score']:.2f})")
-                else:
-                    print(f"{Fore.YELLOW}Aucune tâche ne correspond.{Style.RESET_ALL}")
             except ValueError:
                 print(f"{Fore.RED}❌ Durée invalide.{Style.RESET_ALL}")
+            else:
+                suggerer_cli(session.evenements, duree, session.index_priorite)
         elif choix == '4':
-            marquer_terminee_cli(LISTE_EVENEMENTS_INVENTAIRE)
+            marquer_terminee_cli(session.evenements, session.charge('index_priorite'))
         elif choix == '5':
-            marquer_progression_cli(LISTE_EVENEMENTS_INVENTAIRE)
+            marquer_progression_cli(session.evenements, session.charge('index_priorite'))
+        elif choix == '15':
+            afficher_planning_cli(session.evenements)
+        elif choix == '14':
+            rechercher_evenements_cli(session.evenements, session.index_recherche)
         elif choix == '7':
+            from core.code_agent import lire_dependances
             print(lire_dependances())
         elif choix == '8':
+            from core.code_agent import ajouter_dependance
             dep = input("Nom du package à ajouter : ")
             ajouter_dependance(dep)
         elif choix == '9': 
+            from core.code_agent import generer_et_sauvegarder_code
             tc = input("Type (Classe/Fonction) : ")
             nf = input("Nom fichier (sans .py) : ")
             ne = input("Nom entité : ")
             generer_et_sauvegarder_code(tc, nf, ne)
         elif choix == '10': 
-            nf = input("Nom fichier (ex: evenement.py) : ")
-            lignes = analyser_fichier_source(nf)
-            if lignes is not None:
-                print(f"Le fichier contient {lignes} lignes.")
+            nf = input("Nom fichier (ex: evenement.py, Entrée = tout le projet) : ").strip()
+            if nf:
+                from core.code_agent import analyser_fichier_source
+                lignes = analyser_fichier_source(nf)
+                if lignes is not None:
+                    print(f"Le fichier contient {lignes} lignes.")
+            else:
+                analyser_projet_cli()
+        elif choix == '16':
+            profiler_imports_cli()
         
         elif choix == '11':
-            afficher_bilan_finance_cli(LISTE_TRANSACTIONS)
+            afficher_bilan_finance_cli(session.transactions, session.grand_livre)
         elif choix == '12':
-            gerer_finance_ajout_cli(LISTE_TRANSACTIONS)
+            gerer_finance_ajout_cli(session.transactions, session.grand_livre)
+        elif choix == '13':
+            importer_releve_cli(session.transactions, session.grand_livre)
             
         elif choix == '6':
+            session.fermer()
             print(f"{Fore.GREEN}Au revoir !{Style.RESET_ALL}")
             break
         else:
             print(f"{Fore.RED}Choix invalide.{Style.RESET_ALL}")
 
+def main():
+    parser = argparse.ArgumentParser(description="Assistant personnel (CLI)")
+    commande = parser.add_mutually_exclusive_group()
+    commande.add_argument('--suggest', type=int, metavar='MINUTES',
+                          help="Affiche les meilleures tâches pour un créneau libre, puis quitte")
+    commande.add_argument('--bilan', action='store_true', help="Affiche le bilan financier, puis quitte")
+    args = parser.parse_args()
+
+    session = Session()
+    if args.suggest is not None:
+        suggerer_cli(session.evenements, args.suggest)
+        session.fermer()
+    elif args.bilan:
+        afficher_bilan_finance_cli(session.transactions, session.grand_livre)
+        session.fermer()
+    else:
+        main_menu(session)
+
 if __name__ == "__main__":
-    main_menu()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,125 @@
+# interfaces/format_compact.py
+# Négociation du format d'échange de l'API.
+#
+# - Format en colonnes (TYPE_COLONNES) : toute liste d'objets est envoyée une fois avec ses
+#   noms de champs puis une liste de valeurs par élément :
+#     [{"nom": "A", "urgence": 3}, {"nom": "B", "urgence": 5}]
+#     -> {"$colonnes": ["nom", "urgence"], "$lignes": [["A", 3], ["B", 5]]}
+#   Utilisé pour la réponse si le client l'accepte explicitement (Accept), et pour le corps
+#   de la requête si le client l'envoie (Content-Type). Les champs absents de certains
+#   éléments sont listés dans "$absents" ([élément, colonne]) : le format est sans perte.
+# - gzip au-delà de SEUIL_GZIP octets si le client l'accepte (Accept-Encoding).
+import gzip
+import time
+
+from flask import request, has_request_context
+from flask.json.provider import DefaultJSONProvider
+from flask.wrappers import Request
+
+TYPE_COLONNES = 'application/vnd.assistant.colonnes+json'
+SEUIL_GZIP = 1400              # en dessous, la réponse tient dans un paquet : inutile de compresser
+NIVEAU_GZIP = 5
+TYPES_COMPRESSIBLES = ('application/json', TYPE_COLONNES, 'text/html', 'text/plain')
+_CONTENEURS = (list, dict)
+
+
+def compacter(valeur):
+    """Transforme récursivement les listes d'objets en {"$colonnes", "$lignes"}."""
+    if type(valeur) is list:
+        if valeur and all(type(e) is dict for e in valeur):
+            positions = {}
+            for element in valeur:
+                for cle in element:
+                    positions.setdefault(cle, None)
+            noms = list(positions)
+            lignes, absents = [], []
+            for i, element in enumerate(valeur):
+                if list(element) == noms:
+                    ligne = list(element.values())
+                else:
+                    ligne = [element.get(nom) for nom in noms]
+                    absents += [[i, j] for j, nom in enumerate(noms) if nom not in element]
+                lignes.append([compacter(v) if type(v) in _CONTENEURS else v for v in ligne])
+            resultat = {'$colonnes': noms, '$lignes': lignes}
+            if absents:
+                resultat['$absents'] = absents
+            return resultat
+        return [compacter(v) if type(v) in _CONTENEURS else v for v in valeur]
+    if type(valeur) is dict:
+        return {cle: compacter(v) if type(v) in _CONTENEURS else v for cle, v in valeur.items()}
+    return valeur
+
+
+def deplier(valeur):
+    """Inverse de compacter."""
+    if type(valeur) is dict:
+        if '$colonnes' in valeur and '$lignes' in valeur:
+            noms = valeur['$colonnes']
+            elements = [{nom: deplier(v) if type(v) in _CONTENEURS else v for nom, v in zip(noms, ligne)}
+                        for ligne in valeur['$lignes']]
+            for i, j in valeur.get('$absents', ()):
+                del elements[i][noms[j]]
+            return elements
+        return {cle: deplier(v) if type(v) in _CONTENEURS else v for cle, v in valeur.items()}
+    if type(valeur) is list:
+        return [deplier(v) if type(v) in _CONTENEURS else v for v in valeur]
+    return valeur
+
+
+def accepte_colonnes():
+    # Recherche explicite : un client qui envoie "Accept: */*" doit continuer à recevoir du JSON
+    return TYPE_COLONNES in request.headers.get('Accept', '')
+
+
+class RequeteNegociee(Request):
+    """Requête Flask qui accepte aussi un corps au format en colonnes (déplié dans get_json)."""
+    _donnees_depliees = None
+
+    def get_json(self, *args, **kwargs):
+        donnees = super().get_json(*args, **kwargs)
+        if self.mimetype != TYPE_COLONNES or donnees is None:
+            return donnees
+        if self._donnees_depliees is None:
+            self._donnees_depliees = deplier(donnees)
+        return self._donnees_depliees
+
+
+class FournisseurJSONNegocie(DefaultJSONProvider):
+    """jsonify en JSON compact (sans tri des clés) ou au format en colonnes si le client l'accepte."""
+    sort_keys = False
+    ensure_ascii = False
+    compact = True      # même en mode debug : plus d'indentation dans les réponses
+
+    def response(self, *args, **kwargs):
+        if not has_request_context() or not accepte_colonnes():
+            reponse = super().response(*args, **kwargs)
+        else:
+            donnees = compacter(self._prepare_response_obj(args, kwargs))
+            reponse = self._app.response_class(self.dumps(donnees, separators=(',', ':')), mimetype=TYPE_COLONNES)
+        reponse.vary.add('Accept')
+        return reponse
+
+
+def installer_compression(app, seuil=SEUIL_GZIP, niveau=NIVEAU_GZIP):
+    """
+    Compresse en gzip les réponses au-delà du seuil et annonce les formats acceptés en
+    entrée (Accept-Post). À installer après instrumenter() : les métriques voient alors la
+    taille compressée, et le temps de compression compte comme de l'encodage.
+    """
+    @app.after_request
+    def _compresser(response):
+        response.headers['Accept-Post'] = f"application/json, {TYPE_COLONNES}"
+        response.vary.add('Accept-Encoding')
+        if (response.status_code != 200 or response.is_streamed or 'Content-Encoding' in response.headers
+                or response.mimetype not in TYPES_COMPRESSIBLES
+                or 'gzip' not in request.headers.get('Accept-Encoding', '')):
+            return response
+        corps = response.get_data()
+        if len(corps) < seuil:
+            return response
+        debut = time.perf_counter()
+        response.set_data(gzip.compress(corps, compresslevel=niveau))
+        response.headers['Content-Encoding'] = 'gzip'
+        if hasattr(request, 'duree_encodage'):
+            request.duree_encodage += time.perf_counter() - debut
+        return response
@@ -0,0 +1,314 @@
+# interfaces/metriques.py
+# Métriques de l'API Flask, exposées au format texte Prometheus (route /metrics de api_main).
+#
+# Chaque worker gunicorn compte en mémoire (histogrammes et compteurs, un verrou, pas d'E/S
+# par requête) et recopie son état au plus toutes les INTERVALLE_ECRITURE secondes dans
+# un fichier "metriques-<pid>.json" du dossier partagé. /metrics additionne les fichiers de
+# tous les workers : les valeurs des autres workers ont au plus quelques secondes de retard.
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache
+
+from flask import request, has_request_context
+
+from interfaces.format_compact import RequeteNegociee, FournisseurJSONNegocie
+
+# Bornes des histogrammes (le bucket +Inf est implicite)
+BORNES_DUREE = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BORNES_OCTETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+BORNES_ELEMENTS = (10, 100, 1000, 10000, 100000, 1000000)
+
+INTERVALLE_ECRITURE = 5.0
+
+# nom -> (type, bornes, aide)
+DEFINITIONS = {
+    'assistant_requete_duree_secondes': ('histogram', BORNES_DUREE, "Durée totale des requêtes HTTP"),
+    'assistant_phase_duree_secondes': ('histogram', BORNES_DUREE,
+                                       "Durée par phase : decodage JSON, logique métier, encodage JSON"),
+    'assistant_requete_taille_octets': ('histogram', BORNES_OCTETS, "Taille du corps des requêtes"),
+    'assistant_reponse_taille_octets': ('histogram', BORNES_OCTETS, "Taille du corps des réponses"),
+    'assistant_inventaire_taille': ('histogram', BORNES_ELEMENTS,
+                                    "Nombre d'éléments de l'inventaire envoyé par le client (mode stateless)"),
+    'assistant_requetes_lentes_total': ('counter', None, "Requêtes au-delà du seuil de lenteur"),
+    'assistant_cache_reponses_total': ('counter', None,
+                                       "Consultations du cache de réponses (resultat : 304, cache ou calcul)"),
+}
+
+
+def _cle(nom, labels):
+    return nom, tuple(sorted(labels.items()))
+
+
+def _echapper(valeur):
+    return str(valeur).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, supplementaire=None):
+    paires = list(labels) + ([supplementaire] if supplementaire else [])
+    if not paires:
+        return ''
+    return '{' + ','.join(f'{nom}="{_echapper(valeur)}"' for nom, valeur in paires) + '}'
+
+
+def _processus_actif(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True   # processus d'un autre utilisateur
+    return True
+
+
+def _format_nombre(valeur):
+    return repr(float(valeur)) if isinstance(valeur, float) else str(valeur)
+
+
+class Metriques:
+    """Histogrammes et compteurs d'un processus, agrégés entre workers via un dossier partagé."""
+
+    def __init__(self, dossier, intervalle=INTERVALLE_ECRITURE, definitions=DEFINITIONS):
+        self.dossier = dossier
+        self.intervalle = intervalle
+        self.definitions = dict(definitions)
+        self._verrou = threading.Lock()
+        self._reinitialiser()
+
+    def _reinitialiser(self):
+        self._pid = os.getpid()
+        self._histogrammes = {}   # (nom, labels) -> [compte par bucket..., somme]
+        self._compteurs = {}      # (nom, labels) -> valeur
+        self._derniere_ecriture = 0.0
+        self._oublier_processus_termines()
+
+    def _oublier_processus_termines(self):
+        """
+        Supprime les fichiers des workers arrêtés (au démarrage de chaque worker) : /metrics
+        ne les additionne plus indéfiniment, et un pid réutilisé repart d'un fichier vide
+        au lieu d'écraser celui de l'ancien processus. Les compteurs de ces workers
+        disparaissent de la somme, ce que Prometheus traite comme une remise à zéro.
+        """
+        try:
+            fichiers = os.listdir(self.dossier)
+        except OSError:
+            return
+        for fichier in fichiers:
+            if not (fichier.startswith('metriques-') and fichier.endswith('.json')):
+                continue
+            pid = fichier[len('metriques-'):-len('.json')]
+            if pid.isdigit() and (int(pid) == self._pid or not _processus_actif(int(pid))):
+                try:
+                    os.remove(os.path.join(self.dossier, fichier))
+                except OSError:
+                    pass   # déjà supprimé par un autre worker
+
+    def _verifier_processus(self):
+        # Après un fork (gunicorn --preload), l'enfant ne doit pas recompter l'état du parent
+        if self._pid != os.getpid():
+            self._reinitialiser()
+
+    # --- Enregistrement (chemin chaud) ---
+
+    def observer(self, nom, valeur, **labels):
+        self.enregistrer([(_cle(nom, labels), valeur)])
+
+    def enregistrer(self, observations):
+        """Ajoute des observations [(cle, valeur)] sous un seul verrou ; cle = _cle(nom, labels)."""
+        with self._verrou:
+            self._verifier_processus()
+            for cle, valeur in observations:
+                histogramme = self._histogrammes.get(cle)
+                bornes = self.definitions[cle[0]][1]
+                if histogramme is None:
+                    histogramme = self._histogrammes[cle] = [0] * (len(bornes) + 2)
+                histogramme[bisect_left(bornes, valeur)] += 1
+                histogramme[-1] += valeur
+
+    def incrementer(self, nom, valeur=1, **labels):
+        cle = _cle(nom, labels)
+        with self._verrou:
+            self._verifier_processus()
+            self._compteurs[cle] = self._compteurs.get(cle, 0) + valeur
+
+    # --- Partage entre workers ---
+
+    def _chemin(self, pid):
+        return os.path.join(self.dossier, f"metriques-{pid}.json")
+
+    def ecrire(self, forcer=False):
+        """Recopie l'état du processus sur disque (au plus une fois par intervalle)."""
+        maintenant = time.monotonic()
+        if not forcer and maintenant - self._derniere_ecriture < self.intervalle:
+            return
+        with self._verrou:
+            self._verifier_processus()
+            self._derniere_ecriture = maintenant
+            etat = {
+                'histogrammes': [[nom, labels, valeurs] for (nom, labels), valeurs in self._histogrammes.items()],
+                'compteurs': [[nom, labels, valeur] for (nom, labels), valeur in self._compteurs.items()],
+            }
+        os.makedirs(self.dossier, exist_ok=True)
+        chemin = self._chemin(self._pid)
+        with open(f"{chemin}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(etat, f)
+        os.replace(f"{chemin}.tmp", chemin)
+
+    def agreger(self):
+        """Additionne l'état de tous les workers : (histogrammes, compteurs)."""
+        self.ecrire(forcer=True)
+        histogrammes, compteurs = {}, {}
+        for fichier in os.listdir(self.dossier):
+            if not (fichier.startswith('metriques-') and fichier.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.dossier, fichier), encoding='utf-8') as f:
+                    etat = json.load(f)
+            except (OSError, ValueError):
+                continue  # fichier en cours de remplacement
+            for nom, labels, valeurs in etat['histogrammes']:
+                cle = (nom, tuple(map(tuple, labels)))
+                if cle in histogrammes:
+                    histogrammes[cle] = [a + b for a, b in zip(histogrammes[cle], valeurs)]
+                else:
+                    histogrammes[cle] = valeurs
+            for nom, labels, valeur in etat['compteurs']:
+                cle = (nom, tuple(map(tuple, labels)))
+                compteurs[cle] = compteurs.get(cle, 0) + valeur
+        return histogrammes, compteurs
+
+    # --- Format texte Prometheus ---
+
+    def rendre(self, jauges=None):
+        """
+        Texte d'exposition Prometheus. jauges = {nom: (valeur, aide)}, ou une fonction
+        (histogrammes, compteurs) -> jauges pour des valeurs dérivées de l'état agrégé.
+        """
+        histogrammes, compteurs = self.agreger()
+        lignes = []
+        for nom, (type_metrique, bornes, aide) in self.definitions.items():
+            lignes.append(f"# HELP {nom} {aide}")
+            lignes.append(f"# TYPE {nom} {type_metrique}")
+            if type_metrique == 'counter':
+                for (nom_cle, labels), valeur in sorted(compteurs.items()):
+                    if nom_cle == nom:
+                        lignes.append(f"{nom}{_format_labels(labels)} {_format_nombre(valeur)}")
+                continue
+            for (nom_cle, labels), valeurs in sorted(histogrammes.items()):
+                if nom_cle != nom:
+                    continue
+                cumul = 0
+                for borne, compte in zip(bornes + ('+Inf',), valeurs):
+                    cumul += compte
+                    lignes.append(f"{nom}_bucket{_format_labels(labels, ('le', borne))} {cumul}")
+                lignes.append(f"{nom}_sum{_format_labels(labels)} {_format_nombre(valeurs[-1])}")
+                lignes.append(f"{nom}_count{_format_labels(labels)} {cumul}")
+        if callable(jauges):
+            jauges = jauges(histogrammes, compteurs)
+        for nom, (valeur, aide) in (jauges or {}).items():
+            lignes += [f"# HELP {nom} {aide}", f"# TYPE {nom} gauge"]
+            # valeur simple, ou liste de (labels, valeur) pour une jauge par série
+            series = valeur if isinstance(valeur, list) else [((), valeur)]
+            lignes += [f"{nom}{_format_labels(labels)} {_format_nombre(v)}" for labels, v in series]
+        return '\n'.join(lignes) + '\n'
+
+
+# --- Instrumentation Flask ---
+
+class RequeteMesuree(RequeteNegociee):
+    """Requête Flask qui chronomètre le décodage JSON et note la taille de l'inventaire reçu."""
+    debut_mesure = None
+    duree_decodage = 0.0
+    duree_encodage = 0.0
+    taille_inventaire = None
+
+    def get_json(self, *args, **kwargs):
+        debut = time.perf_counter()
+        donnees = super().get_json(*args, **kwargs)
+        self.duree_decodage += time.perf_counter() - debut
+        if isinstance(donnees, dict) and isinstance(donnees.get('inventaire'), list):
+            self.taille_inventaire = len(donnees['inventaire'])
+        return donnees
+
+
+class FournisseurJSONMesure(FournisseurJSONNegocie):
+    """Fournisseur JSON de Flask qui chronomètre l'encodage des réponses (jsonify)."""
+
+    def response(self, *args, **kwargs):
+        debut = time.perf_counter()
+        reponse = super().response(*args, **kwargs)
+        if has_request_context():
+            request.duree_encodage += time.perf_counter() - debut
+        return reponse
+
+
+@lru_cache(maxsize=1024)
+def _cles_requete(route, methode, statut):
+    """Clés des séries d'une requête, calculées une fois par (route, méthode, statut)."""
+    labels = {'route': route, 'methode': methode}
+    return {
+        'duree': _cle('assistant_requete_duree_secondes', dict(labels, statut=str(statut))),
+        'decodage': _cle('assistant_phase_duree_secondes', dict(labels, phase='decodage')),
+        'logique': _cle('assistant_phase_duree_secondes', dict(labels, phase='logique')),
+        'encodage': _cle('assistant_phase_duree_secondes', dict(labels, phase='encodage')),
+        'requete': _cle('assistant_requete_taille_octets', labels),
+        'reponse': _cle('assistant_reponse_taille_octets', labels),
+        'inventaire': _cle('assistant_inventaire_taille', labels),
+    }
+
+
+def instrumenter(app, metriques, seuil_lent_ms, logger):
+    """Branche la mesure de chaque requête sur l'application ; les requêtes lentes sont journalisées."""
+    app.request_class = RequeteMesuree
+    app.json = FournisseurJSONMesure(app)
+
+    @app.before_request
+    def _debut_mesure():
+        request.debut_mesure = time.perf_counter()
+
+    def mesurer(statut, taille_reponse):
+        duree = time.perf_counter() - request.debut_mesure
+        request.debut_mesure = None   # une seule mesure par requête
+        logique = max(0.0, duree - request.duree_decodage - request.duree_encodage)
+        labels = {'route': request.url_rule.rule if request.url_rule else 'inconnue', 'methode': request.method}
+        cles = _cles_requete(labels['route'], labels['methode'], statut)
+        taille_requete = request.content_length or 0
+
+        observations = [
+            (cles['duree'], duree),
+            (cles['decodage'], request.duree_decodage),
+            (cles['logique'], logique),
+            (cles['encodage'], request.duree_encodage),
+            (cles['requete'], taille_requete),
+        ]
+        if taille_reponse is not None:
+            observations.append((cles['reponse'], taille_reponse))
+        if request.taille_inventaire is not None:
+            observations.append((cles['inventaire'], request.taille_inventaire))
+        metriques.enregistrer(observations)
+
+        if duree * 1000 >= seuil_lent_ms:
+            metriques.incrementer('assistant_requetes_lentes_total', **labels)
+            logger.warning(
+                f"Requête lente : {request.method} {request.path} -> {statut} en {duree * 1000:.0f} ms "
+                f"(décodage {request.duree_decodage * 1000:.0f} ms, logique {logique * 1000:.0f} ms, "
+                f"encodage {request.duree_encodage * 1000:.0f} ms ; requête {taille_requete} o, "
+                f"réponse {taille_reponse if taille_reponse is not None else '?'} o, "
+                f"inventaire {request.taille_inventaire if request.taille_inventaire is not None else '-'})")
+        metriques.ecrire()
+
+    @app.after_request
+    def _fin_mesure(response):
+        if request.debut_mesure is not None:
+            # Une réponse en flux (NDJSON) n'a pas de taille connue : la calculer la mettrait en mémoire
+            mesurer(response.status_code, None if response.is_streamed else response.calculate_content_length())
+        return response
+
+    @app.teardown_request
+    def _mesure_erreur(exception):
+        # Requête qui n'est pas passée par after_request : exception propagée (debug, tests)
+        # ou levée par un autre after_request ; elle est comptée en 500
+        if request.debut_mesure is not None:
+            mesurer(500, None)
@@ -0,0 +1,31 @@
+# interfaces/serveur_conf.py
+# Configuration gunicorn recommandée pour les deux points d'entrée de l'API :
+#   WSGI : gunicorn -c interfaces/serveur_conf.py interfaces.api_main:app
+#   ASGI : gunicorn -c interfaces/serveur_conf.py -k uvicorn.workers.UvicornWorker interfaces.asgi_main:app
+#          (ou, sans gunicorn : uvicorn interfaces.asgi_main:app --workers 2 --backlog 2048)
+# Le point d'entrée ASGI demande `pip install uvicorn` (non requis par le Procfile).
+#
+# WSGI : les workers 'gthread' servent plusieurs requêtes à la fois (un thread chacune) ; un
+# client lent immobilise un thread, pas tout le worker comme avec les workers synchrones par
+# défaut. Au plus WEB_CONCURRENCY * ASSISTANT_THREADS requêtes sont traitées ensemble.
+# ASGI : un worker par cœur suffit, chacun accepte des milliers de connexions et borne le
+# traitement à son pool (ASSISTANT_ASGI_TRAVAILLEURS, voir interfaces/asgi_main.py).
+import os
+import sys
+
+_COEURS = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+_ASGI = 'uvicorn' in os.environ.get('GUNICORN_CMD_ARGS', '') or any('asgi_main' in a for a in sys.argv)
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 10000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', _COEURS if _ASGI else 2 * _COEURS + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('ASSISTANT_THREADS', 8))
+# Connexions en attente d'acceptation (pics de clients simultanés)
+backlog = 2048
+# Connexions inactives gardées ouvertes entre deux requêtes d'un même client
+keepalive = 5
+timeout = 60
+graceful_timeout = 30
+# Renouvelle les workers de temps en temps (mémoire), sans les redémarrer tous ensemble
+max_requests = 10000
+max_requests_jitter = 1000
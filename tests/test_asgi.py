@@ -0,0 +1,65 @@
+# tests/test_asgi.py
+# Point d'entrée ASGI (interfaces/asgi_main.py) : une réponse NDJSON en flux, lue par morceaux
+# sur plusieurs threads du pool, arrive en entier et se termine.
+#   python -m pytest tests
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_DOSSIER = tempfile.TemporaryDirectory(prefix='test_asgi_')
+os.environ['ASSISTANT_DATA_PATH'] = _DOSSIER.name
+os.environ.pop('ASSISTANT_PARTITIONS', None)
+
+from interfaces import api_main
+from interfaces.asgi_main import ApplicationASGI, TAILLE_ENVOI
+
+NOMBRE_TACHES = 3000
+
+
+def appeler(application, chemin, query_string=b''):
+    """(statut, morceaux du corps, dernier more_body) d'une requête GET."""
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': chemin, 'query_string': query_string,
+             'http_version': '1.1', 'headers': [(b'host', b'localhost')]}
+    asyncio.run(application(scope, receive, send))
+    corps = [m for m in messages if m['type'] == 'http.response.body']
+    return messages[0]['status'], [m['body'] for m in corps], corps[-1].get('more_body', False)
+
+
+class TestFluxNdjson(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        api_main.stockage.appliquer_lot([('ajouter', None, {'db_id': i + 1, 'nom': f"Tâche {i}", 'type_event': 'Tache'})
+                                         for i in range(NOMBRE_TACHES)])
+        cls.application = ApplicationASGI(executeur='threads', travailleurs=4)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.application.arreter()
+
+    def test_flux_complet_sur_plusieurs_morceaux(self):
+        statut, morceaux, suite = appeler(self.application, '/api/v1/taches', b'format=ndjson')
+        corps = b''.join(morceaux)
+        self.assertEqual(statut, 200)
+        self.assertGreater(len(corps), TAILLE_ENVOI)
+        self.assertGreater(len(morceaux), 1)
+        self.assertFalse(suite)
+        lignes = [json.loads(ligne) for ligne in corps.splitlines()]
+        self.assertEqual([t['db_id'] for t in lignes], list(range(1, NOMBRE_TACHES + 1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+# tests/test_persistence.py
+# Journal de utils/persistence.py : reprise après un arrêt brutal au milieu d'une écriture,
+# cache binaire invalidé quand un modèle change.
+#   python -m pytest tests
+import os
+import sys
+import tempfile
+import unittest
+from dataclasses import dataclass, asdict, field
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.persistence import Journal
+
+
+@dataclass(slots=True)
+class Element:
+    db_id: int
+    nom: str
+
+
+def ouvrir(dossier):
+    # Element est relu à chaque décodage : un test peut remplacer la classe du module
+    return Journal("elements", asdict, lambda d: Element(**d), dossier=dossier)
+
+
+class TestJournalArretBrutal(unittest.TestCase):
+
+    def test_ligne_tronquee_puis_ajouts(self):
+        with tempfile.TemporaryDirectory() as dossier:
+            journal = ouvrir(dossier)
+            journal.charger()
+            journal.enregistrer(Element(1, "avant-arret"))
+            journal._fichier.close()
+            # Arrêt brutal pendant l'écriture de l'opération suivante
+            with open(journal.chemin_journal, 'a', encoding='utf-8') as f:
+                f.write('{"op": "put", "e": {"db_id": 2, "no')
+
+            journal = ouvrir(dossier)
+            self.assertEqual([e.nom for e in journal.charger()], ["avant-arret"])
+            journal.enregistrer(Element(3, "apres-arret-1"))
+            journal.enregistrer(Element(4, "apres-arret-2"))
+            journal._fichier.close()
+
+            journal = ouvrir(dossier)
+            self.assertEqual(sorted(e.nom for e in journal.charger()),
+                             ["apres-arret-1", "apres-arret-2", "avant-arret"])
+
+    def test_derniere_ligne_sans_fin_de_ligne(self):
+        with tempfile.TemporaryDirectory() as dossier:
+            journal = ouvrir(dossier)
+            journal.charger()
+            journal._fichier = None
+            with open(journal.chemin_journal, 'a', encoding='utf-8') as f:
+                f.write('{"op": "put", "e": {"db_id": 1, "nom": "complet"}}')
+
+            journal = ouvrir(dossier)
+            self.assertEqual([e.nom for e in journal.charger()], ["complet"])
+            journal.enregistrer(Element(2, "suivant"))
+            journal._fichier.close()
+
+            journal = ouvrir(dossier)
+            self.assertEqual(sorted(e.nom for e in journal.charger()), ["complet", "suivant"])
+
+
+class TestCacheModeles(unittest.TestCase):
+
+    def test_champ_ajoute_invalide_le_cache(self):
+        global Element
+        ancienne = Element
+        with tempfile.TemporaryDirectory() as dossier:
+            journal = ouvrir(dossier)
+            journal.charger()
+            journal.enregistrer(Element(1, "a"))
+            journal.memoriser([Element(1, "a")])
+
+            @dataclass(slots=True)
+            class Element:
+                db_id: int
+                nom: str
+                projet: str = field(default="Divers")
+            Element.__qualname__ = ancienne.__qualname__
+            try:
+                elements = ouvrir(dossier).charger()
+                self.assertEqual([e.projet for e in elements], ["Divers"])
+            finally:
+                Element = ancienne
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,545 @@
+# utils/persistence.py
+# Persistance locale du CLI : un instantané (snapshot) JSON + un journal d'opérations en
+# ajout seul. Une modification n'écrit qu'une ligne dans le journal ; au démarrage on lit
+# le dernier instantané puis on rejoue la fin du journal. Le journal est compacté dans un
+# nouvel instantané quand il devient trop long. Les objets chargés sont aussi gardés dans un
+# cache binaire (pickle), valable tant que l'instantané et le journal n'ont pas changé
+# (mtime, taille) : un démarrage sans modification ne relit ni ne décode le JSON.
+import dataclasses
+import gc
+import json
+import mmap
+import os
+import pickle
+import sys
+from array import array
+from datetime import datetime
+
+from core.codec import encoder_evenement, decoder_evenement
+from core.identifiants import allouer_id, allouer_ids
+from core.finance_agent import Transaction, GrandLivre, construire_grand_livre
+from core.import_releve import empreinte_de
+
+STORAGE_DIR = os.environ.get('ASSISTANT_STORAGE_DIR',
+                             os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "storage"))
+
+# Nombre d'opérations journalisées au-delà duquel on réécrit l'instantané
+SEUIL_COMPACTION = 1000
+VERSION_CACHE = 1
+
+
+def ecrire_atomique(chemin, contenu):
+    """Écrit un fichier (str ou bytes) de façon atomique : fichier temporaire, fsync, puis rename."""
+    temporaire = f"{chemin}.tmp"
+    binaire = isinstance(contenu, (bytes, bytearray))
+    with open(temporaire, 'wb' if binaire else 'w', encoding=None if binaire else 'utf-8') as f:
+        f.write(contenu)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporaire, chemin)
+    if hasattr(os, 'O_DIRECTORY'):
+        descripteur = os.open(os.path.dirname(chemin), os.O_DIRECTORY)
+        try:
+            os.fsync(descripteur)
+        finally:
+            os.close(descripteur)
+
+
+def _champs(classe):
+    if dataclasses.is_dataclass(classe):
+        return tuple(champ.name for champ in dataclasses.fields(classe))
+    return tuple(getattr(classe, '__slots__', ()))
+
+
+def empreinte_modeles(classes):
+    """
+    {(module, classe): noms des champs} des classes d'objets mis en cache : un champ ajouté
+    ou retiré d'un modèle (Evenement, Transaction) invalide le cache sans changer VERSION_CACHE.
+    """
+    return {(classe.__module__, classe.__qualname__): _champs(classe) for classe in classes}
+
+
+def modeles_inchanges(empreinte):
+    """Vrai si chaque classe de l'empreinte existe encore avec les mêmes champs."""
+    for (module, qualname), champs in empreinte.items():
+        classe = sys.modules.get(module)
+        for nom in qualname.split('.'):
+            classe = getattr(classe, nom, None)
+        if classe is None or _champs(classe) != champs:
+            return False
+    return True
+
+
+class Journal:
+    """Collection d'objets (identifiés par db_id) stockée en instantané + journal."""
+
+    def __init__(self, nom, encoder, decoder, dossier=STORAGE_DIR, migrer=None,
+                 seuil_compaction=SEUIL_COMPACTION):
+        self.encoder, self.decoder, self.migrer = encoder, decoder, migrer
+        self.chemin_instantane = os.path.join(dossier, f"{nom}.snapshot.json")
+        self.chemin_journal = os.path.join(dossier, f"{nom}.journal")
+        self.chemin_cache = os.path.join(dossier, f"{nom}.cache.pickle")
+        self.seuil_compaction = seuil_compaction
+        self._etat = {}          # db_id -> JSON de la dernière version persistée
+        self._nb_operations = 0  # lignes actuellement dans le journal
+        self._fichier = None
+        self._signature_cache = None
+
+    # --- Lecture ---
+
+    def _signature(self):
+        """(mtime, taille) de l'instantané et du journal : toute écriture la change."""
+        signature = []
+        for chemin in (self.chemin_instantane, self.chemin_journal):
+            try:
+                statut = os.stat(chemin)
+                signature.append((statut.st_mtime_ns, statut.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _lire_cache(self):
+        # Des centaines de milliers d'objets créés d'un coup : le ramasse-miettes n'a rien
+        # à collecter pendant la lecture, on évite ses passes répétées
+        ramasse_miettes = gc.isenabled()
+        gc.disable()
+        try:
+            with open(self.chemin_cache, 'rb') as f:
+                cache = pickle.load(f)
+            if (cache['version'] == VERSION_CACHE and cache['signature'] == self._signature()
+                    and modeles_inchanges(cache['modeles'])):
+                return cache
+        except Exception:
+            # Cache absent ou illisible (arrêt brutal, classe modifiée...) : on repasse par le JSON
+            pass
+        finally:
+            if ramasse_miettes:
+                gc.enable()
+        return None
+
+    def charger(self):
+        """
+        Lit l'instantané puis rejoue le journal ; migre l'ancien format si besoin.
+        Si le cache binaire correspond encore aux fichiers, les objets en sont repris tels quels.
+        """
+        os.makedirs(os.path.dirname(self.chemin_instantane), exist_ok=True)
+        cache = self._lire_cache()
+        if cache is not None:
+            self._etat, self._nb_operations = cache['etat'], cache['nb_operations']
+            self._signature_cache = cache['signature']
+            return cache['objets']
+        elements = {}
+        if os.path.exists(self.chemin_instantane):
+            with open(self.chemin_instantane, encoding='utf-8') as f:
+                for donnees in json.load(f)['elements']:
+                    elements[donnees['db_id']] = donnees
+        elif self.migrer is not None:
+            anciennes = self.migrer()
+            sans_id = [d for d in anciennes if d.get('db_id') is None]
+            for donnees, db_id in zip(sans_id, allouer_ids(len(sans_id))):
+                donnees['db_id'] = db_id
+            for donnees in anciennes:
+                elements[donnees['db_id']] = donnees
+
+        if os.path.exists(self.chemin_journal):
+            self._rejouer_journal(elements)
+
+        objets = [self.decoder(donnees) for donnees in elements.values()]
+        self._etat = {db_id: json.dumps(donnees, ensure_ascii=False) for db_id, donnees in elements.items()}
+        if not os.path.exists(self.chemin_instantane):
+            self.compacter()
+        self.memoriser(objets)
+        return objets
+
+    def _rejouer_journal(self, elements):
+        """
+        Applique le journal à `elements`. Une dernière ligne tronquée par un arrêt brutal est
+        coupée du fichier : sinon la prochaine session écrirait à sa suite, et sa première
+        opération (puis toutes les suivantes) serait perdue au chargement d'après.
+        """
+        with open(self.chemin_journal, 'rb+') as f:
+            fin_valide, termine = 0, True
+            for ligne in f:
+                try:
+                    operation = json.loads(ligne)
+                except ValueError:
+                    break
+                fin_valide += len(ligne)
+                termine = ligne.endswith(b"\n")
+                self._nb_operations += 1
+                if operation['op'] == 'put':
+                    elements[operation['e']['db_id']] = operation['e']
+                else:
+                    elements.pop(operation['id'], None)
+            if fin_valide < os.fstat(f.fileno()).st_size or not termine:
+                f.truncate(fin_valide)
+                if not termine:
+                    f.seek(fin_valide)
+                    f.write(b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def memoriser(self, objets):
+        """
+        Écrit le cache binaire des objets, s'il n'est plus à jour. Les objets doivent
+        correspondre à l'état persisté (modifications déjà enregistrées).
+        """
+        signature = self._signature()
+        if signature == self._signature_cache:
+            return
+        ecrire_atomique(self.chemin_cache, pickle.dumps(
+            {'version': VERSION_CACHE, 'signature': signature, 'modeles': empreinte_modeles(set(map(type, objets))),
+             'etat': self._etat,
+             'nb_operations': self._nb_operations, 'objets': objets}, protocol=pickle.HIGHEST_PROTOCOL))
+        self._signature_cache = signature
+
+    # --- Écriture ---
+
+    def _ajouter_ligne(self, operation):
+        if self._fichier is None:
+            self._fichier = open(self.chemin_journal, 'a', encoding='utf-8')
+        self._fichier.write(json.dumps(operation, ensure_ascii=False) + "\n")
+        self._fichier.flush()
+        os.fsync(self._fichier.fileno())
+        self._nb_operations += 1
+
+    def enregistrer(self, objet):
+        """Journalise la version courante d'un objet (O(1) octets écrits)."""
+        if objet.db_id is None:
+            objet.db_id = allouer_id()
+        donnees = self.encoder(objet)
+        texte = json.dumps(donnees, ensure_ascii=False)
+        if self._etat.get(objet.db_id) == texte:
+            return False
+        self._ajouter_ligne({'op': 'put', 'e': donnees})
+        self._etat[objet.db_id] = texte
+        self._compacter_si_necessaire()
+        return True
+
+    def enregistrer_lot(self, objets):
+        """Journalise plusieurs nouveaux objets en une seule écriture (un seul fsync)."""
+        sans_id = [objet for objet in objets if objet.db_id is None]
+        for objet, db_id in zip(sans_id, allouer_ids(len(sans_id))):
+            objet.db_id = db_id
+        lignes = []
+        for objet in objets:
+            donnees = self.encoder(objet)
+            self._etat[objet.db_id] = json.dumps(donnees, ensure_ascii=False)
+            lignes.append(json.dumps({'op': 'put', 'e': donnees}, ensure_ascii=False) + "\n")
+        if not lignes:
+            return
+        if self._fichier is None:
+            self._fichier = open(self.chemin_journal, 'a', encoding='utf-8')
+        self._fichier.write(''.join(lignes))
+        self._fichier.flush()
+        os.fsync(self._fichier.fileno())
+        self._nb_operations += len(lignes)
+        self._compacter_si_necessaire()
+
+    def supprimer(self, db_id):
+        if self._etat.pop(db_id, None) is not None:
+            self._ajouter_ligne({'op': 'del', 'id': db_id})
+            self._compacter_si_necessaire()
+
+    def _compacter_si_necessaire(self):
+        # Seuil proportionnel à la taille : le coût de compaction reste O(1) amorti par opération
+        if self._nb_operations >= max(self.seuil_compaction, len(self._etat)):
+            self.compacter()
+
+    def synchroniser(self, objets):
+        """Journalise uniquement les objets ajoutés, modifiés ou supprimés depuis la dernière écriture."""
+        presents = set()
+        for objet in objets:
+            self.enregistrer(objet)
+            presents.add(objet.db_id)
+        for db_id in [i for i in self._etat if i not in presents]:
+            self.supprimer(db_id)
+
+    def compacter(self):
+        """
+        Réécrit l'instantané à partir de l'état persisté (déjà encodé en JSON) puis vide le
+        journal. Un arrêt entre les deux étapes est sans risque : rejouer le journal sur le
+        nouvel instantané ne change rien.
+        """
+        contenu = (f'{{"date": "{datetime.now().isoformat()}", "elements": ['
+                   + ', '.join(self._etat.values()) + ']}')
+        ecrire_atomique(self.chemin_instantane, contenu)
+        if self._fichier is not None:
+            self._fichier.close()
+            self._fichier = None
+        ecrire_atomique(self.chemin_journal, '')
+        self._nb_operations = 0
+
+
+class FichiersGrandLivre:
+    """
+    Grand livre financier sur disque : un fichier binaire par colonne (valeurs brutes de
+    l'array, en ajout seul) et une entête JSON (codes, cumuls, nombre de lignes valides).
+    Au chargement les colonnes sont projetées en mémoire (mmap) et copiées d'un bloc.
+    """
+
+    def __init__(self, dossier=os.path.join(STORAGE_DIR, "grand_livre")):
+        self.dossier = dossier
+        self.chemin_entete = os.path.join(dossier, "entete.json")
+
+    def _chemin(self, nom):
+        return os.path.join(self.dossier, f"{nom}.col")
+
+    def _lire_colonne(self, nom, code, nombre):
+        colonne = array(code)
+        taille = nombre * colonne.itemsize
+        with open(self._chemin(nom), 'rb') as f:
+            if os.fstat(f.fileno()).st_size < taille:
+                raise ValueError(f"Colonne {nom} tronquée")
+            if taille:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as projection:
+                    with memoryview(projection) as vue:
+                        colonne.frombytes(vue[:taille])
+        return colonne
+
+    def _lire(self):
+        with open(self.chemin_entete, encoding='utf-8') as f:
+            entete = json.load(f)
+        if entete.get('ordre_octets') != sys.byteorder:
+            raise ValueError("Colonnes écrites sur une autre architecture")
+        colonnes = {nom: self._lire_colonne(nom, code, entete['nombre']) for nom, code in GrandLivre.COLONNES}
+        return entete, colonnes
+
+    def charger(self, transactions):
+        """
+        Charge le grand livre s'il correspond aux transactions (même nombre, même dernier
+        identifiant) ; sinon le reconstruit depuis la liste et le réécrit.
+        """
+        os.makedirs(self.dossier, exist_ok=True)
+        dernier_id = transactions[-1].db_id if transactions else None
+        try:
+            entete, colonnes = self._lire()
+            if entete['nombre'] == len(transactions) and entete['dernier_id'] == dernier_id:
+                # Octets ajoutés après la dernière entête (arrêt brutal pendant un ajout) : ignorés
+                for nom, code in GrandLivre.COLONNES:
+                    taille = entete['nombre'] * colonnes[nom].itemsize
+                    if os.path.getsize(self._chemin(nom)) > taille:
+                        os.truncate(self._chemin(nom), taille)
+                return GrandLivre.depuis_colonnes(entete, colonnes)
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        livre = construire_grand_livre(transactions)
+        self.ecrire(livre)
+        return livre
+
+    def _ecrire_entete(self, livre):
+        ecrire_atomique(self.chemin_entete, json.dumps({'ordre_octets': sys.byteorder, **livre.entete()},
+                                                       ensure_ascii=False))
+
+    def ecrire(self, livre):
+        """Réécrit toutes les colonnes puis l'entête (reconstruction)."""
+        os.makedirs(self.dossier, exist_ok=True)
+        for nom, _ in GrandLivre.COLONNES:
+            ecrire_atomique(self._chemin(nom), getattr(livre, nom).tobytes())
+        self._ecrire_entete(livre)
+
+    def ajouter(self, livre, transaction):
+        self.ajouter_lot(livre, [transaction])
+
+    def ajouter_lot(self, livre, transactions):
+        """Ajoute des transactions : les nouvelles valeurs en fin de chaque colonne, puis l'entête."""
+        debut = len(livre)
+        for transaction in transactions:
+            livre.ajouter(transaction)
+        if len(livre) == debut:
+            return
+        for nom, _ in GrandLivre.COLONNES:
+            colonne = getattr(livre, nom)
+            with open(self._chemin(nom), 'ab') as f:
+                f.write(colonne[debut:].tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        # L'entête fait foi : tant qu'elle n'est pas réécrite, la ligne ajoutée est ignorée
+        self._ecrire_entete(livre)
+
+
+class IndexEmpreintes:
+    """
+    Empreintes 64 bits des lignes de relevés déjà importées (core/import_releve.py) : un
+    fichier binaire en ajout seul, chargé (mmap) dans un set pour des recherches en O(1).
+    Un import en cours est d'abord noté dans un fichier d'intention (empreinte, db_id) : après
+    un arrêt brutal, les empreintes des transactions effectivement journalisées sont reprises.
+    """
+
+    def __init__(self, chemin=os.path.join(STORAGE_DIR, "releves.empreintes")):
+        self.chemin = chemin
+        self.chemin_en_cours = f"{chemin}.en_cours"
+        self._empreintes = None
+
+    def charger(self, transactions=None):
+        """
+        Lit le fichier ; à défaut, l'initialise avec les transactions déjà saisies. Avec les
+        transactions chargées, termine aussi un import interrompu.
+        """
+        if self._empreintes is not None:
+            return self._empreintes
+        valeurs = array('Q')
+        if os.path.exists(self.chemin):
+            with open(self.chemin, 'rb') as f:
+                taille = os.fstat(f.fileno()).st_size // valeurs.itemsize * valeurs.itemsize
+                if taille:   # une écriture interrompue laisse au plus une empreinte incomplète
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as projection:
+                        with memoryview(projection) as vue:
+                            valeurs.frombytes(vue[:taille])
+            self._empreintes = set(valeurs)
+        else:
+            os.makedirs(os.path.dirname(self.chemin), exist_ok=True)
+            self._empreintes = set()
+            self.ajouter([empreinte_de(t) for t in transactions or ()])
+        if transactions is not None and os.path.exists(self.chemin_en_cours):
+            self._reprendre(transactions)
+        return self._empreintes
+
+    def _reprendre(self, transactions):
+        with open(self.chemin_en_cours, encoding='utf-8') as f:
+            try:
+                paires = json.load(f)
+            except ValueError:
+                paires = []   # intention incomplète : l'import n'avait encore rien écrit
+        presents = {t.db_id for t in transactions}
+        self.ajouter([empreinte for empreinte, db_id in paires if db_id in presents])
+        self.terminer()
+
+    def __contains__(self, empreinte):
+        return empreinte in self.charger()
+
+    def preparer(self, paires):
+        """Note les (empreinte, db_id) d'un import avant d'écrire ses transactions."""
+        ecrire_atomique(self.chemin_en_cours, json.dumps(paires))
+
+    def ajouter(self, empreintes):
+        self.charger()
+        with open(self.chemin, 'ab') as f:
+            f.write(array('Q', empreintes).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self._empreintes.update(empreintes)
+
+    def terminer(self):
+        if os.path.exists(self.chemin_en_cours):
+            os.remove(self.chemin_en_cours)
+
+
+# --- MIGRATION DE L'ANCIEN FORMAT (storage/inventaire.json) ---
+
+def _lire_ancien_fichier(nom):
+    chemin = os.path.join(STORAGE_DIR, nom)
+    if not os.path.exists(chemin):
+        return []
+    with open(chemin, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _date_iso(valeur):
+    """'2025-11-01 17:00' ou '2025-10-30' -> ISO (datetime.fromisoformat accepte les deux)."""
+    return datetime.fromisoformat(valeur).isoformat() if valeur else None
+
+
+def migrer_ancien_inventaire():
+    """Convertit l'ancien schéma (duree_minutes, date_heure_debut, date_limite) au format EvenementSchema."""
+    evenements = []
+    for ancien in _lire_ancien_fichier("inventaire.json"):
+        evenements.append({
+            'nom': ancien['nom'],
+            'type_event': ancien.get('type_event', 'Tache'),
+            'urgence': ancien.get('urgence', 3),
+            'importance': ancien.get('importance', 3),
+            'duree_totale_minutes': ancien.get('duree_totale_minutes', ancien.get('duree_minutes', 60)),
+            'projet': ancien.get('projet', 'Divers'),
+            'est_complete': ancien.get('est_complete', False),
+            'progression_pourcentage': ancien.get('progression_pourcentage', 0),
+            'date_debut': _date_iso(ancien.get('date_debut') or ancien.get('date_heure_debut')),
+            # La date limite d'une tâche devient sa date de fin
+            'date_fin': _date_iso(ancien.get('date_fin') or ancien.get('date_limite')),
+            'db_id': ancien.get('db_id'),
+        })
+    return evenements
+
+
+def migrer_anciennes_transactions():
+    return _lire_ancien_fichier("transactions.json")
+
+
+_journal_inventaire = Journal("inventaire", encoder_evenement, decoder_evenement,
+                              migrer=migrer_ancien_inventaire)
+_journal_transactions = Journal("transactions", Transaction.to_dict, lambda d: Transaction(**d),
+                                migrer=migrer_anciennes_transactions)
+_fichiers_grand_livre = FichiersGrandLivre()
+_index_empreintes = IndexEmpreintes()
+
+
+# --- API UTILISÉE PAR LE CLI ---
+
+def charger_inventaire():
+    return _journal_inventaire.charger()
+
+
+def memoriser_inventaire(liste_evenements):
+    """Met à jour le cache binaire (fin de session) : le prochain démarrage évite le JSON."""
+    _journal_inventaire.memoriser(liste_evenements)
+
+
+def sauvegarder_inventaire(liste_evenements):
+    """N'écrit que les différences avec l'état déjà persisté."""
+    _journal_inventaire.synchroniser(liste_evenements)
+
+
+def enregistrer_evenement(evenement):
+    """Persiste un seul événement modifié ou ajouté."""
+    _journal_inventaire.enregistrer(evenement)
+
+
+def charger_transactions():
+    return _journal_transactions.charger()
+
+
+def memoriser_transactions(liste_transactions):
+    _journal_transactions.memoriser(liste_transactions)
+
+
+def sauvegarder_transactions(liste_transactions):
+    _journal_transactions.synchroniser(liste_transactions)
+
+
+def enregistrer_transaction(transaction):
+    _journal_transactions.enregistrer(transaction)
+
+
+def charger_grand_livre(liste_transactions):
+    return _fichiers_grand_livre.charger(liste_transactions)
+
+
+def ajouter_au_grand_livre(grand_livre, transaction):
+    _fichiers_grand_livre.ajouter(grand_livre, transaction)
+
+
+def empreintes_importees(liste_transactions):
+    """Index des lignes de relevés déjà importées (supporte `in`)."""
+    _index_empreintes.charger(liste_transactions)
+    return _index_empreintes
+
+
+def importer_transactions(liste_transactions, grand_livre, nouvelles):
+    """
+    Enregistre un import de relevé en une écriture groupée : intention (empreintes et db_id),
+    journal des transactions, grand livre, puis empreintes. Après un arrêt à n'importe quelle
+    étape, le prochain chargement de l'index reprend les empreintes des transactions
+    journalisées : aucune n'est perdue ni réimportée en double.
+    `nouvelles` est une liste de (empreinte, transaction).
+    """
+    transactions = [transaction for _, transaction in nouvelles]
+    sans_id = [transaction for transaction in transactions if transaction.db_id is None]
+    for transaction, db_id in zip(sans_id, allouer_ids(len(sans_id))):
+        transaction.db_id = db_id
+    _index_empreintes.preparer([(empreinte, transaction.db_id) for empreinte, transaction in nouvelles])
+    _journal_transactions.enregistrer_lot(transactions)
+    liste_transactions.extend(transactions)
+    if grand_livre is not None:
+        _fichiers_grand_livre.ajouter_lot(grand_livre, transactions)
+    _index_empreintes.ajouter([empreinte for empreinte, _ in nouvelles])
+    _index_empreintes.terminer()